@@ -1,22 +1,23 @@
 
 
+import logging
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import io
-import json
-import hashlib
-import re
-import time
 from datetime import datetime, timezone, timedelta
-from google.cloud import firestore
-from google.oauth2 import service_account
+from banco import fuso_br
+from repositorio import criar_repositorio
+from seguranca import Security
+import resumos
+import datas
+import horarios
+import referencias
+import sessao
+import telemetria
+from auditoria import FilaAuditoria
 
 
 
 # ================= CONFIGURAÇÃO =================
 st.set_page_config(page_title="Vivv Pro Elite", layout="wide", page_icon="⚡", initial_sidebar_state="collapsed")
-fuso_br = timezone(timedelta(hours=-3))
 
 # ================= ESTILO PREMIUM ULTRA AVANÇADO =================
 st.markdown("""
@@ -315,36 +316,29 @@ st.markdown("""
 <div class="vivv-logo">VIVV<span style="color:#00d4ff">.</span>PRO</div>
 """, unsafe_allow_html=True)
 
-# ================= SEGURANÇA =================
-class Security:
-    SALT = "vivv_secure_2026_elite"
-    
-    @staticmethod
-    def hash_senha(senha): return hashlib.sha256((Security.SALT + senha).encode()).hexdigest()
-    @staticmethod
-    def email_valido(email): return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email))
-    @staticmethod
-    def telefone_valido(tel): return len(''.join(filter(str.isdigit, tel))) in [10, 11]
-
-# ================= FIREBASE =================
+# ================= BANCO =================
 @st.cache_resource
-def init_firebase():
-    try:
-        if "FIREBASE_DETAILS" not in st.secrets: return None
-        creds = json.loads(st.secrets["FIREBASE_DETAILS"])
-        db = firestore.Client(credentials=service_account.Credentials.from_service_account_info(creds))
-        db.collection("test").document("test").set({"test": datetime.now(fuso_br)})
-        return db
-    except: return None
+def init_repositorio():
+    """Conecta e faz a sondagem somente leitura uma vez por processo. Falhas não ficam no cache:
+    o próximo rerun tenta de novo."""
+    repo = criar_repositorio(st.secrets)
+    if repo: repo = telemetria.RepositorioMedido(repo); repo.verificar(timeout=5)
+    return repo
 
-db = init_firebase()
-if not db: st.error("❌ Erro ao conectar ao banco. Verifique as configurações."); st.stop()
+@st.cache_resource
+def init_telemetria():
+    try: telemetria.exportar(st.secrets)
+    except Exception as e: logging.getLogger("vivv").warning("Telemetria indisponível: %s", e)
+
+init_telemetria()
+
+try: repo = init_repositorio()
+except: repo = None
+if not repo: st.error("❌ Erro ao conectar ao banco. Verifique as configurações."); st.stop()
 
 # ================= FUNÇÕES BANCO =================
 def buscar_usuario(email):
-    try:
-        doc = db.collection("usuarios").document(email).get()
-        return doc.to_dict() if doc.exists else None
+    try: return repo.buscar_usuario(email)
     except: return None
 
 def criar_usuario(dados):
@@ -356,28 +350,94 @@ def criar_usuario(dados):
             "criado_em": datetime.now(fuso_br),
             "ativo": False,
             "plano": "pro",
+            "resumos_versao": resumos.VERSAO,
+            "datas_versao": datas.VERSAO,
+            "horarios_versao": horarios.VERSAO,
+            "referencias_versao": referencias.VERSAO,
             "senha": Security.hash_senha(dados["senha"])
         })
-        db.collection("usuarios").document(dados["email"]).set(dados)
+        repo.salvar_usuario(dados["email"], dados)
         return True
     except: st.error("❌ Erro ao criar conta"); return False
 
-@st.cache_data(ttl=60)
-def carregar_dados(email):
-    try:
-        ref = db.collection("usuarios").document(email)
-        def carregar(col): return [{"id": d.id, **d.to_dict()} for d in ref.collection(col).stream()]
-        return [carregar(c) for c in ["meus_clientes", "meus_servicos", "minha_agenda", "meu_caixa"]]
-    except: return [[], [], [], []]
+# ================= SINCRONIZAÇÃO INCREMENTAL =================
+@st.cache_resource
+def cache_dados():
+    import sincronizacao
+    return sincronizacao.Cache(repo)
+
+def carregar_dados(email): return cache_dados().carregar(email)
+
+def invalidar_cache(email, *colecoes): cache_dados().invalidar(email, *colecoes)
+
+def agendar(email, dados, duracao): return cache_dados().agendar(email, dados, duracao, indice=usa_horarios())
+
+def carregar_periodo(email, inicio, fim): return cache_dados().periodo(email, inicio, fim)
+
+def carregar_agenda_hoje(email): return cache_dados().agenda_hoje(email)
+
+def carregar_ocupacao(email): return cache_dados().ocupacao(email, indice=usa_horarios())
+
+def buscar_clientes(email, consulta): return cache_dados().buscar_clientes(email, consulta)
+
+def carregar_historico(email, col, filtros, pagina): return cache_dados().historico(email, col, filtros, pagina)
+
+@st.cache_resource
+def fila_auditoria(): return FilaAuditoria(repo.log_auditoria_lote)
 
 def log_auditoria(email, acao, detalhes=""):
-    try: db.collection("logs_auditoria").add({"email": email, "acao": acao, "detalhes": detalhes, "timestamp": datetime.now(fuso_br)})
-    except: pass
+    fila_auditoria().registrar({"email": email, "acao": acao, "detalhes": detalhes, "timestamp": datetime.now(fuso_br)})
+
+@st.cache_resource
+def fila_escritas():
+    import escritas
+    cache = cache_dados()
+    return escritas.FilaEscritas(cache.gravar_lote, repo.existe, st.secrets.get("VIVV_FILA", escritas.ARQUIVO), ao_gravar=cache.replicar)
+
+def enfileirar(email, col, dados):
+    """Aceita o envio sem esperar o banco: vai para a fila local e já entra no snapshot do tenant."""
+    chave = fila_escritas().enfileirar(email, col, dados)
+    cache_dados().replicar(email, col, [{**dados, "id": chave}])
+    st.session_state.setdefault("escritas_enviadas", {})[chave] = col
+    return chave
 
 # ================= SESSÃO =================
 if "logado" not in st.session_state:
     st.session_state.update({"logado": False, "user_email": None, "user_data": None})
 
+@st.cache_resource
+def perfis(): return sessao.Perfis()
+
+def segredo_sessao(): return st.secrets.get("VIVV_SESSAO_SEGREDO")
+
+def entrar(email, usuario):
+    st.session_state.update({"logado": True, "user_email": email, "user_data": usuario, "saiu": False})
+    perfis().atualizar(email, usuario)
+    if segredo_sessao(): st.session_state.cookie = sessao.emitir(segredo_sessao(), email, usuario["senha"])
+
+def sair():
+    # st.context.cookies continua com o token desta conexão: "saiu" impede restaurar a sessão
+    st.session_state.update({"logado": False, "user_email": None, "user_data": None, "saiu": True, "cookie": ""})
+
+# O cookie só pode ser escrito no navegador: o token do login (ou o apagamento, ao sair) vai
+# num script no rerun seguinte
+if "cookie" in st.session_state:
+    token = st.session_state.pop("cookie")
+    st.html(f"<script>document.cookie = '{sessao.COOKIE}={token}; Max-Age={sessao.DURACAO if token else 0}; Path=/; SameSite=Strict'"
+            " + (location.protocol === 'https:' ? '; Secure' : '');</script>", unsafe_allow_javascript=True)
+
+# Refresh ou aba nova: o token assinado do cookie restaura a sessão; o perfil (do cache do processo)
+# só é buscado depois que a assinatura confere
+if not st.session_state.logado and not st.session_state.get("saiu") and segredo_sessao():
+    token = st.context.cookies.get(sessao.COOKIE)
+    email = sessao.ler(segredo_sessao(), token)
+    usuario = perfis().obter(email, buscar_usuario) if email else None
+    if usuario and sessao.conferir(segredo_sessao(), token, usuario.get("senha", "")):
+        st.session_state.update({"logado": True, "user_email": email, "user_data": usuario})
+elif st.session_state.logado:
+    # Relido a cada TTL_PERFIL: ativação ou bloqueio feitos fora do app chegam sem novo login
+    st.session_state.user_data = perfis().obter(st.session_state.user_email, buscar_usuario) or st.session_state.user_data
+
 # ================= LOGIN/CADASTRO =================
 if not st.session_state.logado:
     col_l, col_c, col_r = st.columns([1, 2, 1])
@@ -392,14 +452,14 @@ if not st.session_state.logado:
             with st.form("login_form"):
                 email = st.text_input("Email").lower().strip()
                 senha = st.text_input("Senha", type="password")
-                if st.form_submit_button("⚡ ENTRAR", use_container_width=True):
+                if st.form_submit_button("⚡ ENTRAR", width="stretch"):
                     if email and senha:
                         usuario = buscar_usuario(email)
                         if usuario and usuario["senha"] == Security.hash_senha(senha):
                             if usuario.get("ativo"):
-                                st.session_state.update({"logado": True, "user_email": email, "user_data": usuario})
+                                entrar(email, usuario)
                                 log_auditoria(email, "LOGIN")
-                                st.success("✅ Login realizado!"); time.sleep(1); st.rerun()
+                                st.rerun()
                             else: st.error("❌ Conta aguardando pagamento")
                         else: st.error("❌ Credenciais inválidas")
         
@@ -418,7 +478,7 @@ if not st.session_state.logado:
                 senha = st.text_input("Senha", type="password")
                 senha_confirm = st.text_input("Confirmar Senha", type="password")
                 
-                if st.form_submit_button("🚀 CRIAR CONTA PRO", use_container_width=True):
+                if st.form_submit_button("🚀 CRIAR CONTA PRO", width="stretch"):
                     if not all([username, nome, email, whatsapp, negocio, senha]):
                         st.error("❌ Preencha todos os campos")
                     elif senha != senha_confirm:
@@ -455,210 +515,487 @@ if not st.session_state.user_data.get("ativo"):
         """)
         col_b1, col_b2 = st.columns(2)
         with col_b1:
-            if st.button("💳 FINALIZAR PAGAMENTO", use_container_width=True):
+            if st.button("💳 FINALIZAR PAGAMENTO", width="stretch"):
                 st.link_button("Pagar com Stripe", "https://buy.stripe.com/test_6oU4gB7Q4glM1JZ2Z06J200")
         with col_b2:
-            if st.button("🔄 JÁ PAGUEI - VERIFICAR", type="secondary", use_container_width=True):
-                time.sleep(2); st.rerun()
-        if st.button("🚪 SAIR", type="secondary"): st.session_state.logado = False; st.rerun()
+            if st.button("🔄 JÁ PAGUEI - VERIFICAR", type="secondary", width="stretch"):
+                # Uma leitura do documento do usuário, fora do cache de perfis
+                usuario = buscar_usuario(st.session_state.user_email)
+                if usuario:
+                    perfis().atualizar(st.session_state.user_email, usuario); st.session_state.user_data = usuario
+                if usuario and usuario.get("ativo"): st.rerun()
+                else: st.warning("⏳ Pagamento ainda não confirmado. Tente de novo em alguns instantes.")
+        if st.button("🚪 SAIR", type="secondary"): sair(); st.rerun()
         st.markdown('</div>', unsafe_allow_html=True)
     st.stop()
 
 # ================= DADOS DO USUÁRIO =================
-clientes, servicos, agenda, caixa = carregar_dados(st.session_state.user_email)
-
-# ================= DASHBOARD =================
-col_h1, col_h2 = st.columns([5, 1])
-with col_h1: st.markdown(f"# 🚀 {st.session_state.user_data.get('nome_negocio', 'Vivv Pro')}")
-with col_h2: 
-    if st.button("🚪 SAIR", use_container_width=True): 
-        st.session_state.logado = False; st.rerun()
-
-# Métricas
-faturamento = sum(x.get("valor", 0) for x in caixa if x.get("tipo") == "Entrada")
-despesas = sum(x.get("valor", 0) for x in caixa if x.get("tipo") == "Saída")
-lucro = faturamento - despesas
-agendamentos_hoje = len([a for a in agenda if a.get('data') == datetime.now(fuso_br).strftime('%d/%m/%Y')])
-
-col_m1, col_m2, col_m3, col_m4 = st.columns(4)
-with col_m1: st.markdown(f'<div class="hologram-card"><small>👥 CLIENTES</small><h2>{len(clientes)}</h2></div>', unsafe_allow_html=True)
-with col_m2: st.markdown(f'<div class="hologram-card"><small>💰 FATURAMENTO</small><h2 style="color:#00d4ff">R$ {faturamento:,.2f}</h2></div>', unsafe_allow_html=True)
-with col_m3: st.markdown(f'<div class="hologram-card"><small>📈 LUCRO</small><h2 style="color:#4CAF50">R$ {lucro:,.2f}</h2></div>', unsafe_allow_html=True)
-with col_m4: st.markdown(f'<div class="hologram-card"><small>📅 AGENDA HOJE</small><h2 style="color:#FFA726">{agendamentos_hoje}</h2></div>', unsafe_allow_html=True)
-
-# Alertas
-if agendamentos_hoje > 15: st.markdown('<div class="alert-pulse">⚠️ AGENDA LOTADA! Mais de 15 atendimentos hoje</div>', unsafe_allow_html=True)
-
-st.divider()
-
-# ================= GRÁFICO FINANCEIRO - COLUNAS =================
-col_g1, col_g2 = st.columns([2, 1])
-with col_g1:
-    if caixa:
+# Módulos pesados só a partir daqui: login e ativação abrem sem pandas, NumPy, Plotly e xlsxwriter
+import pandas as pd
+import plotly.graph_objects as go
+import exportacao
+import importacao
+import painel
+import periodos
+email_tenant = st.session_state.user_email
+telemetria.iniciar_rerun(email_tenant)
+try:
+    with telemetria.span("carregar_dados"): (clientes, servicos, agenda, caixa), erros_carga = carregar_dados(email_tenant)
+    if erros_carga: st.warning(f"⚠️ Não foi possível atualizar: {', '.join(erros_carga)}. Exibindo os últimos dados disponíveis.")
+
+    # Cada seção é um fragmento: interações e envios reexecutam só as seções que mostram a
+    # coleção alterada, sem reinjetar o CSS nem refazer o resto da página.
+    DEPENDENTES = {
+        "minha_agenda": ["metricas", "aba_agendar", "historico"],
+        "meus_clientes": ["metricas", "aba_clientes", "aba_agendar", "historico", "pendentes"],
+        "meus_servicos": ["aba_servicos", "aba_agendar", "historico", "pendentes"],
+        "meu_caixa": ["metricas", "grafico", "aba_caixa", "historico", "pendentes"],
+    }
+
+    def dados_tenant():
+        """(clientes, serviços, agenda, caixa) do cache — barato, chamado por cada fragmento."""
+        return carregar_dados(email_tenant)[0]
+
+    def usa_resumos(): return bool(st.session_state.user_data.get("resumos_versao"))
+
+    # Sem a reconstrução (horarios.py) a ocupação não tem os agendamentos antigos: conflitos e horários
+    # livres saem da agenda em cache, sem a garantia da transação
+    def usa_horarios(): return bool(st.session_state.user_data.get("horarios_versao"))
+
+    # Antes da vinculação (referencias.py) os agendamentos antigos só têm o nome do serviço
+    def usa_referencias(): return bool(st.session_state.user_data.get("referencias_versao"))
+
+    def avisar(fragmento, msg, erro=False): st.session_state[f"_aviso_{fragmento}"] = (msg, erro)
+
+    def mostrar_aviso(fragmento):
+        aviso = st.session_state.pop(f"_aviso_{fragmento}", None)
+        if aviso and aviso[1]: st.error(aviso[0])
+        elif aviso: st.toast(aviso[0])
+
+    # ================= DASHBOARD =================
+    col_h1, col_h2 = st.columns([5, 1])
+    with col_h1: st.markdown(f"# 🚀 {st.session_state.user_data.get('nome_negocio', 'Vivv Pro')}")
+    with col_h2: 
+        if st.button("🚪 SAIR", width="stretch"): 
+            sair(); st.rerun()
+
+    # ================= PERÍODO =================
+    PERIODOS = ["Este mês", "Mês passado", "Personalizado"]
+
+    def periodo_escolhido():
+        """(inicio, fim) do seletor; "Personalizado" sem as duas datas fica no mês atual."""
+        hoje = datetime.now(fuso_br).date()
+        escolha, intervalo = st.session_state.get("periodo_escolha"), st.session_state.get("periodo_intervalo") or ()
+        if escolha == "Mês passado": return periodos.mes_passado(hoje)
+        if escolha == "Personalizado" and len(intervalo) == 2: return periodos.intervalo(*intervalo)
+        return periodos.este_mes(hoje)
+
+    def serie_periodo(inicio, fim):
+        """((dia, entradas, saídas), ...) de [inicio, fim): resumos diários do intervalo, ou varredura do caixa
+        para tenants sem backfill dos resumos."""
+        if usa_resumos(): return tuple(resumos.serie(carregar_periodo(email_tenant, inicio, fim)))
+        return painel.serie_caixa(dados_tenant()[3], inicio=inicio, fim=fim)
+
+    def trocar_periodo(): st.rerun(["seletor_periodo", "metricas", "grafico"])
+
+    @st.fragment(key="seletor_periodo")
+    @telemetria.secao("seletor_periodo", email_tenant)
+    def seletor_periodo():
+        col_p1, col_p2 = st.columns([2, 3])
+        with col_p1: st.radio("Período", PERIODOS, horizontal=True, key="periodo_escolha", on_change=trocar_periodo, label_visibility="collapsed")
+        with col_p2:
+            if st.session_state.get("periodo_escolha") == "Personalizado":
+                st.date_input("Intervalo", value=(), format="DD/MM/YYYY", key="periodo_intervalo", on_change=trocar_periodo, label_visibility="collapsed")
+
+    def variacao_html(atual, anterior):
+        v = periodos.variacao(atual, anterior)
+        if v is None: return ""
+        return f'<small style="color:{"#4CAF50" if v >= 0 else "#ff5252"}">{"▲" if v >= 0 else "▼"} {abs(v):.0%} vs período anterior</small>'
+
+    @st.fragment(key="metricas")
+    @telemetria.secao("metricas", email_tenant)
+    def painel_metricas():
+        clientes, _, agenda, caixa = dados_tenant()
+        # Faturamento e lucro do período, comparados com o anterior (os dois em cache por período)
+        inicio, fim = periodo_escolhido()
+        entradas, saidas = periodos.totais(serie_periodo(inicio, fim))
+        entradas_ant, saidas_ant = periodos.totais(serie_periodo(*periodos.anterior(inicio, fim)))
+        # Tenants sem migração de datas ainda varrem a agenda
+        m = painel.metricas(clientes, agenda, caixa, periodo=(entradas, saidas),
+                            agenda_hoje=carregar_agenda_hoje(email_tenant) if st.session_state.user_data.get("datas_versao") else None)
+        faturamento, lucro, agendamentos_hoje = m["faturamento"], m["lucro"], m["agenda_hoje"]
+        rotulo = periodos.rotulo(inicio, fim)
+
+        col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+        with col_m1: st.markdown(f'<div class="hologram-card"><small>👥 CLIENTES</small><h2>{m["clientes"]}</h2></div>', unsafe_allow_html=True)
+        with col_m2: st.markdown(f'<div class="hologram-card"><small>💰 FATURAMENTO · {rotulo}</small><h2 style="color:#00d4ff">R$ {faturamento:,.2f}</h2>'
+                                 f'{variacao_html(faturamento, entradas_ant)}</div>', unsafe_allow_html=True)
+        with col_m3: st.markdown(f'<div class="hologram-card"><small>📈 LUCRO · {rotulo}</small><h2 style="color:#4CAF50">R$ {lucro:,.2f}</h2>'
+                                 f'{variacao_html(lucro, entradas_ant - saidas_ant)}</div>', unsafe_allow_html=True)
+        with col_m4: st.markdown(f'<div class="hologram-card"><small>📅 AGENDA HOJE</small><h2 style="color:#FFA726">{agendamentos_hoje}</h2></div>', unsafe_allow_html=True)
+
+        # Alertas
+        if agendamentos_hoje > 15: st.markdown('<div class="alert-pulse">⚠️ AGENDA LOTADA! Mais de 15 atendimentos hoje</div>', unsafe_allow_html=True)
+
+    seletor_periodo()
+    painel_metricas()
+    st.divider()
+
+    # ================= GRÁFICO FINANCEIRO - COLUNAS =================
+    def serie_financeira():
+        """(série do período escolhido, por mês?) — intervalos longos viram uma barra por mês."""
+        inicio, fim = periodo_escolhido()
+        serie = serie_periodo(inicio, fim)
+        if (fim - inicio).days > periodos.MAX_DIAS_DIARIO: return periodos.por_mes(serie), True
+        return serie, False
+
+    @st.cache_data(max_entries=500, show_spinner=False)
+    def figura_financeira(serie, formato_data="%d/%m"):
+        """Figura memoizada pela série: só é refeita quando os números mudam."""
+        df_grouped = pd.DataFrame(list(serie), columns=['data', 'Entrada', 'Saída'])
+        df_grouped = df_grouped.assign(data=pd.to_datetime(df_grouped['data'])).set_index('data')
+    
+        fig = go.Figure()
+
+        # Barras de FATURAMENTO (Entradas)
+        fig.add_trace(go.Bar(
+            x=df_grouped.index,
+            y=df_grouped['Entrada'],
+            name='💰 FATURAMENTO',
+            marker_color='#00d4ff',
+            opacity=0.9,
+            hovertemplate='R$ %{y:,.2f}<extra></extra>'
+        ))
+
+        # Barras de DESPESAS (Saídas) - VERMELHO
+        fig.add_trace(go.Bar(
+            x=df_grouped.index,
+            y=df_grouped['Saída'],
+            name='📉 DESPESAS',
+            marker=dict(
+                color='#ff5252',
+                line=dict(color='#ff8a80', width=2)
+                ),  # MANTÉM VERMELHO
+            opacity=0.9,
+            hovertemplate='R$ %{y:,.2f}<extra></extra>'
+        ))
+
+        # Layout premium
+        fig.update_layout(
+            title="📊 PERFORMANCE FINANCEIRA",
+            barmode='group',
+            height=400,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font_color="white",
+            hovermode="x unified",
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1,
+                font=dict(size=14)
+            ),
+            xaxis=dict(
+                tickformat=formato_data,
+                gridcolor='rgba(255,255,255,0.1)',
+                title="DATA"
+            ),
+            yaxis=dict(
+                gridcolor='rgba(255,255,255,0.1)',
+                title="VALOR (R$)",
+                tickprefix="R$ "
+            ),
+            margin=dict(l=20, r=20, t=60, b=40)
+        )
+        return fig
+
+    @st.fragment(key="grafico")
+    @telemetria.secao("grafico", email_tenant)
+    def grafico_financeiro():
         try:
-            df = pd.DataFrame(caixa)
-            df['data'] = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce')
-            df = df.dropna().sort_values('data')
-            
-            # Agrupar por data
-            df_grouped = df.groupby(['data', 'tipo'])['valor'].sum().unstack(fill_value=0)
-            
-            # Garantir as colunas necessárias
-            for col in ['Entrada', 'Saída']:
-                if col not in df_grouped.columns:
-                    df_grouped[col] = 0
-            
-            # Pegar últimos 14 dias
-            df_grouped = df_grouped.tail(14)
-            
-            fig = go.Figure()
-            
-            # Barras de FATURAMENTO (Entradas)
-            fig.add_trace(go.Bar(
-                x=df_grouped.index,
-                y=df_grouped['Entrada'],
-                name='💰 FATURAMENTO',
-                marker_color='#00d4ff',
-                opacity=0.9,
-                hovertemplate='R$ %{y:,.2f}<extra></extra>'
-            ))
-            
-            # Barras de DESPESAS (Saídas) - VERMELHO
-            fig.add_trace(go.Bar(
-                x=df_grouped.index,
-                y=df_grouped['Saída'],
-                name='📉 DESPESAS',
-                marker=dict(
-                    color='#ff5252',
-                    line=dict(color='#ff8a80', width=2)
-                    ),  # MANTÉM VERMELHO
-                opacity=0.9,
-                hovertemplate='R$ %{y:,.2f}<extra></extra>'
-            ))
-            
-            # Layout premium
-            fig.update_layout(
-                title="📊 PERFORMANCE FINANCEIRA",
-                barmode='group',
-                height=400,
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_color="white",
-                hovermode="x unified",
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1,
-                    font=dict(size=14)
-                ),
-                xaxis=dict(
-                    tickformat="%d/%m",
-                    gridcolor='rgba(255,255,255,0.1)',
-                    title="DATA"
-                ),
-                yaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    title="VALOR (R$)",
-                    tickprefix="R$ "
-                ),
-                margin=dict(l=20, r=20, t=60, b=40)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
+            with telemetria.span("grafico.serie"): serie, mensal = serie_financeira()
+            if serie:
+                with telemetria.span("grafico.figura"): fig = figura_financeira(serie, "%m/%Y" if mensal else "%d/%m")
+                with telemetria.span("grafico.plotly"): st.plotly_chart(fig, width="stretch")
+            else: st.caption(f"📊 Sem lançamentos em {periodos.rotulo(*periodo_escolhido())}")
         except Exception as e:
             st.info("📊 Processando dados para gráfico...")
             # st.error(f"Erro: {e}")  # Remova o comentário para debug
 
-# ================= OPERAÇÕES =================
-st.markdown("### ⚡ Gestão Operacional")
-tab1, tab2, tab3, tab4 = st.tabs(["📅 Agendar", "👤 Clientes", "🛠️ Serviços", "💰 Caixa"])
-
-with tab1:
-    with st.form("agendar", clear_on_submit=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            cliente = st.selectbox("Cliente", [c['nome'] for c in clientes]) if clientes else st.info("Sem clientes")
-            servico = st.selectbox("Serviço", [s['nome'] for s in servicos]) if servicos else st.info("Sem serviços")
-        with col2:
-            data = st.date_input("Data")
-            hora = st.time_input("Horário")
-        if st.form_submit_button("✅ AGENDAR", use_container_width=True):
-            if cliente and servico:
-                try:
-                    preco = next((s['preco'] for s in servicos if s['nome'] == servico), 0)
-                    db.collection("usuarios").document(st.session_state.user_email).collection("minha_agenda").add({
-                        "cliente": cliente, "servico": servico, "preco": preco, "data": data.strftime('%d/%m/%Y'),
-                        "hora": hora.strftime('%H:%M'), "status": "Pendente", "timestamp": datetime.now(fuso_br)
-                    })
-                    log_auditoria(st.session_state.user_email, "AGENDAMENTO_CRIADO")
-                    st.success("✅ Agendado!"); st.cache_data.clear(); time.sleep(1); st.rerun()
-                except: st.error("❌ Erro ao agendar")
-
-with tab2:
-    with st.form("cliente_form", clear_on_submit=True):
-        nome = st.text_input("Nome *")
-        telefone = st.text_input("WhatsApp *")
-        email = st.text_input("Email")
-        if st.form_submit_button("👤 CADASTRAR CLIENTE", use_container_width=True):
-            if nome and telefone:
-                db.collection("usuarios").document(st.session_state.user_email).collection("meus_clientes").add({
-                    "nome": nome, "telefone": telefone, "email": email if email else None,
-                    "data_cadastro": datetime.now(fuso_br).strftime('%d/%m/%Y'), "timestamp": datetime.now(fuso_br)
-                })
-                st.success("✅ Cliente cadastrado!"); st.cache_data.clear(); time.sleep(1); st.rerun()
-
-with tab3:
-    with st.form("servico_form", clear_on_submit=True):
-        nome = st.text_input("Nome do Serviço *")
-        preco = st.number_input("Preço *", min_value=0.0, step=10.0)
-        categoria = st.selectbox("Categoria", ["Corte", "Coloração", "Tratamento", "Estética", "Outros"])
-        if st.form_submit_button("🛠️ CADASTRAR SERVIÇO", use_container_width=True):
-            if nome and preco > 0:
-                db.collection("usuarios").document(st.session_state.user_email).collection("meus_servicos").add({
-                    "nome": nome, "preco": preco, "categoria": categoria, "ativo": True,
-                    "data_cadastro": datetime.now(fuso_br).strftime('%d/%m/%Y'), "timestamp": datetime.now(fuso_br)
-                })
-                st.success("✅ Serviço cadastrado!"); st.cache_data.clear(); time.sleep(1); st.rerun()
-
-with tab4:
-    with st.form("caixa_form", clear_on_submit=True):
-        desc = st.text_input("Descrição *")
-        valor = st.number_input("Valor *", min_value=0.0, step=10.0)
-        tipo = st.selectbox("Tipo *", ["Entrada", "Saída"])
-        categoria = st.selectbox("Categoria", ["Serviço", "Produto", "Salário", "Manutenção", "Outros"])
-        if st.form_submit_button("💰 LANÇAR", use_container_width=True):
-            if desc and valor > 0:
-                db.collection("usuarios").document(st.session_state.user_email).collection("meu_caixa").add({
-                    "descricao": desc, "valor": valor, "tipo": tipo, "categoria": categoria,
-                    "data": datetime.now(fuso_br).strftime('%d/%m/%Y'), "timestamp": datetime.now(fuso_br)
-                })
-                st.success("✅ Lançado!"); st.cache_data.clear(); time.sleep(1); st.rerun()
-
-# ================= RELATÓRIO =================
-st.divider()
-if st.button("📊 GERAR RELATÓRIO EXCEL", use_container_width=True):
-    try:
-        buf = io.BytesIO()
-        with pd.ExcelWriter(buf, engine='xlsxwriter') as writer:
-            if clientes: pd.DataFrame(clientes).to_excel(writer, sheet_name='Clientes', index=False)
-            if caixa: pd.DataFrame(caixa).to_excel(writer, sheet_name='Financeiro', index=False)
-        hoje = datetime.now(fuso_br).strftime('%Y-%m-%d')
-        st.download_button("⬇️ BAIXAR EXCEL", buf.getvalue(), f"Vivv_Report_{hoje}.xlsx",
-                          "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    except: st.error("❌ Erro ao gerar relatório")
-
-# ================= RODAPÉ =================
-st.divider()
-st.markdown("""
+    col_g1, col_g2 = st.columns([2, 1])
+    with col_g1: grafico_financeiro()
+
+    # ================= OPERAÇÕES =================
+    def nome_cliente(doc_id, com_telefone=False):
+        clientes = dados_tenant()[0]
+        linha = clientes.linhas.get(doc_id)
+        if linha is None: return doc_id
+        nome, telefone = clientes["nome"][linha], clientes["telefone"][linha]
+        return f"{nome} · {telefone}" if com_telefone and telefone else nome
+
+    def nome_servico(doc_id):
+        servico = dados_tenant()[1].por_id.get(doc_id)
+        return f"{servico['nome']} · R$ {servico.get('preco', 0):,.2f}" if servico else doc_id
+
+    def salvar_agendamento():
+        s = st.session_state
+        cliente_id, servico_id, data, hora = s.get("agenda_cliente"), s.get("agenda_servico"), s.agenda_data, s.agenda_hora
+        if not (cliente_id and servico_id): return
+        try:
+            servico = dados_tenant()[1].por_id[servico_id]
+            agendar(email_tenant, {
+                "cliente": nome_cliente(cliente_id), "cliente_id": cliente_id, "servico": servico['nome'], "servico_id": servico_id,
+                "preco": servico.get('preco', 0), "data": data.strftime('%d/%m/%Y'),
+                "hora": hora.strftime('%H:%M'), "dia": datas.dia(data), "inicio": datas.inicio(data, hora),
+                "status": "Pendente", "timestamp": datetime.now(fuso_br)
+            }, horarios.duracao(servico))
+            log_auditoria(email_tenant, "AGENDAMENTO_CRIADO")
+        except horarios.Conflito as e: avisar("aba_agendar", f"⛔ {e}", erro=True)
+        except Exception: avisar("aba_agendar", "❌ Erro ao agendar", erro=True)
+        else: avisar("aba_agendar", "✅ Agendado!"); st.rerun(DEPENDENTES["minha_agenda"])
+
+    def salvar_cliente():
+        s = st.session_state
+        if not (s.cliente_nome and s.cliente_telefone): return
+        try:
+            enfileirar(email_tenant, "meus_clientes", {
+                "nome": s.cliente_nome, "telefone": s.cliente_telefone, "email": s.cliente_email if s.cliente_email else None,
+                "data_cadastro": datetime.now(fuso_br).strftime('%d/%m/%Y'), "timestamp": datetime.now(fuso_br)
+            })
+        except Exception: avisar("aba_clientes", "❌ Erro ao cadastrar cliente", erro=True)
+        else: avisar("aba_clientes", "✅ Cliente cadastrado!"); st.rerun(DEPENDENTES["meus_clientes"])
+
+    def salvar_servico():
+        s = st.session_state
+        if not (s.servico_nome and s.servico_preco > 0): return
+        try:
+            enfileirar(email_tenant, "meus_servicos", {
+                "nome": s.servico_nome, "preco": s.servico_preco, "duracao": int(s.servico_duracao), "categoria": s.servico_categoria, "ativo": True,
+                "data_cadastro": datetime.now(fuso_br).strftime('%d/%m/%Y'), "timestamp": datetime.now(fuso_br)
+            })
+        except Exception: avisar("aba_servicos", "❌ Erro ao cadastrar serviço", erro=True)
+        else: avisar("aba_servicos", "✅ Serviço cadastrado!"); st.rerun(DEPENDENTES["meus_servicos"])
+
+    def salvar_caixa():
+        s = st.session_state
+        if not (s.caixa_desc and s.caixa_valor > 0): return
+        try:
+            enfileirar(email_tenant, "meu_caixa", {
+                "descricao": s.caixa_desc, "valor": s.caixa_valor, "tipo": s.caixa_tipo, "categoria": s.caixa_categoria,
+                "data": datetime.now(fuso_br).strftime('%d/%m/%Y'), "dia": datas.dia(datetime.now(fuso_br)),
+                "timestamp": datetime.now(fuso_br)
+            })
+        except Exception: avisar("aba_caixa", "❌ Erro ao lançar", erro=True)
+        else: avisar("aba_caixa", "✅ Lançado!"); st.rerun(DEPENDENTES["meu_caixa"])
+
+    @st.fragment(key="aba_agendar")
+    @telemetria.secao("aba_agendar", email_tenant)
+    def aba_agendar():
+        clientes, servicos, _, _ = dados_tenant()
+        mostrar_aviso("aba_agendar")
+        if servicos:
+            with st.expander("🕐 Próximos horários livres"):
+                escolhido = st.selectbox("Ver horários de", list(servicos.por_id), format_func=nome_servico, key="livres_servico")
+                duracao = horarios.duracao(servicos.por_id[escolhido])
+                livres = horarios.proximos(carregar_ocupacao(email_tenant), duracao, datetime.now(fuso_br))
+                if livres: st.caption(f"{duracao} min · " + " · ".join(h.strftime('%d/%m %H:%M') for h in livres))
+                else: st.caption("Nenhum horário livre nos próximos 14 dias")
+                if not usa_horarios(): st.caption("⚠️ Horários conferidos pela agenda carregada; agendamentos simultâneos de outra tela podem colidir.")
+        # Fora do form para buscar a cada Enter; o select só recebe os primeiros resultados
+        if clientes: st.text_input("🔎 Buscar cliente", key="agenda_busca", placeholder="Nome ou WhatsApp")
+        encontrados = buscar_clientes(email_tenant, st.session_state.get("agenda_busca", "")) if clientes else []
+        with st.form("agendar", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                if encontrados: st.selectbox("Cliente", encontrados, format_func=lambda i: nome_cliente(i, com_telefone=True), key="agenda_cliente")
+                elif clientes: st.info("Nenhum cliente encontrado")
+                else: st.info("Sem clientes")
+                if servicos: st.selectbox("Serviço", list(servicos.por_id), format_func=nome_servico, key="agenda_servico")
+                else: st.info("Sem serviços")
+            with col2:
+                st.date_input("Data", key="agenda_data")
+                st.time_input("Horário", key="agenda_hora")
+            st.form_submit_button("✅ AGENDAR", width="stretch", on_click=salvar_agendamento)
+
+    @st.fragment(key="aba_clientes")
+    @telemetria.secao("aba_clientes", email_tenant)
+    def aba_clientes():
+        mostrar_aviso("aba_clientes")
+        with st.form("cliente_form", clear_on_submit=True):
+            st.text_input("Nome *", key="cliente_nome")
+            st.text_input("WhatsApp *", key="cliente_telefone")
+            st.text_input("Email", key="cliente_email")
+            st.form_submit_button("👤 CADASTRAR CLIENTE", width="stretch", on_click=salvar_cliente)
+
+    @st.fragment(key="aba_servicos")
+    @telemetria.secao("aba_servicos", email_tenant)
+    def aba_servicos():
+        mostrar_aviso("aba_servicos")
+        with st.form("servico_form", clear_on_submit=True):
+            st.text_input("Nome do Serviço *", key="servico_nome")
+            st.number_input("Preço *", min_value=0.0, step=10.0, key="servico_preco")
+            st.number_input("Duração (min)", min_value=5, value=horarios.DURACAO_PADRAO, step=5, key="servico_duracao")
+            st.selectbox("Categoria", ["Corte", "Coloração", "Tratamento", "Estética", "Outros"], key="servico_categoria")
+            st.form_submit_button("🛠️ CADASTRAR SERVIÇO", width="stretch", on_click=salvar_servico)
+
+    @st.fragment(key="aba_caixa")
+    @telemetria.secao("aba_caixa", email_tenant)
+    def aba_caixa():
+        mostrar_aviso("aba_caixa")
+        with st.form("caixa_form", clear_on_submit=True):
+            st.text_input("Descrição *", key="caixa_desc")
+            st.number_input("Valor *", min_value=0.0, step=10.0, key="caixa_valor")
+            st.selectbox("Tipo *", ["Entrada", "Saída"], key="caixa_tipo")
+            st.selectbox("Categoria", ["Serviço", "Produto", "Salário", "Manutenção", "Outros"], key="caixa_categoria")
+            st.form_submit_button("💰 LANÇAR", width="stretch", on_click=salvar_caixa)
+
+    IMPORTAVEIS = {"meus_clientes": "👤 Clientes", "meus_servicos": "🛠️ Serviços", "meu_caixa": "💰 Caixa"}
+
+    @st.fragment(key="aba_importar")
+    @telemetria.secao("aba_importar", email_tenant)
+    def aba_importar():
+        mostrar_aviso("aba_importar")
+        col = st.selectbox("Importar para", list(IMPORTAVEIS), format_func=lambda c: IMPORTAVEIS.get(c, c), key="importar_colecao")
+        colunas = [nomes[0] + ("" if obrigatoria else " (opcional)") for obrigatoria, nomes in importacao.COLUNAS[col].values()]
+        st.caption(f"Primeira linha com os nomes das colunas: {', '.join(colunas)}. Linhas já cadastradas são ignoradas.")
+        arquivo = st.file_uploader("Planilha CSV ou Excel", type=["csv", "xlsx"], key="importar_arquivo")
+        if arquivo and st.button("📥 IMPORTAR", width="stretch"):
+            barra = st.progress(0.0, text="Lendo arquivo...")
+            def progresso(fracao, r): barra.progress(min(fracao, 1.0), text=r.resumo())
+            try: r = importacao.importar(cache_dados(), email_tenant, col, arquivo, arquivo.name, progresso)
+            except ValueError as e: avisar("aba_importar", f"❌ {e}", erro=True); st.rerun(scope="fragment")
+            except Exception: avisar("aba_importar", "❌ Erro ao importar; as linhas já gravadas não serão duplicadas ao reenviar", erro=True); st.rerun()
+            st.session_state.importar_erros = r.erros
+            log_auditoria(email_tenant, "IMPORTACAO", f"{col}: {r.resumo()}")
+            avisar("aba_importar", f"{'⚠️' if r.invalidos else '✅'} {r.resumo()}", erro=bool(r.invalidos)); st.rerun()
+        if st.session_state.get("importar_erros"):
+            with st.expander("⚠️ Linhas com erro"):
+                st.dataframe(pd.DataFrame(st.session_state.importar_erros, columns=["Linha", "Motivo"]), hide_index=True, width="stretch")
+
+    st.markdown("### ⚡ Gestão Operacional")
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📅 Agendar", "👤 Clientes", "🛠️ Serviços", "💰 Caixa", "📥 Importar"])
+    with tab1: aba_agendar()
+    with tab2: aba_clientes()
+    with tab3: aba_servicos()
+    with tab4: aba_caixa()
+    with tab5: aba_importar()
+
+    # ================= ENVIOS PENDENTES =================
+    def descrever_envio(p):
+        d = p["dados"]
+        if p["colecao"] == "meu_caixa": return f"💰 {d.get('tipo')} · {d.get('descricao')} · R$ {d.get('valor', 0):,.2f}"
+        return f"{'👤' if p['colecao'] == 'meus_clientes' else '🛠️'} {d.get('nome')}"
+
+    # Só lê a fila local (SQLite), então fica fora da telemetria. O acompanhamento a cada 3 s só existe
+    # enquanto há envio na fila: um envio reexecuta "pendentes" (DEPENDENTES), que passa a mostrá-lo, e a
+    # fila esvaziada refaz a página, o que encerra o run_every
+    @st.fragment(key="pendentes")
+    def painel_pendentes():
+        if st.session_state.get("escritas_enviadas") or fila_escritas().pendentes(email_tenant): acompanhar_pendentes()
+
+    @st.fragment(run_every=3)
+    def acompanhar_pendentes():
+        pendentes = fila_escritas().pendentes(email_tenant)
+        enviadas = st.session_state.get("escritas_enviadas", {})
+        confirmadas = enviadas.keys() - {p["chave"] for p in pendentes}
+        cols = {enviadas.pop(chave) for chave in confirmadas}
+        # Métricas e gráfico vêm dos resumos, que só mudam quando o lançamento chega ao banco
+        if not pendentes or ("meu_caixa" in cols and usa_resumos()): st.rerun()
+        adiados = sum(1 for p in pendentes if p["tentativas"])
+        titulo = f"⏳ {len(pendentes)} envio(s) aguardando o banco" + (f" · {adiados} com nova tentativa agendada" if adiados else "")
+        with st.expander(titulo):
+            for p in pendentes:
+                st.caption(descrever_envio(p) + (f" · tentativa {p['tentativas']}: {p['erro']}" if p["erro"] else ""))
+
+    painel_pendentes()
+
+    # ================= HISTÓRICO =================
+    HISTORICOS = {"meu_caixa": "💰 Caixa", "minha_agenda": "📅 Agenda", "meus_clientes": "👤 Clientes"}
+
+    def voltar_ao_inicio(): st.session_state.historico_pagina = 0
+
+    def mudar_pagina(passo): st.session_state.historico_pagina += passo
+
+    @st.fragment(key="historico")
+    @telemetria.secao("historico", email_tenant)
+    def secao_historico():
+        # Só a página exibida é lida (por cursor, mais recentes primeiro); a seguinte já vem em segundo plano
+        _, servicos, _, _ = dados_tenant()
+        st.markdown("### 📜 Histórico")
+        c1, c2, c3, c4 = st.columns([1, 1, 1, 2])
+        with c1: col = st.selectbox("Histórico de", list(HISTORICOS), format_func=lambda c: HISTORICOS.get(c, c), key="historico_col", on_change=voltar_ao_inicio)
+        opcoes = {"meu_caixa": [("tipo", "Tipo", ["Entrada", "Saída"], str),
+                                ("categoria", "Categoria", ["Serviço", "Produto", "Salário", "Manutenção", "Outros"], str)],
+                  "minha_agenda": [("servico_id", "Serviço", list(servicos.por_id), nome_servico)],
+                  "meus_clientes": []}[col]
+        filtros = []
+        for (campo, rotulo, valores, formato), coluna in zip(opcoes, (c2, c3)):
+            with coluna:
+                escolhido = st.selectbox(rotulo, [None] + valores, format_func=lambda v, f=formato: "Todos" if v is None else f(v),
+                                         key=f"historico_{col}_{campo}", on_change=voltar_ao_inicio)
+            if escolhido is None: continue
+            if campo == "servico_id" and not usa_referencias(): filtros.append(("servico", "==", servicos.por_id[escolhido]["nome"]))
+            else: filtros.append((campo, "==", escolhido))
+        with c4: periodo = st.date_input("Registrados entre", value=(), format="DD/MM/YYYY", key="historico_periodo", on_change=voltar_ao_inicio)
+        if len(periodo) == 2:
+            filtros += [("timestamp", ">=", datas.dia(periodo[0])), ("timestamp", "<", datas.dia(periodo[1]) + timedelta(days=1))]
+        pagina = st.session_state.setdefault("historico_pagina", 0)
+        try: docs, tem_proxima = carregar_historico(email_tenant, col, tuple(filtros), pagina)
+        except Exception: st.error("❌ Erro ao carregar o histórico"); return
+        colunas = [c for c in exportacao.COLUNAS[col] if not (c[0] == "id" or c[0].endswith("_id"))]
+        if docs:
+            st.dataframe(pd.DataFrame([exportacao.valores(d, colunas) for d in docs], columns=[titulo for _, titulo, _ in colunas]),
+                         hide_index=True, width="stretch")
+        else: st.caption("Nada registrado com esses filtros")
+        n1, n2, n3 = st.columns([1, 2, 1])
+        with n1: st.button("⬅️ Mais recentes", disabled=pagina == 0, on_click=mudar_pagina, args=(-1,), width="stretch")
+        with n2: st.caption(f"Página {pagina + 1}")
+        with n3: st.button("Mais antigos ➡️", disabled=not tem_proxima, on_click=mudar_pagina, args=(1,), width="stretch")
+
+    st.divider()
+    secao_historico()
+
+    # ================= RELATÓRIO =================
+    @st.fragment(key="relatorio")
+    @telemetria.secao("relatorio", email_tenant)
+    def secao_relatorio():
+        col_r1, col_r2 = st.columns([1, 4])
+        with col_r1: formato = st.selectbox("Formato", list(exportacao.FORMATOS), label_visibility="collapsed")
+        with col_r2:
+            # Gerado só no clique, em streaming para um arquivo temporário
+            _, extensao, mime = exportacao.FORMATOS[formato]
+            hoje = datetime.now(fuso_br).strftime('%Y-%m-%d')
+            st.download_button(f"📊 GERAR RELATÓRIO ({formato.upper()})", telemetria.span("exportacao")(lambda: exportacao.exportar(repo, email_tenant, formato)),
+                               f"Vivv_Report_{hoje}{extensao}", mime, width="stretch")
+
+    st.divider()
+    secao_relatorio()
+
+    # ================= RODAPÉ =================
+    st.divider()
+    st.markdown("""
 <div style="text-align: center; color: #888; padding: 20px;">
     <small>Vivv Pro Elite © 2024 | Transformando negócios com tecnologia de ponta</small><br>
     <small>Versão 3.0 | Sistema de gestão premium para profissionais de beleza</small>
 </div>
 """, unsafe_allow_html=True)
+finally:
+    # st.rerun()/st.stop() interrompem o script com uma exceção: o rerun da página fecha mesmo assim
+    ultimo = telemetria.fechar_rerun()
+
+# ================= DEBUG =================
+if ultimo and email_tenant in telemetria.admins(st.secrets):
+    with st.expander("🛠️ Debug (admin)"):
+        st.caption(f"Este rerun: {ultimo['ms']:.0f} ms · {ultimo['leituras']} leituras · {ultimo['escritas']} escritas")
+        st.dataframe(pd.DataFrame(ultimo["spans"], columns=["span", "ms"]), hide_index=True, width="stretch")
+        st.caption("Últimos reruns do tenant")
+        st.dataframe(pd.DataFrame([{k: r[k] for k in ("tipo", "ms", "leituras", "escritas")} for r in telemetria.historico(email_tenant)]),
+                     hide_index=True, width="stretch")
+        st.caption("Fila de escritas: " + " · ".join(f"{k} {v}" for k, v in fila_escritas().estatisticas().items()))
+        st.code(telemetria.prometheus(), language="text")
 
 
 
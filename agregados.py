@@ -0,0 +1,26 @@
+"""Totais do caixa por dia e por mês, sem acesso ao banco.
+
+Usados pelos resumos (resumos.py) e pelos documentos de arquivo (arquivamento.py), que não
+dependem um do outro para isso.
+"""
+from collections import defaultdict
+import datas
+
+TIPOS = ("Entrada", "Saída")
+
+def chaves(dia): return dia.strftime('%Y-%m-%d'), dia.strftime('%Y-%m')
+
+def agregar(lancamentos):
+    """Recalcula do zero os resumos {chave: resumo} diários e mensais de uma lista de lançamentos."""
+    def novo(): return {t: {"total": 0.0, "qtd": 0} for t in TIPOS} | {"categorias": defaultdict(dict)}
+    dias, meses = defaultdict(novo), defaultdict(novo)
+    for lanc in lancamentos:
+        tipo, dia = lanc.get("tipo"), datas.dia_de(lanc)
+        if tipo not in TIPOS or dia is None: continue
+        valor, cat = float(lanc.get("valor", 0) or 0), lanc.get("categoria") or "Outros"
+        for chave, alvo in zip(chaves(dia), (dias, meses)):
+            r = alvo[chave]
+            r[tipo]["total"] += valor; r[tipo]["qtd"] += 1
+            c = r["categorias"][cat].setdefault(tipo, {"total": 0.0, "qtd": 0})
+            c["total"] += valor; c["qtd"] += 1
+    return dias, meses
@@ -0,0 +1,177 @@
+"""Arquivamento do meu_caixa: meses encerrados empacotados em poucos documentos colunares.
+
+    usuarios/{email}/arquivo_caixa/{AAAA-MM}-{id do primeiro lançamento}
+    {"mes": "2026-09", "n": 499, "ids": [...], "colunas": {"valor": [...], "tipo": [...], ...},
+     "totais": {"Entrada": {"total", "qtd"}, "Saída": {...}, "categorias": {...}}, "ate": <maior timestamp>}
+
+Cada documento guarda até LINHAS lançamentos de um mês e é gravado no mesmo batch que apaga
+os originais (1 + LINHAS escritas), então um lançamento nunca está nos dois lugares nem em
+nenhum. Os resumos diários/mensais não mudam. Carga do app, histórico, exportação e backfill
+leem o arquivo junto com o meu_caixa; o histórico percorre os documentos por `ate` e intercala os
+que se sobrepõem. Rode periodicamente (também completa `ate` nos documentos da versão 1):
+    python arquivamento.py arquivar [--email dono@negocio.com] [--manter 1]
+
+Lançamentos sem `dia` (rode antes `datas.py migrar`) ou com listas nos campos ficam no meu_caixa.
+"""
+import argparse
+import operator
+from datetime import datetime
+from google.cloud.firestore import FieldFilter
+from banco import conectar_cli, fuso_br, paginar
+import agregados
+import datas
+
+VERSAO = 2                    # 2: com `ate`
+LOTE = 500                    # limite de escritas por batch do Firestore
+LINHAS = LOTE - 1             # lançamentos por documento: + a criação do documento = um batch
+MANTER = 1                    # meses encerrados que continuam no meu_caixa além do atual
+DOCS_POR_PAGINA = 10          # documentos de arquivo por página na exportação
+_COMPARAR = {"==": operator.eq, "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+def _arquivo(db, email): return db.collection("usuarios").document(email).collection("arquivo_caixa")
+
+_SEM_DATA = datetime.min.replace(tzinfo=fuso_br)
+
+def _instante(lanc): return lanc.get("timestamp") or _SEM_DATA
+
+# ================= FORMATO =================
+def empacotar(mes, lancamentos):
+    """Documento de arquivo de `lancamentos` (com "id") do mês `mes`: uma lista por campo."""
+    campos = sorted({c for d in lancamentos for c in d if c != "id"})
+    _, meses = agregados.agregar(lancamentos)
+    totais = meses.get(mes) or {t: {"total": 0.0, "qtd": 0} for t in agregados.TIPOS} | {"categorias": {}}
+    return {"mes": mes, "n": len(lancamentos), "ids": [d["id"] for d in lancamentos],
+            "colunas": {c: [d.get(c) for d in lancamentos] for c in campos},
+            "totais": {**totais, "categorias": dict(totais["categorias"])}, "ate": max(map(_instante, lancamentos), default=_SEM_DATA),
+            "versao": VERSAO, "arquivado_em": datetime.now(fuso_br)}
+
+def desempacotar(dados):
+    """Documento de arquivo -> lançamentos como no meu_caixa (campos vazios omitidos)."""
+    colunas = dados.get("colunas", {})
+    return [{"id": doc_id, **{c: v[i] for c, v in colunas.items() if v[i] is not None}} for i, doc_id in enumerate(dados["ids"])]
+
+def arquivavel(doc):
+    # O Firestore não aceita lista dentro de lista
+    return datas.dia_de(doc) is not None and not any(isinstance(v, list) for v in doc.values())
+
+# ================= ARQUIVAMENTO =================
+def limite(hoje, manter=MANTER):
+    """Primeiro dia do mês mais antigo que continua no meu_caixa."""
+    mes = hoje.year * 12 + hoje.month - 1 - manter
+    return datetime(mes // 12, mes % 12 + 1, 1, tzinfo=fuso_br)
+
+def arquivar(db, email, manter=MANTER, linhas=LINHAS):
+    """Empacota os lançamentos anteriores a `limite(hoje, manter)`. Idempotente: o que aparecer depois
+    num mês já arquivado vira mais um documento do mês. Devolve {mes: lançamentos arquivados}."""
+    user, arquivo = db.collection("usuarios").document(email), _arquivo(db, email)
+    caixa = user.collection("meu_caixa")
+    q = caixa.where(filter=FieldFilter("dia", "<", limite(datetime.now(fuso_br), manter))).order_by("dia")
+    arquivados, grupo, mes_grupo = {}, [], None
+
+    def gravar():
+        batch = db.batch()
+        batch.create(arquivo.document(f"{mes_grupo}-{grupo[0]['id']}"), empacotar(mes_grupo, grupo))
+        for d in grupo: batch.delete(caixa.document(d["id"]))
+        batch.commit()
+        arquivados[mes_grupo] = arquivados.get(mes_grupo, 0) + len(grupo)
+
+    for pagina in paginar(q, LOTE):
+        for snap in pagina:
+            d = {"id": snap.id, **snap.to_dict()}
+            if not arquivavel(d): continue
+            mes = agregados.chaves(datas.dia_de(d))[1]
+            if grupo and (mes != mes_grupo or len(grupo) == linhas): gravar(); grupo = []
+            d["dia"], mes_grupo = datas.dia_de(d), mes
+            grupo.append(d)
+    if grupo: gravar()
+    return arquivados
+
+def completar(db, email):
+    """Grava `ate` nos documentos de arquivo da versão 1, que o histórico não encontraria. Devolve quantos."""
+    n = 0
+    for pagina in paginar(_arquivo(db, email).where(filter=FieldFilter("versao", "==", 1)), LOTE):
+        batch = db.batch()
+        for snap in pagina:
+            batch.update(snap.reference, {"ate": _ate(snap), "versao": VERSAO})
+        batch.commit(); n += len(pagina)
+    return n
+
+# ================= LEITURA =================
+def lancamentos(db, email):
+    """Todos os lançamentos arquivados do tenant (um documento lido por parte de mês)."""
+    return [l for d in _arquivo(db, email).stream() for l in desempacotar(d.to_dict())]
+
+def paginas(db, email, docs_por_pagina=DOCS_POR_PAGINA):
+    """Lançamentos arquivados em páginas de até `docs_por_pagina` documentos, para a exportação."""
+    for pagina in paginar(_arquivo(db, email), docs_por_pagina):
+        yield [l for d in pagina for l in desempacotar(d.to_dict())]
+
+def _passa(doc, filtros):
+    return all(campo in doc and _COMPARAR[op](doc[campo], valor) for campo, op, valor in filtros)
+
+def historico(db, email, filtros=(), tamanho=25, cursor=None, desde=None):
+    """Continuação de `Repositorio.historico` no arquivo, em `timestamp` decrescente.
+
+    Os documentos são lidos um a um por `ate` decrescente e intercalados: uma linha só sai quando
+    nenhum documento ainda não lido pode ter outra mais recente (o `ate` do último lido não passa
+    dela), então partes do mesmo mês e lançamentos retroativos arquivados depois saem na ordem.
+    Os documentos da versão 1 não têm `ate` e ficam fora dessa consulta: entram todos abertos na
+    primeira chamada, sem esperar `completar`. Com `desde`, só saem as linhas com timestamp >= desde
+    e a primeira mais antiga fica para a próxima chamada (é assim que o histórico do meu_caixa
+    intercala o arquivo com a coleção). Devolve (linhas, cursor), com cursor None no fim.
+    cursor = (((linhas ordenadas, posição), ...) abertos, último snapshot lido, acabou): continuar
+    não relê nem reordena nada."""
+    if cursor is None:
+        legado = _arquivo(db, email).where(filter=FieldFilter("versao", "==", 1)).stream()
+        abertos, ultimo, acabou = [[_ordenadas(s), 0] for s in legado if s.get("n")], None, False
+    else:
+        abertos, ultimo, acabou = cursor
+        abertos = [list(a) for a in abertos]
+    saida = []
+    while len(saida) < tamanho:
+        topo = max(abertos, key=lambda a: _instante(a[0][a[1]]), default=None)
+        maior = _instante(topo[0][topo[1]]) if topo else None
+        # Um documento ainda não lido só pode ter linha mais recente que `maior` até o `ate` do último lido
+        falta_ler = not acabou and (ultimo is None or maior is None or maior < _ate(ultimo))
+        if falta_ler and (desde is None or ultimo is None or _ate(ultimo) >= desde):
+            q = _arquivo(db, email).order_by("ate", direction="DESCENDING").limit(1)
+            if ultimo is not None: q = q.start_after(ultimo)
+            proximo = list(q.stream())
+            if not proximo: acabou = True
+            else:
+                ultimo = proximo[0]
+                if ultimo.get("n"): abertos.append([_ordenadas(ultimo), 0])
+            continue
+        if maior is None or (desde is not None and maior < desde): break
+        linha = topo[0][topo[1]]
+        topo[1] += 1
+        if topo[1] == len(topo[0]): abertos.remove(topo)
+        if _passa(linha, filtros): saida.append(linha)
+    if acabou and not abertos: return saida, None
+    return saida, (tuple(tuple(a) for a in abertos), ultimo, acabou)
+
+def _ordenadas(snap): return sorted(desempacotar(snap.to_dict()), key=_instante, reverse=True)
+
+def _ate(snap):
+    """`ate` do documento; na versão 1, que não tem o campo, o maior timestamp empacotado."""
+    try: return snap.get("ate")
+    except KeyError: return max(map(_instante, desempacotar(snap.to_dict())), default=_SEM_DATA)
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquivamento do caixa do Vivv")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    ar = sub.add_parser("arquivar", help="empacota os meses encerrados do meu_caixa em arquivo_caixa")
+    ar.add_argument("--email", help="apenas este tenant (padrão: todos)")
+    ar.add_argument("--manter", type=int, default=MANTER, help="meses encerrados que ficam no meu_caixa (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    db = conectar_cli()
+    emails = [args.email] if args.email else [u.id for u in db.collection("usuarios").stream()]
+    for email in emails:
+        completados, arquivados = completar(db, email), arquivar(db, email, args.manter)
+        if completados: print(f"↻ {email}: {completados} documentos de arquivo atualizados para a versão {VERSAO}")
+        meses = ", ".join(f"{m}: {n}" for m, n in sorted(arquivados.items()))
+        print(f"✅ {email}: {sum(arquivados.values())} lançamentos arquivados" + (f" ({meses})" if meses else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Fila de auditoria do processo.
+
+`registrar` só enfileira o evento; uma thread de fundo grava em lotes de até 500 (limite do
+batch do Firestore), quando o lote enche ou quando passa `intervalo` segundos do primeiro
+evento pendente. Falhas são repetidas com backoff exponencial e, esgotadas as tentativas,
+o lote é descartado e contado — a auditoria nunca trava nem derruba a ação do usuário.
+"""
+import atexit
+import queue
+import threading
+import time
+import uuid
+
+class FilaAuditoria:
+    def __init__(self, gravar_lote, tamanho_lote=500, intervalo=2.0, capacidade=20_000, tentativas=5, espera=0.5):
+        self._gravar_lote, self.tamanho_lote, self.intervalo = gravar_lote, tamanho_lote, intervalo
+        self.tentativas, self.espera = tentativas, espera
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self.contadores = {"enfileirados": 0, "gravados": 0, "descartados": 0, "retentativas": 0, "lotes": 0}
+        self._thread = threading.Thread(target=self._rodar, name="vivv-auditoria", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def _contar(self, nome, n=1):
+        with self._lock: self.contadores[nome] += n
+
+    def estatisticas(self):
+        with self._lock: return {**self.contadores, "pendentes": self._fila.qsize()}
+
+    def registrar(self, evento):
+        """`evento` ganha um "id" próprio para que regravar um lote após falha não duplique nada."""
+        evento.setdefault("id", uuid.uuid4().hex[:20])
+        try: self._fila.put_nowait(evento); self._contar("enfileirados")
+        except queue.Full: self._contar("descartados")
+
+    def fechar(self, timeout=10):
+        """Para a thread depois de gravar o que estiver na fila."""
+        self._parar.set()
+        self._thread.join(timeout)
+
+    def _coletar(self):
+        try: lote = [self._fila.get(timeout=0.5)]
+        except queue.Empty: return []
+        prazo = time.monotonic() + self.intervalo
+        while len(lote) < self.tamanho_lote:
+            restante = prazo - time.monotonic()
+            if restante <= 0 or self._parar.is_set() and self._fila.empty(): break
+            try: lote.append(self._fila.get(timeout=min(restante, 0.5)))
+            except queue.Empty: continue
+        return lote
+
+    def _rodar(self):
+        while not (self._parar.is_set() and self._fila.empty()):
+            lote = self._coletar()
+            if lote: self._gravar(lote)
+
+    def _gravar(self, lote):
+        for tentativa in range(self.tentativas):
+            try:
+                self._gravar_lote(lote)
+                self._contar("gravados", len(lote)); self._contar("lotes")
+                return
+            except Exception:
+                if tentativa + 1 < self.tentativas:
+                    self._contar("retentativas")
+                    time.sleep(self.espera * 2 ** tentativa)
+        self._contar("descartados", len(lote))
@@ -0,0 +1,47 @@
+"""Conexão com o Firestore compartilhada entre o app e os scripts de linha de comando."""
+import json
+import os
+import tomllib
+from datetime import date, datetime, timezone, timedelta
+from google.cloud import firestore
+from google.oauth2 import service_account
+
+fuso_br = timezone(timedelta(hours=-3))
+
+# JSON com datas, para documentos guardados fora do Firestore (fila de escritas, backend SQL):
+# json.dumps(..., default=json_padrao) e json.loads(..., object_hook=json_objeto)
+def json_padrao(valor):
+    if isinstance(valor, datetime): return {"$dt": valor.isoformat()}
+    if isinstance(valor, date): return {"$date": valor.isoformat()}
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+def json_objeto(obj):
+    if obj.keys() == {"$dt"}: return datetime.fromisoformat(obj["$dt"])
+    if obj.keys() == {"$date"}: return date.fromisoformat(obj["$date"])
+    return obj
+
+def cliente_firestore(detalhes):
+    """`detalhes` é o JSON da service account (string ou dict), o mesmo de FIREBASE_DETAILS."""
+    creds = json.loads(detalhes) if isinstance(detalhes, str) else detalhes
+    return firestore.Client(credentials=service_account.Credentials.from_service_account_info(creds))
+
+def conectar_cli(secrets=".streamlit/secrets.toml"):
+    """Cliente para jobs fora do Streamlit: emulador, variável FIREBASE_DETAILS ou secrets.toml."""
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        return firestore.Client(project=os.environ.get("GOOGLE_CLOUD_PROJECT", "vivv-local"))
+    detalhes = os.environ.get("FIREBASE_DETAILS")
+    if not detalhes and os.path.exists(secrets):
+        with open(secrets, "rb") as f: detalhes = tomllib.load(f).get("FIREBASE_DETAILS")
+    if not detalhes: raise SystemExit("❌ Defina FIREBASE_DETAILS (variável de ambiente ou .streamlit/secrets.toml)")
+    return cliente_firestore(detalhes)
+
+def paginar(query, tamanho=500):
+    """Percorre `query` em páginas (listas de snapshots) por cursor de id, sem stream longo aberto."""
+    ultimo = None
+    while True:
+        q = query.order_by("__name__").limit(tamanho)
+        if ultimo is not None: q = q.start_after(ultimo)
+        pagina = list(q.stream())
+        if pagina: yield pagina
+        if len(pagina) < tamanho: return
+        ultimo = pagina[-1]
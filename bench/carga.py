@@ -0,0 +1,154 @@
+"""Teste de carga: N sessões simultâneas rodando o Vivv.py real via `AppTest`.
+
+    python bench/carga.py --sessoes 30 --instancias 2 --tenants 10 --iteracoes 3 --latencia 0.02
+
+Cada processo (`--instancias`) faz o papel de um servidor Streamlit: as sessões dele dividem
+os `st.cache_resource` (repositório, snapshots, pool de carga) e um Firestore em memória
+populado com os mesmos tenants. Cada sessão faz login e repete `--iteracoes` vezes: dashboard,
+agendar, cliente_form e caixa_form (com um rerun do dashboard antes de cada envio para
+encontrar o formulário).
+
+A fila de escritas de cada instância fica num arquivo temporário (VIVV_FILA), nunca no
+`vivv_fila.db` do diretório, que um app de verdade poderia reenviar ao banco.
+
+O `AppTest` troca estado global do Streamlit a cada execução, então dentro de uma instância
+os reruns acontecem um por vez; o tempo de cada passo inclui a espera na fila, reportada à parte.
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from datetime import time as hora
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+from google.cloud import firestore
+from google.oauth2 import service_account
+from streamlit.testing.v1 import AppTest
+from banco import fuso_br
+from firestore_fake import FakeClient
+from desempenho import percentil
+import sintetico
+
+_VEZ = threading.Lock()   # um rerun por vez na instância (ver docstring)
+
+class Sessao:
+    """Um navegador: um `AppTest` próprio e os tempos de cada passo."""
+    def __init__(self, email, n, timeout, fila):
+        self.email, self.n, self.tempos, self.esperas, self.erros = email, n, defaultdict(list), defaultdict(list), []
+        self.at = AppTest.from_file(str(RAIZ / "Vivv.py"), default_timeout=timeout)
+        self.at.secrets["FIREBASE_DETAILS"] = "{}"
+        self.at.secrets["VIVV_FILA"] = fila
+
+    def _widget(self, lista, rotulo): return next(w for w in lista if w.label == rotulo)
+
+    def passo(self, nome, acao):
+        inicio = time.perf_counter()
+        with _VEZ:
+            self.esperas[nome].append(time.perf_counter() - inicio)
+            try:
+                acao(); self.at.run()
+                self.erros += [f"{nome}: {e.value}" for e in self.at.exception]
+            except Exception as e: self.erros.append(f"{nome}: {e!r}")
+        self.tempos[nome].append(time.perf_counter() - inicio)
+
+    def login(self):
+        self.at.run()
+        self._widget(self.at.text_input, "Email").input(self.email)
+        self._widget(self.at.text_input, "Senha").input(sintetico.SENHA)
+        self._widget(self.at.button, "⚡ ENTRAR").click()
+
+    def agendar(self):
+        # Um horário de 30 min por sessão e rodada, depois dos 14 dias já ocupados pelo sintetico:
+        # os envios da carga não colidem entre si nem com a agenda semeada
+        at, slot = self.at, self.n * self.iteracoes + self.rodada
+        clientes = self._widget(at.selectbox, "Cliente")
+        clientes.select_index(self.n % len(clientes.options))
+        self._widget(at.date_input, "Data").set_value((datetime.now(fuso_br) + timedelta(days=15 + slot // 24)).date())
+        self._widget(at.time_input, "Horário").set_value(hora(8 + slot % 24 // 2, slot % 2 * 30))
+        self._widget(at.button, "✅ AGENDAR").click()
+
+    def cliente(self):
+        self._widget(self.at.text_input, "Nome *").input(f"Carga {self.n}")
+        self._widget(self.at.text_input, "WhatsApp *").input(f"11900{self.n:06d}")
+        self._widget(self.at.button, "👤 CADASTRAR CLIENTE").click()
+
+    def caixa(self):
+        self._widget(self.at.text_input, "Descrição *").input(f"Carga {self.n}")
+        self._widget(self.at.number_input, "Valor *").set_value(50.0)
+        self._widget(self.at.button, "💰 LANÇAR").click()
+
+    def rodar(self, iteracoes):
+        self.iteracoes = iteracoes
+        self.passo("login", self.login)
+        for self.rodada in range(iteracoes):
+            for nome, acao in (("agendar", self.agendar), ("cliente_form", self.cliente), ("caixa_form", self.caixa)):
+                self.passo("dashboard", lambda: None)
+                self.passo(nome, acao)
+        return self
+
+def instancia(args, numeros):
+    """Roda as sessões `numeros` num processo novo; contadores e duração cobrem só a fase das sessões."""
+    db = FakeClient()
+    emails = [f"loja{i}@vivv.local" for i in range(args.tenants)]
+    for i, email in enumerate(emails):
+        sintetico.popular(db, email, clientes=args.clientes, caixa=args.caixa, agenda=args.agenda, semente=i)
+    db.latencia = args.latencia
+    firestore.Client = lambda *a, **k: db
+    service_account.Credentials.from_service_account_info = staticmethod(lambda info, **k: None)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        sessoes = [Sessao(emails[n % len(emails)], n, args.timeout, str(Path(pasta) / "fila.db")) for n in numeros]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(sessoes)) as pool: list(pool.map(lambda s: s.rodar(args.iteracoes), sessoes))
+        duracao = time.perf_counter() - inicio
+    tempos, esperas = defaultdict(list), defaultdict(list)
+    for s in sessoes:
+        for nome, t in s.tempos.items(): tempos[nome] += t
+        for nome, t in s.esperas.items(): esperas[nome] += t
+    return {"tempos": dict(tempos), "esperas": dict(esperas), "erros": [e for s in sessoes for e in s.erros],
+            "leituras": db.leituras, "escritas": db.escritas, "duracao": duracao}
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do Vivv com AppTest")
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--instancias", type=int, default=1, help="processos, cada um como um servidor Streamlit")
+    parser.add_argument("--tenants", type=int, default=5, help="as sessões são distribuídas entre estes tenants")
+    parser.add_argument("--iteracoes", type=int, default=2)
+    parser.add_argument("--caixa", type=int, default=5000, help="lançamentos por tenant")
+    parser.add_argument("--clientes", type=int, default=1000)
+    parser.add_argument("--agenda", type=int, default=2000)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos somados a cada chamada ao Firestore")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    grupos = [range(i, args.sessoes, args.instancias) for i in range(args.instancias)]
+    with ProcessPoolExecutor(max_workers=args.instancias) as pool: resultados = list(pool.map(instancia, [args] * len(grupos), grupos))
+
+    tempos, esperas, erros = defaultdict(list), defaultdict(list), []
+    for r in resultados:
+        for nome, v in r["tempos"].items(): tempos[nome] += v
+        for nome, v in r["esperas"].items(): esperas[nome] += v
+        erros += r["erros"]
+    leituras, escritas = sum(r["leituras"] for r in resultados), sum(r["escritas"] for r in resultados)
+    duracao = max(r["duracao"] for r in resultados)
+    passos = sum(len(t) for t in tempos.values())
+    print(f"{args.sessoes} sessões em {args.instancias} instância(s), {args.tenants} tenants: {duracao:.1f} s, "
+          f"{passos / duracao:.1f} passos/s")
+    print(f"{'passo':<14}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}{'fila p95':>10}")
+    for nome, t in tempos.items():
+        ms, fila = [x * 1000 for x in t], [x * 1000 for x in esperas[nome]]
+        print(f"{nome:<14}{len(ms):>6}{percentil(ms, 50):>10.0f}{percentil(ms, 95):>10.0f}{percentil(ms, 99):>10.0f}"
+              f"{max(ms):>10.0f}{percentil(fila, 95):>10.0f}")
+    print(f"Firestore: {leituras} leituras, {escritas} escritas "
+          f"({leituras / args.sessoes:.0f} / {escritas / args.sessoes:.0f} por sessão)")
+    for e in erros[:10]: print(f"❌ {e}")
+    if erros: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
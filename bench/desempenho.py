@@ -0,0 +1,138 @@
+"""Benchmark offline do Vivv contra o Firestore em memória.
+
+    python bench/desempenho.py --caixa 100,10000,200000 --clientes 50000
+    python bench/desempenho.py --json atual.json --base main.json   # falha se o p95 piorar
+
+Mede, para cada tamanho de caixa: carga fria e em cache (`Cache.carregar`, o que o app chama
+em `carregar_dados`), cálculo das métricas, consulta dos resumos do mês, pipeline do gráfico, próximos horários livres
+sobre a ocupação por dia, uma página do histórico, exportação Excel e importação de uma planilha CSV de 20k lançamentos.
+Os tempos saem de execuções sem rastreamento; o pico de memória e o que fica retido no
+resultado (o cache do tenant, no caso da carga fria), de uma execução extra com `tracemalloc`.
+"""
+import argparse
+import gc
+import io
+import itertools
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from banco import fuso_br
+from firestore_fake import FakeClient
+from repositorio import FirestoreRepositorio
+import arquivamento
+import exportacao
+import horarios
+import importacao
+import painel
+import periodos
+import sintetico
+import sincronizacao
+
+EMAIL = "bench@vivv.local"
+IMPORTACAO = 20_000
+
+def planilha_caixa(n=IMPORTACAO):
+    """CSV no formato do Excel BR (';', vírgula decimal), como o exportado por outros sistemas."""
+    linhas = ["Data;Descrição;Valor;Tipo;Categoria"]
+    linhas += [f"{1 + i % 28:02d}/09/2026;Venda {i};{10 + i % 90},50;{'Entrada' if i % 4 else 'Saída'};Serviço" for i in range(n)]
+    return "\n".join(linhas).encode()
+
+def percentil(amostras, p):
+    ordenadas = sorted(amostras)
+    return ordenadas[min(len(ordenadas) - 1, round(p / 100 * (len(ordenadas) - 1)))]
+
+def medir(func, repeticoes):
+    """{p50_ms, p95_ms, pico_mb, retido_mb} de `func()`; retido = memória ainda ocupada pelo resultado."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter(); func(); tempos.append((time.perf_counter() - inicio) * 1000)
+    tracemalloc.start()
+    resultado = func()
+    gc.collect()
+    retido, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return {"p50_ms": percentil(tempos, 50), "p95_ms": percentil(tempos, 95),
+            "media_ms": statistics.fmean(tempos), "pico_mb": pico / 2**20, "retido_mb": retido / 2**20}
+
+def cenarios(db):
+    repo = FirestoreRepositorio(db)
+    quente = sincronizacao.Cache(repo)
+    clientes, _, agenda, caixa = quente.carregar(EMAIL)[0]
+    _, mensais = quente.resumos(EMAIL)
+
+    def carregar_frio():
+        cache = sincronizacao.Cache(repo, max_cargas=4)
+        try: return cache.carregar(EMAIL)
+        finally: cache.fechar()   # sem isso as threads de cada repetição se acumulam e entram no retido
+
+    def exportar():
+        with exportacao.exportar(repo, EMAIL, "Excel"): pass
+
+    # cada execução importa para um tenant novo; no mesmo tenant tudo seria duplicado
+    planilha, tenants = planilha_caixa(), (f"importacao{i}@vivv.local" for i in itertools.count())
+    def importar(): return importacao.importar(quente, next(tenants), "meu_caixa", io.BytesIO(planilha), "caixa.csv")
+
+    return {
+        # o cache primeiro, antes que as cargas frias estourem o TTL do `quente`
+        "carregar_dados (cache)": lambda: quente.carregar(EMAIL),
+        "carregar_dados (frio)": carregar_frio,
+        "métricas (varredura)": lambda: painel.metricas(clientes, agenda, caixa),
+        "métricas (resumos)": lambda: painel.metricas(clientes, agenda, caixa, mensais=mensais, agenda_hoje=[]),
+        "série do gráfico": lambda: painel.serie_caixa(caixa),
+        "resumos do mês (consulta)": lambda: repo.resumos_periodo(EMAIL, *periodos.este_mes(datetime.now(fuso_br).date())),
+        "horários livres": lambda: horarios.proximos(repo.ocupacao(EMAIL, datetime.now(fuso_br)), 60, datetime.now(fuso_br)),
+        "histórico (1 página)": lambda: repo.historico(EMAIL, "meu_caixa", (("tipo", "==", "Entrada"),), sincronizacao.PAGINA_HISTORICO),
+        "exportação Excel": exportar,
+        f"importação CSV ({IMPORTACAO // 1000}k)": importar,
+    }
+
+def rodar(args):
+    resultados = {}
+    for n in args.caixa:
+        db = FakeClient()
+        sintetico.popular(db, EMAIL, clientes=args.clientes, caixa=n, agenda=args.agenda, semente=args.semente)
+        if args.arquivar: arquivamento.arquivar(db, EMAIL)
+        for nome, func in cenarios(db).items():
+            if args.so and not any(s in nome for s in args.so): continue
+            chave = f"{nome} | caixa={n}"
+            resultados[chave] = r = medir(func, args.repeticoes)
+            print(f"{chave:<45} p50 {r['p50_ms']:>10.1f} ms   p95 {r['p95_ms']:>10.1f} ms   pico {r['pico_mb']:>8.1f} MB   retido {r['retido_mb']:>8.1f} MB", flush=True)
+    return resultados
+
+def comparar(atual, base, tolerancia):
+    """Lista os casos cujo p95 passou de `base * (1 + tolerancia)`."""
+    return [f"{k}: p95 {base[k]['p95_ms']:.1f} -> {v['p95_ms']:.1f} ms"
+            for k, v in atual.items() if k in base and v["p95_ms"] > base[k]["p95_ms"] * (1 + tolerancia)]
+
+def main():
+    lista = lambda s: [int(x) for x in s.split(",")]
+    parser = argparse.ArgumentParser(description="Benchmark offline do Vivv")
+    parser.add_argument("--caixa", type=lista, default=[100, 10_000, 200_000], help="tamanhos do meu_caixa, separados por vírgula")
+    parser.add_argument("--clientes", type=int, default=50_000)
+    parser.add_argument("--agenda", type=int, default=20_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--arquivar", action="store_true", help="arquiva os meses encerrados do caixa antes de medir")
+    parser.add_argument("--so", nargs="*", help="só os casos cujo nome contém um destes trechos")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--base", help="resultados anteriores (--json) para detectar regressão")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora aceita no p95 (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resultados = rodar(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if args.base:
+        with open(args.base, encoding="utf-8") as f: regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        for r in regressoes: print(f"❌ regressão: {r}")
+        if regressoes: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Firestore em memória com a superfície do `firestore.Client` usada pelo Vivv.
+
+Cobre collection/document, add/set/create/update/get/stream, where com `FieldFilter`,
+order_by/limit/select, cursores (start_at/start_after/end_before, por snapshot ou {"__name__": ref}),
+collection_group com `get_partitions`, batch, transações (`firestore.transactional`) e os
+`Increment` dos resumos. Conta leituras (documentos devolvidos, mínimo 1 por consulta, como no
+faturamento do Firestore) e escritas, e aceita uma latência artificial por chamada para
+simular a rede. Não há índices: cada consulta
+varre a coleção uma vez e o resultado ordenado fica guardado até a próxima escrita.
+"""
+import bisect
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from google.api_core.exceptions import Aborted, AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+
+_AUSENTE = object()
+
+def _campo(dados, caminho):
+    for parte in caminho.split("."):
+        if not isinstance(dados, dict) or parte not in dados: return _AUSENTE
+        dados = dados[parte]
+    return dados
+
+def _aplicar(destino, dados, merge):
+    for chave, valor in dados.items():
+        if valor is transforms.DELETE_FIELD: destino.pop(chave, None)
+        elif valor is transforms.SERVER_TIMESTAMP: destino[chave] = datetime.now(timezone.utc)
+        elif isinstance(valor, transforms.Increment):
+            atual = destino.get(chave)
+            destino[chave] = (atual if isinstance(atual, (int, float)) else 0) + valor.value
+        elif isinstance(valor, dict):
+            if not merge or not isinstance(destino.get(chave), dict): destino[chave] = {}
+            _aplicar(destino[chave], valor, merge)
+        else: destino[chave] = copy.deepcopy(valor)
+
+def _pontos(dados):
+    """{"a.b": 1} -> {"a": {"b": 1}}, como no update do Firestore."""
+    saida = {}
+    for chave, valor in dados.items():
+        *pais, ultimo = chave.split(".")
+        alvo = saida
+        for p in pais: alvo = alvo.setdefault(p, {})
+        alvo[ultimo] = valor
+    return saida
+
+def _ordem(v):
+    """Chave de ordenação entre tipos, na ordem do Firestore (nulo < bool < número < data < texto)."""
+    if v is None or v is _AUSENTE: return (0, 0)
+    if isinstance(v, bool): return (1, v)
+    if isinstance(v, (int, float)): return (2, v)
+    if isinstance(v, datetime): return (3, v.timestamp())
+    if isinstance(v, str): return (4, v)
+    return (5, str(v))
+
+def _testar(atual, op, valor):
+    if atual is _AUSENTE: return False
+    if op == "in": return atual in valor
+    if op == "not-in": return atual not in valor
+    if op == "array_contains": return isinstance(atual, list) and valor in atual
+    a, b = _ordem(atual), _ordem(valor)
+    if a[0] != b[0]: return op == "!="
+    return {"==": a == b, "!=": a != b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+
+class _Reverso:
+    """Inverte a comparação de uma chave (order_by DESCENDING)."""
+    __slots__ = ("k",)
+    def __init__(self, k): self.k = k
+    def __lt__(self, o): return self.k > o.k
+    def __gt__(self, o): return self.k < o.k
+    def __le__(self, o): return self.k >= o.k
+    def __ge__(self, o): return self.k <= o.k
+    def __eq__(self, o): return self.k == o.k
+
+class FakeSnapshot:
+    def __init__(self, ref, dados):
+        self.reference, self.id, self.exists = ref, ref.id, dados is not None
+        self._dados = dados   # referência ao documento guardado; cópias só em to_dict/get
+
+    def to_dict(self): return copy.deepcopy(self._dados)
+
+    def get(self, campo):
+        v = _campo(self._dados or {}, campo)
+        if v is _AUSENTE: raise KeyError(campo)
+        return copy.deepcopy(v)
+
+class FakeDocRef:
+    def __init__(self, db, path): self._db, self.path, self.id = db, path, path.rsplit("/", 1)[-1]
+
+    def collection(self, nome): return FakeCollection(self._db, f"{self.path}/{nome}")
+
+    def get(self, transaction=None, **_):
+        self._db._rede()
+        with self._db._lock:
+            self._db.leituras += 1
+            dados = self._db._doc(self.path)
+            if transaction is not None: transaction._lidos[self.path] = copy.deepcopy(dados)
+            return FakeSnapshot(self, dados)
+
+    def set(self, dados, merge=False, **_):
+        self._db._rede()
+        with self._db._lock: self._db._gravar(self.path, dados, merge)
+
+    def create(self, dados, **_):
+        self._db._rede()
+        with self._db._lock:
+            if self._db._doc(self.path) is not None: raise AlreadyExists(self.path)
+            self._db._gravar(self.path, dados)
+
+    def update(self, dados, **_):
+        self._db._rede()
+        with self._db._lock:
+            if self._db._doc(self.path) is None: raise NotFound(self.path)
+            self._db._gravar(self.path, _pontos(dados), merge=True)
+
+    def delete(self, **_):
+        self._db._rede()
+        with self._db._lock: self._db._apagar(self.path)
+
+class FakeParticao:
+    def __init__(self, start_at, end_at): self.start_at, self.end_at = start_at, end_at
+
+class FakeQuery:
+    """`grupo=True`: `path` é o nome das subcoleções (collection_group)."""
+    def __init__(self, db, path, filtros=(), ordens=(), limite=None, inicio=None, fim=None, campos=None, grupo=False):
+        self._db, self._path, self._grupo = db, path, grupo
+        self._filtros, self._ordens, self._limite = list(filtros), list(ordens), limite
+        self._inicio, self._fim, self._campos = inicio, fim, campos
+
+    def _copia(self, **kw):
+        atual = {"filtros": self._filtros, "ordens": self._ordens, "limite": self._limite, "inicio": self._inicio,
+                 "fim": self._fim, "campos": self._campos, "grupo": self._grupo}
+        return FakeQuery(self._db, self._path, **{**atual, **kw})
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None: field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copia(filtros=self._filtros + [(field_path, op_string, value)])
+
+    def order_by(self, campo, direction="ASCENDING"): return self._copia(ordens=self._ordens + [(campo, direction)])
+
+    def limit(self, n): return self._copia(limite=n)
+
+    # Só o primeiro nível de cada campo: "colunas.dia" devolve "colunas" inteiro
+    def select(self, campos): return self._copia(campos={c.split(".")[0] for c in campos})
+
+    def start_at(self, cursor): return self._copia(inicio=(cursor, True))
+
+    def start_after(self, cursor): return self._copia(inicio=(cursor, False))
+
+    def end_before(self, cursor): return self._copia(fim=cursor)
+
+    def get_partitions(self, n):
+        """Até `n` partições de tamanhos parecidos, limitadas por referências de documento."""
+        self._db._rede()
+        with self._db._lock: paths = [p for p, _ in self._copia(ordens=[("__name__", "ASCENDING")])._ordenadas()[0]]
+        cortes = [FakeDocRef(self._db, paths[i * len(paths) // n]) for i in range(1, n) if paths]
+        cortes = [c for i, c in enumerate(cortes) if i == 0 or c.path != cortes[i - 1].path]
+        for inicio, fim in zip([None] + cortes, cortes + [None]): yield FakeParticao(inicio, fim)
+
+    def _posicao(self, chaves, cursor, antes):
+        """Índice do cursor (snapshot ou {"__name__": ref, campo: valor}) nas chaves ordenadas."""
+        if isinstance(cursor, dict): path, dados = cursor["__name__"].path, cursor
+        else: path, dados = cursor.reference.path, cursor._dados or {}
+        return (bisect.bisect_left if antes else bisect.bisect_right)(chaves, self._chave(path, dados))
+
+    def _chave(self, path, dados):
+        chave = [_ordem(path if c == "__name__" else _campo(dados, c)) for c, _ in self._ordens]
+        chave = [_Reverso(k) if d == "DESCENDING" else k for k, (_, d) in zip(chave, self._ordens)]
+        return chave + [path]
+
+    def _resolver(self):
+        self._db._rede()
+        with self._db._lock:
+            linhas, chaves = self._ordenadas()
+            inicio = self._posicao(chaves, *self._inicio) if self._inicio is not None else 0
+            fim = self._posicao(chaves, self._fim, True) if self._fim is not None else len(linhas)
+            if self._limite is not None: fim = min(fim, inicio + self._limite)
+            self._db.leituras += max(fim - inicio, 1)
+            if self._campos is not None: return [FakeSnapshot(FakeDocRef(self._db, p), {c: v for c, v in d.items() if c in self._campos})
+                                                 for p, d in linhas[inicio:fim]]
+            return [FakeSnapshot(FakeDocRef(self._db, p), d) for p, d in linhas[inicio:fim]]
+
+    def _ordenadas(self):
+        """Resultado filtrado e ordenado, guardado até a próxima escrita (paginar não reordena a cada página)."""
+        assinatura = (self._path, self._grupo, repr(self._filtros), tuple(self._ordens))
+        guardado = self._db._consultas.get(assinatura)
+        if guardado and guardado[0] == self._db._versao: return guardado[1:]
+        if self._grupo: colecoes = [(col, docs) for col, docs in self._db._colecoes.items() if col.rsplit("/", 1)[-1] == self._path]
+        else: colecoes = [(self._path, self._db._colecoes.get(self._path, {}))]
+        linhas = sorted(((f"{col}/{i}", d) for col, docs in colecoes for i, d in docs.items()
+                         if all(_testar(i if f == "__name__" else _campo(d, f), op, v) for f, op, v in self._filtros)
+                         and all(_campo(d, c) is not _AUSENTE for c, _ in self._ordens if c != "__name__")),
+                        key=lambda l: self._chave(*l))
+        chaves = [self._chave(*l) for l in linhas]
+        self._db._consultas[assinatura] = (self._db._versao, linhas, chaves)
+        return linhas, chaves
+
+    def stream(self, **_): yield from self._resolver()
+
+    def get(self, **_): return self._resolver()
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, doc_id=None): return FakeDocRef(self._db, f"{self._path}/{doc_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, dados, document_id=None, **_):
+        ref = self.document(document_id)
+        ref.create(dados)
+        return datetime.now(timezone.utc), ref
+
+class FakeBatch:
+    def __init__(self, db): self._db, self._ops = db, []
+
+    def set(self, ref, dados, merge=False): self._ops.append(("set", ref, dados, merge))
+    def create(self, ref, dados): self._ops.append(("create", ref, dados, False))
+    def update(self, ref, dados, **_): self._ops.append(("update", ref, _pontos(dados), True))
+    def delete(self, ref, **_): self._ops.append(("delete", ref, None, False))
+
+    def commit(self, **_):
+        if len(self._ops) > 500: raise ValueError("Um batch aceita no máximo 500 escritas")
+        self._db._rede()
+        with self._db._lock:
+            for op, ref, _, _ in self._ops:
+                if op == "create" and self._db._doc(ref.path) is not None: raise AlreadyExists(ref.path)
+                if op == "update" and self._db._doc(ref.path) is None: raise NotFound(ref.path)
+            for op, ref, dados, merge in self._ops:
+                if op == "delete": self._db._apagar(ref.path)
+                else: self._db._gravar(ref.path, dados, merge)
+        self._ops = []
+        return []
+
+class FakeTransaction(FakeBatch):
+    """Transação otimista para `firestore.transactional`: leituras diretas e, no commit, `Aborted`
+    se algum documento lido mudou desde então (o decorador refaz a função)."""
+    _max_attempts, _read_only = 5, False
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._id, self._lidos = None, {}
+
+    @property
+    def in_progress(self): return self._id is not None
+
+    def _clean_up(self): self._ops, self._id, self._lidos = [], None, {}
+    def _begin(self, retry_id=None): self._id = uuid.uuid4().bytes
+    def _rollback(self): self._clean_up()
+
+    def _commit(self):
+        with self._db._lock:
+            if any(self._db._doc(path) != dados for path, dados in self._lidos.items()): raise Aborted("documento lido foi alterado")
+            self.commit()
+        self._clean_up()
+
+class FakeClient:
+    """`latencia` (segundos) é somada a cada ida ao "servidor": get, stream, escrita ou commit."""
+    def __init__(self, latencia=0.0):
+        self._colecoes, self._lock, self.latencia = {}, threading.RLock(), latencia
+        self._versao, self._consultas = 0, {}
+        self.leituras = self.escritas = 0
+
+    def _rede(self):
+        if self.latencia: time.sleep(self.latencia)
+
+    def _doc(self, path):
+        colecao, doc_id = path.rsplit("/", 1)
+        return self._colecoes.get(colecao, {}).get(doc_id)
+
+    def _gravar(self, path, dados, merge=False):
+        self.escritas += 1; self._versao += 1
+        colecao, doc_id = path.rsplit("/", 1)
+        docs = self._colecoes.setdefault(colecao, {})
+        atual = docs.get(doc_id) if merge else None
+        if atual is None: atual = {}
+        _aplicar(atual, dados, merge)
+        docs[doc_id] = atual
+
+    def _apagar(self, path):
+        self.escritas += 1; self._versao += 1
+        colecao, doc_id = path.rsplit("/", 1)
+        self._colecoes.get(colecao, {}).pop(doc_id, None)
+
+    def semear(self, colecao, docs):
+        """Carga em massa `{id: dados}` sem contar escritas nem simular rede (montagem dos cenários)."""
+        with self._lock: self._colecoes.setdefault(colecao, {}).update(docs); self._versao += 1
+
+    def zerar_contadores(self):
+        with self._lock: self.leituras = self.escritas = 0
+
+    def collection(self, path): return FakeCollection(self, path)
+    def collection_group(self, nome): return FakeQuery(self, nome, grupo=True)
+    def document(self, path): return FakeDocRef(self, path)
+    def batch(self): return FakeBatch(self)
+
+    def get_all(self, refs, **_):
+        refs = list(refs)
+        self._rede()
+        with self._lock:
+            self.leituras += len(refs)
+            return [FakeSnapshot(ref, self._doc(ref.path)) for ref in refs]
+
+    def transaction(self, **_): return FakeTransaction(self)
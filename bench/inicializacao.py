@@ -0,0 +1,66 @@
+"""Partida a frio: cada repetição abre um processo novo, importa o Streamlit e renderiza a
+tela de login do Vivv.py (via `AppTest`, contra o Firestore em memória).
+
+    python bench/inicializacao.py --repeticoes 5 --limite-ms 2500
+
+Falha se a tela de login carregar algum módulo de `PESADOS` ou se o p50 passar do limite.
+O tempo inclui o import do Streamlit, como no boot de um container.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PESADOS = ("pandas", "numpy", "xlsxwriter", "pyarrow", "sqlalchemy")
+
+def filho():
+    inicio = time.perf_counter()
+    sys.path.insert(0, str(RAIZ)); sys.path.insert(0, str(RAIZ / "bench"))
+    from google.cloud import firestore
+    from google.oauth2 import service_account
+    from streamlit.testing.v1 import AppTest
+    from firestore_fake import FakeClient
+    db = FakeClient()
+    firestore.Client = lambda *a, **k: db
+    service_account.Credentials.from_service_account_info = staticmethod(lambda info, **k: None)
+    importado = time.perf_counter()
+    at = AppTest.from_file(str(RAIZ / "Vivv.py"), default_timeout=60)
+    at.secrets["FIREBASE_DETAILS"] = "{}"
+    at.secrets["VIVV_FILA"] = str(Path(tempfile.gettempdir()) / f"vivv_fila_{os.getpid()}.db")   # nunca o vivv_fila.db do diretório
+    at.run()
+    fim = time.perf_counter()
+    erros = [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+    if not any(b.label == "⚡ ENTRAR" for b in at.button): erros.append("tela de login não renderizou")
+    print(json.dumps({"total_ms": (fim - inicio) * 1000, "import_ms": (importado - inicio) * 1000,
+                      "login_ms": (fim - importado) * 1000, "pesados": [m for m in PESADOS if m in sys.modules],
+                      "erros": erros}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de partida a frio do Vivv")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite-ms", type=float, help="falha se o p50 do total passar disto")
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.filho: return filho()
+
+    medicoes = []
+    for _ in range(args.repeticoes):
+        saida = subprocess.run([sys.executable, __file__, "--filho"], capture_output=True, text=True, cwd=RAIZ, check=True)
+        medicoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    problemas = sorted({p for m in medicoes for p in m["erros"]})
+    problemas += [f"login carregou {', '.join(m)}" for m in sorted({tuple(m["pesados"]) for m in medicoes}) if m]
+    for campo in ("import_ms", "login_ms", "total_ms"):
+        valores = sorted(m[campo] for m in medicoes)
+        p50, p95 = valores[len(valores) // 2], valores[min(len(valores) - 1, round(0.95 * (len(valores) - 1)))]
+        print(f"{campo:<10} p50 {p50:>8.0f} ms   p95 {p95:>8.0f} ms")
+        if campo == "total_ms" and args.limite_ms and p50 > args.limite_ms: problemas.append(f"p50 {p50:.0f} ms > {args.limite_ms:.0f} ms")
+    for p in problemas: print(f"❌ {p}")
+    if problemas: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
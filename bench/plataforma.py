@@ -0,0 +1,100 @@
+"""Consolidação da plataforma (plataforma.py) sobre milhares de tenants sintéticos em memória.
+
+    python bench/plataforma.py --tenants 2000 --caixa 100 --agenda 50 --latencia 0.01
+
+Mede tempo e leituras de `consolidar` com a latência de rede simulada, confere os números com
+a soma feita tenant por tenant e repete a varredura interrompida no meio para conferir que o
+checkpoint continua de onde parou sem contar nada duas vezes. Sai com erro se algo divergir.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from firestore_fake import FakeClient
+import arquivamento
+import plataforma
+import sintetico
+
+TIPOS = ("Barbearia", "Salão", "Estética", "Manicure")
+
+class Interrompido(Exception): pass
+
+def montar(args):
+    db = FakeClient()
+    for i in range(args.tenants):
+        email = f"t{i:05d}@vivv.local"
+        sintetico.popular(db, email, clientes=5, caixa=args.caixa, agenda=args.agenda, dias=120, semente=i)
+        db._colecoes["usuarios"][email].update(tipo_negocio=TIPOS[i % len(TIPOS)], ativo=i % 5 != 0)
+        if i % 10 == 0: arquivamento.arquivar(db, email)
+    return db
+
+def esperado(db):
+    """Os mesmos números, tenant por tenant (o caminho que o job evita)."""
+    dias = {}
+    for email, u in db._colecoes["usuarios"].items():
+        tipo = u.get("tipo_negocio") or plataforma.SEM_TIPO
+        for col, grupo in (("minha_agenda", "minha_agenda"), ("meu_caixa", "meu_caixa"), ("arquivo_caixa", "arquivo_caixa")):
+            for d in db._colecoes.get(f"usuarios/{email}/{col}", {}).values(): plataforma.contabilizar(dias, grupo, d, tipo)
+    return dias
+
+def iguais(a, b):
+    return a.keys() == b.keys() and all(a[d].keys() == b[d].keys() and all(
+        x == y if isinstance(x, int) else abs(x - y) < 0.01 for t in a[d] for x, y in zip(a[d][t], b[d][t])) for d in a)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da consolidação da plataforma")
+    parser.add_argument("--tenants", type=int, default=2000)
+    parser.add_argument("--caixa", type=int, default=100, help="lançamentos por tenant")
+    parser.add_argument("--agenda", type=int, default=50, help="agendamentos por tenant")
+    parser.add_argument("--latencia", type=float, default=0.01, help="segundos por ida ao servidor")
+    parser.add_argument("--particoes", type=int, default=plataforma.PARTICOES)
+    parser.add_argument("--threads", type=int, default=plataforma.THREADS)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    db = montar(args)
+    print(f"montagem: {args.tenants} tenants em {time.perf_counter() - inicio:.0f} s")
+    referencia, problemas = esperado(db), []
+    db.latencia = args.latencia
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "ckpt.json")
+        db.zerar_contadores(); inicio = time.perf_counter()
+        tenants, dias, _ = plataforma.consolidar(db, plataforma.Checkpoint(caminho), args.particoes, args.threads)
+        print(f"consolidar: {time.perf_counter() - inicio:.1f} s · {db.leituras} leituras · {len(tenants)} lojas · {len(dias)} dias")
+        if not iguais(dias, referencia): problemas.append("totais diferentes da soma por tenant")
+        os.remove(caminho)
+
+        # Interrompe no meio (depois de ~metade dos documentos) e continua do checkpoint
+        original, contados = plataforma.contabilizar, [0]
+        limite = sum(len(d) for c, d in db._colecoes.items() if c.rsplit("/", 1)[-1] in plataforma.GRUPOS) // 2
+        def falhar(*a):
+            contados[0] += 1
+            if contados[0] > limite: raise Interrompido
+            return original(*a)
+        plataforma.contabilizar = falhar
+        try: plataforma.consolidar(db, plataforma.Checkpoint(caminho), args.particoes, args.threads)
+        except Interrompido: pass
+        finally: plataforma.contabilizar = original
+        checkpoint = plataforma.Checkpoint(caminho)
+        feitas = sum(p["feito"] for ps in checkpoint.estado["grupos"].values() for p in ps)
+        total = sum(len(ps) for ps in checkpoint.estado["grupos"].values())
+        db.zerar_contadores(); inicio = time.perf_counter()
+        _, retomado, _ = plataforma.consolidar(db, checkpoint, args.particoes, args.threads)
+        print(f"retomada: {feitas}/{total} partições já feitas · {time.perf_counter() - inicio:.1f} s · {db.leituras} leituras")
+        if not iguais(retomado, referencia): problemas.append("retomada do checkpoint diverge da soma por tenant")
+
+        parquet = os.path.join(pasta, "plataforma.parquet")
+        linhas = plataforma.gravar_parquet(parquet, tenants, dias)
+        docs = plataforma.gravar_firestore(db, tenants, dias)
+        print(f"saída: {linhas} linhas no Parquet · {docs} documentos em {plataforma.COLECAO}")
+
+    for p in problemas: print(f"❌ {p}")
+    if problemas: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
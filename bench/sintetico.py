@@ -0,0 +1,79 @@
+"""Tenants sintéticos para benchmarks e testes de carga.
+
+Os documentos têm o mesmo formato dos gravados pelo app (inclusive `dia`/`inicio`, os ids de
+cliente/serviço na agenda, os resumos e a ocupação por dia), então o tenant já nasce migrado:
+`resumos_versao`, `datas_versao`, `horarios_versao` e `referencias_versao` preenchidos.
+Um décimo da agenda cai nos próximos 14 dias.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from banco import fuso_br
+import datas
+import horarios
+import referencias
+import resumos
+from seguranca import Security
+
+SENHA = "vivv"
+SERVICOS = [("Corte", 50.0, "Corte", 30), ("Barba", 35.0, "Corte", 30), ("Coloração", 120.0, "Coloração", 90),
+            ("Hidratação", 80.0, "Tratamento", 45), ("Limpeza de pele", 150.0, "Estética", 60), ("Sobrancelha", 30.0, "Estética", 15)]
+CATEGORIAS = {"Entrada": ["Serviço", "Produto"], "Saída": ["Salário", "Manutenção", "Outros"]}
+
+
+def _quando(rng, agora, dias):
+    return (agora - timedelta(days=rng.randrange(dias))).replace(
+        hour=rng.randrange(8, 20), minute=rng.choice((0, 30)), second=0, microsecond=0)
+
+def popular(db, email, clientes=1000, caixa=5000, agenda=2000, dias=365, semente=0):
+    """Cria o tenant `email` no `FakeClient` `db` com os volumes pedidos, distribuídos nos últimos `dias`."""
+    rng, agora = random.Random(semente), datetime.now(fuso_br)
+    raiz = f"usuarios/{email}"
+    db.semear("usuarios", {email: {
+        "email": email, "nome": "Dono", "nome_negocio": f"Negócio {email}", "tipo_negocio": "Barbearia",
+        "senha": Security.hash_senha(SENHA), "ativo": True, "plano": "pro", "criado_em": agora,
+        "resumos_versao": resumos.VERSAO, "datas_versao": datas.VERSAO, "horarios_versao": horarios.VERSAO,
+        "referencias_versao": referencias.VERSAO}})
+
+    db.semear(f"{raiz}/meus_servicos", {f"s{i}": {
+        "nome": nome, "preco": preco, "duracao": duracao, "categoria": cat, "ativo": True,
+        "data_cadastro": agora.strftime('%d/%m/%Y'), "timestamp": agora} for i, (nome, preco, cat, duracao) in enumerate(SERVICOS)})
+
+    nomes = []
+    docs = {}
+    for i in range(clientes):
+        quando = _quando(rng, agora, dias)
+        nomes.append(f"Cliente {i:06d}")
+        docs[f"c{i:07d}"] = {"nome": nomes[-1], "telefone": f"119{rng.randrange(10**8):08d}", "email": None,
+                             "data_cadastro": quando.strftime('%d/%m/%Y'), "timestamp": quando}
+    db.semear(f"{raiz}/meus_clientes", docs)
+
+    docs = {}
+    for i in range(agenda):
+        quando = _quando(rng, agora, dias) if rng.random() < 0.9 else _quando(rng, agora + timedelta(days=14), 14)
+        s = rng.randrange(len(SERVICOS))
+        nome, preco, _, duracao = SERVICOS[s]
+        c = rng.randrange(len(nomes)) if nomes else None
+        docs[f"a{i:07d}"] = {"cliente": nomes[c] if nomes else "Avulso", "cliente_id": f"c{c:07d}" if nomes else None,
+                             "servico": nome, "servico_id": f"s{s}", "preco": preco,
+                             "data": quando.strftime('%d/%m/%Y'), "hora": quando.strftime('%H:%M'),
+                             "dia": datas.dia(quando), "inicio": quando, "duracao": duracao,
+                             "fim": quando + timedelta(minutes=duracao), "status": "Pendente", "timestamp": min(quando, agora)}
+    db.semear(f"{raiz}/minha_agenda", docs)
+    db.semear(f"{raiz}/ocupacao", {k: {"dia": k, "intervalos": v} for k, v in horarios.agrupar({"id": i, **d} for i, d in docs.items()).items()})
+
+    docs = {}
+    for i in range(caixa):
+        quando = _quando(rng, agora, dias)
+        tipo = "Entrada" if rng.random() < 0.75 else "Saída"
+        docs[f"x{i:07d}"] = {"descricao": f"Lançamento {i}", "valor": round(rng.uniform(10, 400), 2), "tipo": tipo,
+                             "categoria": rng.choice(CATEGORIAS[tipo]), "data": quando.strftime('%d/%m/%Y'),
+                             "dia": datas.dia(quando), "timestamp": quando}
+    db.semear(f"{raiz}/meu_caixa", docs)
+
+    diarios, mensais = resumos.agregar(docs.values())
+    db.semear(f"{raiz}/resumo_diario", {k: {"dia": k, **r, "categorias": dict(r["categorias"])} for k, r in diarios.items()})
+    db.semear(f"{raiz}/resumo_mensal", {k: {"mes": k, **r, "categorias": dict(r["categorias"])} for k, r in mensais.items()})
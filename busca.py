@@ -0,0 +1,88 @@
+"""Busca de clientes por prefixo, sem acento e sem diferenciar maiúsculas.
+
+Dois índices ordenados por tenant: (nome normalizado, id) e (termo, id), onde os termos são
+cada palavra do nome e os dígitos do telefone. Uma busca é um bisect até o primeiro item que
+começa com o prefixo, seguido de uma leitura sequencial só dos que casam.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+LIMITE = 20
+_NAO_DIGITO = re.compile(r"\D")
+
+def normalizar(texto):
+    """'  JOÃO  da Silva ' -> 'joao da silva'."""
+    texto = str(texto or "")
+    if not texto.isascii(): texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(texto.casefold().split())
+
+def digitos(texto): return _NAO_DIGITO.sub("", str(texto or ""))
+
+def _prefixo(lista, prefixo):
+    """Itens de `lista` ordenada cuja chave começa com `prefixo`, em ordem."""
+    for i in range(bisect.bisect_left(lista, (prefixo, "")), len(lista)):
+        if not lista[i][0].startswith(prefixo): return
+        yield lista[i]
+
+class Indice:
+    """Índice de prefixo de um tenant, atualizado a cada gravação em meus_clientes."""
+    def __init__(self):
+        self._nomes, self._termos, self._por_id, self._lock = [], [], {}, threading.Lock()
+
+    def __len__(self): return len(self._por_id)
+
+    @staticmethod
+    def _entrada(doc):
+        nome, telefone = normalizar(doc.get("nome")), digitos(doc.get("telefone"))
+        termos = set(nome.split())
+        if telefone: termos.add(telefone)
+        return nome, termos
+
+    def _remover(self, doc_id):
+        nome, termos = self._por_id.pop(doc_id)
+        for lista, chave in [(self._nomes, nome)] + [(self._termos, t) for t in termos]:
+            i = bisect.bisect_left(lista, (chave, doc_id))
+            if i < len(lista) and lista[i] == (chave, doc_id): del lista[i]
+
+    def atualizar(self, docs):
+        """`docs` com "id", "nome" e "telefone"; ids já indexados são substituídos."""
+        docs = list(docs)
+        with self._lock:
+            if len(docs) > len(self._por_id) // 8:
+                # Lote grande (carga inicial): reordenar tudo sai mais barato que inserir um a um
+                for d in docs: self._por_id[d["id"]] = self._entrada(d)
+                self._nomes = sorted((nome, i) for i, (nome, _) in self._por_id.items())
+                self._termos = sorted((t, i) for i, (_, termos) in self._por_id.items() for t in termos)
+                return
+            for d in docs:
+                if d["id"] in self._por_id: self._remover(d["id"])
+                self._por_id[d["id"]] = nome, termos = self._entrada(d)
+                bisect.insort(self._nomes, (nome, d["id"]))
+                for t in termos: bisect.insort(self._termos, (t, d["id"]))
+
+    def buscar(self, consulta, limite=LIMITE):
+        """Ids dos primeiros `limite` clientes para `consulta`: nomes que começam com ela, depois
+        nomes com uma palavra começando com cada termo; só dígitos buscam pelo telefone.
+        Consulta vazia devolve os primeiros em ordem alfabética."""
+        q = normalizar(consulta)
+        with self._lock:
+            if not q: return [doc_id for _, doc_id in self._nomes[:limite]]
+            if q.replace(" ", "").isdigit():
+                achados = []
+                for _, doc_id in _prefixo(self._termos, digitos(q)):
+                    if doc_id not in achados: achados.append(doc_id)
+                    if len(achados) == limite: break
+                return achados
+            achados = []
+            for _, doc_id in _prefixo(self._nomes, q):
+                achados.append(doc_id)
+                if len(achados) == limite: return achados
+            # O termo mais longo é o mais seletivo; os outros são conferidos nas palavras do nome
+            termos = q.split()
+            extras = {doc_id for _, doc_id in _prefixo(self._termos, max(termos, key=len))}
+            if len(termos) > 1: extras = {i for i in extras if all(any(p.startswith(t) for p in self._por_id[i][1]) for t in termos)}
+            extras -= set(achados)
+            return achados + heapq.nsmallest(limite - len(achados), extras, key=lambda i: self._por_id[i][0])
@@ -0,0 +1,110 @@
+"""Subcoleções grandes guardadas em colunas NumPy em vez de listas de dicts.
+
+Cada campo do esquema vira um array: "numero" em float64 (NaN se ausente), "dia" em
+datetime64[D] no fuso do Brasil (NaT se ausente), "categoria" em códigos int16 sobre uma
+lista de rótulos (-1 se ausente) e "texto" em array de objetos com strings internadas.
+Os demais campos do documento são descartados — exportação e histórico leem do banco.
+"""
+import sys
+import threading
+import numpy as np
+from banco import fuso_br
+import datas
+
+ESQUEMAS = {
+    "meus_clientes": {"nome": "texto", "telefone": "texto", "email": "texto"},
+    "minha_agenda": {"dia": "dia", "hora": "categoria", "cliente": "texto", "servico": "categoria",
+                     "cliente_id": "texto", "servico_id": "categoria", "preco": "numero", "duracao": "numero", "status": "categoria"},
+    "meu_caixa": {"dia": "dia", "tipo": "categoria", "categoria": "categoria", "valor": "numero"},
+}
+DTYPES = {"numero": np.float64, "dia": "datetime64[D]", "categoria": np.int16, "texto": object}
+VAZIOS = {"numero": np.nan, "dia": np.datetime64("NaT"), "categoria": -1, "texto": None}
+
+def _dia(doc):
+    d = datas.dia_de(doc)
+    if d is None: return VAZIOS["dia"]
+    return np.datetime64(d.astimezone(fuso_br).date() if d.tzinfo else d.date(), "D")
+
+class Tabela:
+    """Linhas indexadas pelo id do documento; `inserir` substitui a linha de um id já visto.
+
+    Leitores não travam: as colunas só crescem por cópia e `n` é atualizado depois dos valores,
+    então `tabela["valor"]` é sempre uma fatia consistente de `n` linhas.
+    """
+    def __init__(self, esquema, capacidade=256):
+        self.esquema, self.n, self.linhas, self.ids = esquema, 0, {}, []   # id -> linha e linha -> id
+        self._cols = {c: np.full(capacidade, VAZIOS[t], dtype=DTYPES[t]) for c, t in esquema.items()}
+        self._rotulos = {c: [] for c, t in esquema.items() if t == "categoria"}
+        self._codigos = {c: {} for c in self._rotulos}
+        self._lock = threading.Lock()
+
+    def __len__(self): return self.n
+
+    def __getitem__(self, campo): return self._cols[campo][:self.n]
+
+    def rotulos(self, campo): return self._rotulos[campo]
+
+    def codigo(self, campo, rotulo):
+        """Código da categoria, ou -2 (nunca presente) se o rótulo não existe."""
+        return self._codigos[campo].get(rotulo, -2)
+
+    def _converter(self, campo, tipo, doc):
+        if tipo == "dia": return _dia(doc)
+        v = doc.get(campo)
+        if v is None: return VAZIOS[tipo]
+        if tipo == "numero": return float(v) if isinstance(v, (int, float)) else np.nan
+        if tipo == "texto": return sys.intern(str(v))
+        codigos = self._codigos[campo]
+        if v not in codigos: codigos[v] = len(self._rotulos[campo]); self._rotulos[campo].append(v)
+        return codigos[v]
+
+    def _crescer(self, minimo):
+        capacidade = len(next(iter(self._cols.values())))
+        if minimo <= capacidade: return
+        while capacidade < minimo: capacidade *= 2
+        novas = {}
+        for c, t in self.esquema.items():
+            nova = np.full(capacidade, VAZIOS[t], dtype=DTYPES[t])
+            nova[:self.n] = self._cols[c][:self.n]
+            novas[c] = nova
+        self._cols = novas
+
+    def inserir(self, docs):
+        """`docs` com "id"; ids novos entram no fim, ids conhecidos são regravados no lugar."""
+        with self._lock:
+            docs = {d["id"]: d for d in docs}
+            novos = [d for i, d in docs.items() if i not in self.linhas]
+            for i, d in docs.items():
+                if i in self.linhas:
+                    for campo, tipo in self.esquema.items(): self._cols[campo][self.linhas[i]] = self._converter(campo, tipo, d)
+            if not novos: return
+            inicio, fim = self.n, self.n + len(novos)
+            self._crescer(fim)
+            for campo, tipo in self.esquema.items():
+                self._cols[campo][inicio:fim] = [self._converter(campo, tipo, d) for d in novos]
+            for linha, d in enumerate(novos, inicio): self.linhas[d["id"]] = linha
+            self.ids.extend(d["id"] for d in novos)
+            self.n = fim
+
+    def documentos(self, mascara):
+        """Linhas em que `mascara` é verdadeira de volta como dicts {"id", campos do esquema}, sem os
+        campos ausentes ("dia" vira a meia-noite em Brasília, como em datas.py)."""
+        docs = []
+        for linha in np.flatnonzero(mascara):
+            doc = {"id": self.ids[linha]}
+            for campo, tipo in self.esquema.items():
+                v = self._cols[campo][linha]
+                if tipo == "dia": v = None if np.isnat(v) else datas.dia(v.item())
+                elif tipo == "categoria": v = self._rotulos[campo][v] if v >= 0 else None
+                elif tipo == "numero": v = None if np.isnan(v) else float(v)
+                if v is not None: doc[campo] = v
+            docs.append(doc)
+        return docs
+
+    def nbytes(self):
+        """Memória aproximada das colunas (strings contadas pelo tamanho do objeto)."""
+        total = 0
+        for c, t in self.esquema.items():
+            total += self._cols[c].nbytes
+            if t == "texto": total += sum(sys.getsizeof(s) for s in set(self[c]) if s is not None)
+        return total
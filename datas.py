@@ -0,0 +1,72 @@
+"""Campos de data tipados de minha_agenda e meu_caixa.
+
+Além do texto `data` ('%d/%m/%Y', mantido para exibição), cada documento guarda:
+    dia    — meia-noite (horário de Brasília) do dia, para igualdade e intervalos
+    inicio — data + hora do atendimento (só minha_agenda), para ordenar o dia
+
+Os índices compostos estão em firestore.indexes.json. Documentos antigos são migrados com:
+    python datas.py migrar [--email dono@negocio.com]
+"""
+import argparse
+from datetime import datetime, time
+from banco import conectar_cli, fuso_br, paginar
+
+VERSAO = 1          # gravada em usuarios/{email}.datas_versao quando todos os documentos têm `dia`
+LOTE = 500
+COLECOES = ("minha_agenda", "meu_caixa")
+
+def dia(d):
+    """Meia-noite em Brasília do dia de `d` (date ou datetime)."""
+    if isinstance(d, datetime) and d.tzinfo: d = d.astimezone(fuso_br)
+    return datetime(d.year, d.month, d.day, tzinfo=fuso_br)
+
+def inicio(d, hora): return datetime.combine(d, hora, tzinfo=fuso_br)
+
+def dia_de(doc):
+    """Dia de um documento migrado ou antigo (via `data` ou `timestamp`); None se não houver."""
+    if isinstance(doc.get("dia"), datetime): return dia(doc["dia"])
+    try: return dia(datetime.strptime(doc["data"], '%d/%m/%Y'))
+    except (KeyError, TypeError, ValueError):
+        ts = doc.get("timestamp")
+        return dia(ts) if isinstance(ts, datetime) else None
+
+def campos_faltantes(doc, col):
+    """Campos tipados que ainda faltam em `doc` ({} se já migrado ou sem data aproveitável)."""
+    d, novos = dia_de(doc), {}
+    if d is None: return novos
+    if not isinstance(doc.get("dia"), datetime): novos["dia"] = d
+    if col == "minha_agenda" and not isinstance(doc.get("inicio"), datetime):
+        try: h = datetime.strptime(doc.get("hora") or "", '%H:%M').time()
+        except ValueError: h = time()
+        novos["inicio"] = inicio(d, h)
+    return novos
+
+def migrar(db, email, lote=LOTE):
+    """Completa os campos tipados de um tenant em batches. Idempotente: pode ser repetido."""
+    user = db.collection("usuarios").document(email)
+    alterados = 0
+    for col in COLECOES:
+        for pagina in paginar(user.collection(col), lote):
+            batch, pendentes = db.batch(), 0
+            for d in pagina:
+                novos = campos_faltantes(d.to_dict(), col)
+                if novos: batch.update(d.reference, novos); pendentes += 1
+            if pendentes: batch.commit(); alterados += pendentes
+    user.set({"datas_versao": VERSAO}, merge=True)
+    return alterados
+
+def main():
+    parser = argparse.ArgumentParser(description="Migração dos campos de data do Vivv")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    mg = sub.add_parser("migrar", help="grava `dia`/`inicio` nos documentos antigos")
+    mg.add_argument("--email", help="apenas este tenant (padrão: todos)")
+    mg.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+
+    db = conectar_cli()
+    emails = [args.email] if args.email else [u.id for u in db.collection("usuarios").stream()]
+    for email in emails:
+        print(f"✅ {email}: {migrar(db, email, args.lote)} documentos atualizados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Fila de escritas dos formulários, gravada antes num SQLite local (write-ahead).
+
+`enfileirar` grava o envio no arquivo e volta na hora com a chave que vira o id do documento.
+Uma thread de fundo manda ao banco o que estiver pendente, em lotes por tenant e coleção. O
+documento é criado com essa chave (`batch.create` no Firestore, chave primária no SQL), então
+reenviar depois de uma confirmação perdida não duplica nada: o "já existe" conta como gravado
+depois de conferir que o documento com essa chave está mesmo no banco (um erro de integridade de
+outra origem volta para a fila).
+Um lote que falha é refeito documento a documento, para isolar o problemático; cada documento que
+falhar volta para a fila com backoff exponencial (até MAX_ESPERA) e nunca é descartado. O arquivo
+sobrevive a reinícios do processo e a thread retoma o que encontrar nele; instâncias que dividem
+o arquivo reservam as linhas por RESERVA segundos antes de enviar. A thread tem a sua própria
+conexão, então esperar o arquivo ocupado por outra instância não trava quem enfileira.
+
+O `timestamp` é a marca d'água da sincronização incremental das outras instâncias
+(sincronizacao.py), que só olha alguns minutos para trás: um envio que ficou horas na fila com o
+horário de quando foi enfileirado nunca seria visto por elas. Por isso o documento sai com
+`timestamp` = hora do envio, e a hora em que o usuário o registrou fica em `registrado_em`.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from google.api_core.exceptions import AlreadyExists
+from banco import fuso_br, json_objeto, json_padrao
+
+ARQUIVO = "vivv_fila.db"
+LOTE = 500
+MAX_ESPERA = 300     # segundos entre tentativas, no máximo
+RESERVA = 60         # segundos em que linhas em envio não são pegas por outra instância
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pendentes (
+    chave TEXT PRIMARY KEY, email TEXT NOT NULL, colecao TEXT NOT NULL, dados TEXT NOT NULL,
+    criado_em REAL NOT NULL, proxima REAL NOT NULL, tentativas INTEGER NOT NULL DEFAULT 0, erro TEXT);
+CREATE INDEX IF NOT EXISTS pendentes_proxima ON pendentes (proxima);
+CREATE INDEX IF NOT EXISTS pendentes_email ON pendentes (email, criado_em);
+"""
+
+def no_envio(dados, agora):
+    """Documento como vai ao banco: `timestamp` do envio, o do registro em `registrado_em`."""
+    if "timestamp" not in dados: return dados
+    return {**dados, "timestamp": agora, "registrado_em": dados.get("registrado_em", dados["timestamp"])}
+
+def conflito(erro):
+    """Erro de criação que pode ser o documento já existir (a confirmação de um envio anterior se
+    perdeu); no SQL também um NOT NULL ou CHECK, por isso `existe` confere antes de dar por gravado."""
+    return isinstance(erro, AlreadyExists) or type(erro).__name__ == "IntegrityError"
+
+class FilaEscritas:
+    """`gravar_lote(email, col, docs)` grava documentos com "id"; `existe(email, col, id)` diz se um
+    documento está no banco; `ao_gravar(email, col, docs)` é chamado depois de cada envio confirmado
+    (para atualizar o cache)."""
+    def __init__(self, gravar_lote, existe, caminho=ARQUIVO, ao_gravar=None, tamanho_lote=LOTE, intervalo=1.0, espera=1.0):
+        self._gravar_lote, self._existe, self._ao_gravar = gravar_lote, existe, ao_gravar
+        self.tamanho_lote, self.intervalo, self.espera = tamanho_lote, intervalo, espera
+        # Conexões em autocommit: a das sessões, serializada pelo lock, e a da thread de envio
+        self._db = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_ESQUEMA)
+        self._envio = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.Lock()   # conexão das sessões e contadores
+        self._parar, self._acordar = threading.Event(), threading.Event()
+        self.contadores = {"enfileirados": 0, "gravados": 0, "repetidos": 0, "retentativas": 0, "lotes": 0}
+        self._thread = threading.Thread(target=self._rodar, name="vivv-escritas", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def _contar(self, nome, n=1):
+        with self._lock: self.contadores[nome] += n
+
+    def estatisticas(self):
+        with self._lock:
+            return {**self.contadores, "pendentes": self._db.execute("SELECT COUNT(*) FROM pendentes").fetchone()[0]}
+
+    def enfileirar(self, email, col, dados):
+        """Guarda o envio e devolve a chave (id do documento) sem esperar o banco."""
+        chave, agora = uuid.uuid4().hex[:20], time.time()
+        linha = (chave, email, col, json.dumps(dados, default=json_padrao), agora, agora)
+        with self._lock:
+            self._db.execute("INSERT INTO pendentes (chave, email, colecao, dados, criado_em, proxima) VALUES (?, ?, ?, ?, ?, ?)", linha)
+            self.contadores["enfileirados"] += 1
+        self._acordar.set()
+        return chave
+
+    def pendentes(self, email):
+        """Escritas do tenant ainda não confirmadas, das mais antigas às mais novas:
+        [{"chave", "colecao", "dados", "tentativas", "erro"}]."""
+        with self._lock:
+            linhas = self._db.execute("SELECT chave, colecao, dados, tentativas, erro FROM pendentes WHERE email = ? ORDER BY criado_em",
+                                      (email,)).fetchall()
+        return [{"chave": chave, "colecao": col, "dados": json.loads(dados, object_hook=json_objeto), "tentativas": tentativas, "erro": erro}
+                for chave, col, dados, tentativas, erro in linhas]
+
+    def fechar(self, timeout=10):
+        """Para a thread; o que não foi enviado continua no arquivo para a próxima execução."""
+        self._parar.set(); self._acordar.set()
+        self._thread.join(timeout)
+
+    def _reservar(self):
+        agora = time.time()
+        self._envio.execute("BEGIN IMMEDIATE")   # sem o lock: a espera pelo arquivo fica só nesta thread
+        try:
+            linhas = self._envio.execute("SELECT chave, email, colecao, dados, tentativas FROM pendentes WHERE proxima <= ? "
+                                         "ORDER BY criado_em LIMIT ?", (agora, self.tamanho_lote)).fetchall()
+            self._envio.executemany("UPDATE pendentes SET proxima = ? WHERE chave = ?", [(agora + RESERVA, l[0]) for l in linhas])
+            self._envio.execute("COMMIT")
+        except BaseException: self._envio.execute("ROLLBACK"); raise
+        return linhas
+
+    def _rodar(self):
+        while not self._parar.is_set():
+            try:
+                linhas = self._reservar()
+                grupos = {}
+                for linha in linhas: grupos.setdefault((linha[1], linha[2]), []).append(linha)
+                for (email, col), itens in grupos.items(): self._enviar(email, col, itens)
+            except Exception: linhas = []   # arquivo ocupado por outra instância, etc.: fica para a próxima volta
+            if not linhas: self._acordar.wait(self.intervalo); self._acordar.clear()
+
+    def _enviar(self, email, col, itens):
+        agora = datetime.now(fuso_br)
+        docs = [{**no_envio(json.loads(dados, object_hook=json_objeto), agora), "id": chave} for chave, _, _, dados, _ in itens]
+        try: self._gravar_lote(email, col, docs)
+        except Exception as e:
+            if len(itens) > 1:
+                for item in itens: self._enviar(email, col, [item])
+                return
+            if not conflito(e): return self._adiar(itens[0], e)
+            try: gravado = self._existe(email, col, itens[0][0])
+            except Exception as falha: return self._adiar(itens[0], falha)
+            if not gravado: return self._adiar(itens[0], e)
+            self._contar("repetidos")
+        self._envio.executemany("DELETE FROM pendentes WHERE chave = ?", [(item[0],) for item in itens])
+        with self._lock: self.contadores["gravados"] += len(itens); self.contadores["lotes"] += 1
+        if self._ao_gravar:
+            try: self._ao_gravar(email, col, docs)
+            except Exception: pass   # o cache se acerta na próxima sincronização
+
+    def _adiar(self, item, erro):
+        chave, tentativas = item[0], item[4] + 1
+        proxima = time.time() + min(self.espera * 2 ** min(tentativas - 1, 20), MAX_ESPERA)
+        self._envio.execute("UPDATE pendentes SET tentativas = ?, proxima = ?, erro = ? WHERE chave = ?",
+                            (tentativas, proxima, f"{type(erro).__name__}: {erro}"[:200], chave))
+        self._contar("retentativas")
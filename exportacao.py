@@ -0,0 +1,114 @@
+"""Exportação do tenant em streaming.
+
+As páginas saem do repositório direto para um arquivo temporário: o xlsxwriter roda em
+modo `constant_memory` e CSV/Parquet são gravados página a página dentro de um zip, então a
+memória usada não cresce com o tamanho do caixa.
+"""
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime
+import xlsxwriter
+from banco import fuso_br
+import datas
+
+# (coleção, aba, [(campo, título, tipo)]) — tipo: texto | moeda | data
+PLANILHAS = [
+    ("meus_clientes", "Clientes", [
+        ("nome", "Nome", "texto"), ("telefone", "WhatsApp", "texto"), ("email", "Email", "texto"),
+        ("data_cadastro", "Cadastro", "data"), ("id", "ID", "texto")]),
+    ("meus_servicos", "Serviços", [
+        ("nome", "Serviço", "texto"), ("categoria", "Categoria", "texto"), ("preco", "Preço", "moeda"),
+        ("ativo", "Ativo", "texto"), ("id", "ID", "texto")]),
+    ("minha_agenda", "Agenda", [
+        ("dia", "Data", "data"), ("hora", "Hora", "texto"), ("cliente", "Cliente", "texto"), ("servico", "Serviço", "texto"),
+        ("preco", "Preço", "moeda"), ("status", "Status", "texto"), ("cliente_id", "ID Cliente", "texto"),
+        ("servico_id", "ID Serviço", "texto"), ("id", "ID", "texto")]),
+    ("meu_caixa", "Financeiro", [
+        ("dia", "Data", "data"), ("descricao", "Descrição", "texto"), ("tipo", "Tipo", "texto"),
+        ("categoria", "Categoria", "texto"), ("valor", "Valor", "moeda"), ("id", "ID", "texto")]),
+]
+LIMITE_LINHAS = 1_048_575   # linhas de dados por aba do Excel (fora o cabeçalho)
+PAGINA = 1000
+
+def _valor(doc, campo, tipo):
+    """Valor tipado da célula; None deixa a célula vazia."""
+    v = doc.get(campo)
+    if tipo == "data":
+        d = datas.dia_de(doc) if campo == "dia" else None
+        if d is None and isinstance(v, str):
+            try: d = datetime.strptime(v, '%d/%m/%Y')
+            except ValueError: return None
+        elif d is None and isinstance(v, datetime): d = v
+        return d.astimezone(fuso_br).date() if d and d.tzinfo else (d.date() if d else None)
+    if tipo == "moeda": return float(v) if isinstance(v, (int, float)) else None
+    if v is None: return None
+    return "Sim" if v is True else "Não" if v is False else str(v)
+
+COLUNAS = {col: colunas for col, _, colunas in PLANILHAS}
+
+def valores(doc, colunas):
+    """Linha tipada de `doc` nas `colunas` de uma planilha (também usada no histórico da tela)."""
+    return [_valor(doc, campo, tipo) for campo, _, tipo in colunas]
+
+def _linhas(repo, email, col, colunas):
+    for pagina in repo.paginar(email, col, PAGINA):
+        for doc in pagina: yield valores(doc, colunas)
+
+# ================= EXCEL =================
+def exportar_xlsx(repo, email, destino):
+    wb = xlsxwriter.Workbook(destino, {"constant_memory": True, "in_memory": False})
+    formatos = {"titulo": wb.add_format({"bold": True}), "data": wb.add_format({"num_format": "dd/mm/yyyy"}),
+                "moeda": wb.add_format({"num_format": "R$ #,##0.00"})}
+    for col, aba, colunas in PLANILHAS:
+        parte, linha, ws = 1, 0, None
+        for valores in _linhas(repo, email, col, colunas):
+            if ws is None or linha > LIMITE_LINHAS:
+                ws = wb.add_worksheet(aba if parte == 1 else f"{aba} ({parte})"); parte += 1
+                ws.write_row(0, 0, [t for _, t, _ in colunas], formatos["titulo"]); linha = 1
+            for j, ((_, _, tipo), v) in enumerate(zip(colunas, valores)):
+                if v is None: continue
+                if tipo == "data": ws.write_datetime(linha, j, datetime.combine(v, datetime.min.time()), formatos["data"])
+                elif tipo == "moeda": ws.write_number(linha, j, v, formatos["moeda"])
+                else: ws.write_string(linha, j, v)
+            linha += 1
+        if ws is None: wb.add_worksheet(aba).write_row(0, 0, [t for _, t, _ in colunas], formatos["titulo"])
+    wb.close()
+
+# ================= CSV / PARQUET =================
+def exportar_csv(repo, email, destino):
+    """Um CSV por coleção (separador ';', datas ISO) dentro de um zip."""
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as zf:
+        for col, aba, colunas in PLANILHAS:
+            with zf.open(f"{aba}.csv", "w", force_zip64=True) as bruto, io.TextIOWrapper(bruto, encoding="utf-8-sig", newline="") as f:
+                w = csv.writer(f, delimiter=";")
+                w.writerow([t for _, t, _ in colunas])
+                for valores in _linhas(repo, email, col, colunas):
+                    w.writerow(["" if v is None else v.isoformat() if isinstance(v, date) else v for v in valores])
+
+def exportar_parquet(repo, email, destino):
+    """Um Parquet por coleção dentro de um zip, com um row group por página."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tipos = {"texto": pa.string(), "moeda": pa.float64(), "data": pa.date32()}
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as zf:
+        for col, aba, colunas in PLANILHAS:
+            schema = pa.schema([(titulo, tipos[tipo]) for _, titulo, tipo in colunas])
+            with zf.open(f"{aba}.parquet", "w", force_zip64=True) as f, pq.ParquetWriter(f, schema) as writer:
+                for pagina in repo.paginar(email, col, PAGINA):
+                    linhas = [[_valor(doc, campo, tipo) for campo, _, tipo in colunas] for doc in pagina]
+                    writer.write_table(pa.Table.from_pylist([dict(zip(schema.names, l)) for l in linhas], schema=schema))
+
+FORMATOS = {   # rótulo: (função, extensão, mime)
+    "Excel": (exportar_xlsx, ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": (exportar_csv, ".zip", "application/zip"),
+    "Parquet": (exportar_parquet, ".zip", "application/zip"),
+}
+
+def exportar(repo, email, formato="Excel"):
+    """Gera o relatório num arquivo temporário (apagado ao fechar) e o devolve posicionado no início."""
+    arquivo = tempfile.TemporaryFile(suffix=FORMATOS[formato][1])
+    FORMATOS[formato][0](repo, email, arquivo)
+    arquivo.seek(0)
+    return arquivo
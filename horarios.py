@@ -0,0 +1,161 @@
+"""Horários da agenda: índice de ocupação por dia, conflitos e próximos horários livres.
+
+    usuarios/{email}/ocupacao/{AAAA-MM-DD}
+        {"dia": "2026-10-18", "intervalos": [{"inicio": 540, "fim": 585, "id": "<agendamento>"}, ...]}
+
+Os intervalos são minutos desde a meia-noite (horário de Brasília), ordenados pelo início. A
+duração vem do serviço (`duracao` em meus_servicos, DURACAO_PADRAO se ausente) e é gravada no
+agendamento junto com `fim`. O agendamento lê o dia e grava agendamento + ocupação numa
+transação, então dois agendamentos simultâneos no mesmo horário não passam os dois.
+
+Tenants antigos precisam da reconstrução para que os agendamentos já existentes contem:
+    python horarios.py reconstruir [--email dono@negocio.com]
+"""
+import argparse
+import bisect
+from collections import defaultdict
+from datetime import datetime, timedelta
+from google.cloud import firestore
+from banco import conectar_cli, fuso_br, paginar
+import datas
+
+VERSAO = 1          # gravada em usuarios/{email}.horarios_versao depois da reconstrução
+DURACAO_PADRAO = 30
+ABERTURA, FECHAMENTO = 8 * 60, 20 * 60     # expediente, em minutos
+PASSO = 15                                 # grade dos horários sugeridos
+LOTE = 500
+IGNORADOS = ("Cancelado",)                 # status que não ocupam horário
+
+class Conflito(ValueError):
+    """Horário já ocupado; `intervalo` é o agendamento que colide."""
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        super().__init__(f"Horário ocupado das {hora(intervalo['inicio'])} às {hora(intervalo['fim'])}")
+
+# ================= INTERVALOS =================
+def chave(d): return datas.dia(d).strftime('%Y-%m-%d')
+
+def minutos(d):
+    if isinstance(d, datetime) and d.tzinfo: d = d.astimezone(fuso_br)
+    return d.hour * 60 + d.minute
+
+def hora(m): return f"{m // 60:02d}:{m % 60:02d}"
+
+def duracao(servico):
+    try: return max(int(servico.get("duracao") or DURACAO_PADRAO), 1)
+    except (TypeError, ValueError): return DURACAO_PADRAO
+
+def intervalo(doc, duracoes=None):
+    """(início, fim) em minutos de um agendamento, ou None se não tiver horário. Sem `duracao` no
+    documento, usa `duracoes[servico]` (agendamentos anteriores a este módulo)."""
+    inicio = doc.get("inicio") if isinstance(doc.get("inicio"), datetime) else datas.campos_faltantes(doc, "minha_agenda").get("inicio")
+    if inicio is None: return None
+    d = doc.get("duracao") or (duracoes or {}).get(doc.get("servico")) or DURACAO_PADRAO
+    return minutos(inicio), minutos(inicio) + int(d)
+
+def conflito(intervalos, inicio, fim):
+    """Primeiro intervalo que se sobrepõe a [inicio, fim), ou None. Só os que começam antes de
+    `fim` podem colidir; o bisect corta o resto (dias antigos podem ter sobreposições)."""
+    corte = bisect.bisect_left([i["inicio"] for i in intervalos], fim)
+    return next((i for i in intervalos[:corte] if i["fim"] > inicio), None)
+
+def inserir(intervalos, novo):
+    saida = list(intervalos)
+    bisect.insort(saida, novo, key=lambda i: (i["inicio"], i["fim"]))
+    return saida
+
+def livres(intervalos, duracao, depois_de=ABERTURA, abertura=ABERTURA, fechamento=FECHAMENTO, passo=PASSO):
+    """Inícios (minutos, na grade de `passo`) em que cabe um atendimento de `duracao`."""
+    cursor, saida = max(abertura, depois_de), []
+    cursor += -cursor % passo
+    for i in intervalos + [{"inicio": fechamento, "fim": fechamento}]:
+        while cursor + duracao <= min(i["inicio"], fechamento):
+            saida.append(cursor); cursor += passo
+        if i["fim"] > cursor: cursor = i["fim"] + -i["fim"] % passo
+    return saida
+
+def proximos(ocupacao, duracao, agora, n=6, dias=14):
+    """Os `n` próximos horários livres (datetimes) a partir de `agora`, olhando `dias` dias.
+    `ocupacao` são os documentos do período, no formato do topo do módulo."""
+    por_dia = {o["dia"]: o.get("intervalos", []) for o in ocupacao}
+    agora, saida = agora.astimezone(fuso_br), []
+    for k in range(dias):
+        dia = datas.dia(agora + timedelta(days=k))
+        depois_de = minutos(agora) + 1 if k == 0 else ABERTURA
+        for m in livres(por_dia.get(chave(dia), []), duracao, depois_de):
+            saida.append(dia + timedelta(minutes=m))
+            if len(saida) == n: return saida
+    return saida
+
+# ================= FIRESTORE =================
+def _ocupacao(db, email): return db.collection("usuarios").document(email).collection("ocupacao")
+
+def agendar(db, email, dados, duracao):
+    """Grava o agendamento se o horário estiver livre; levanta `Conflito` se não estiver.
+
+    A transação lê o documento de ocupação do dia: se outro agendamento o alterar antes do
+    commit, o Firestore refaz a função com o dia atualizado.
+    """
+    user = db.collection("usuarios").document(email)
+    ref, dia_ref = user.collection("minha_agenda").document(), _ocupacao(db, email).document(chave(dados["inicio"]))
+    inicio = minutos(dados["inicio"])
+    novo = {"inicio": inicio, "fim": inicio + duracao, "id": ref.id}
+
+    @firestore.transactional
+    def gravar(transacao):
+        snap = dia_ref.get(transaction=transacao)
+        intervalos = (snap.to_dict() or {}).get("intervalos", []) if snap.exists else []
+        colide = conflito(intervalos, novo["inicio"], novo["fim"])
+        if colide: raise Conflito(colide)
+        transacao.create(ref, {**dados, "duracao": duracao, "fim": dados["inicio"] + timedelta(minutes=duracao)})
+        transacao.set(dia_ref, {"dia": dia_ref.id, "intervalos": inserir(intervalos, novo)})
+
+    gravar(db.transaction())
+    return ref.id
+
+def ocupacao(db, email, inicio, dias=14):
+    """Documentos de ocupação de `dias` dias a partir de `inicio` (só os dias com agendamento)."""
+    q = (_ocupacao(db, email).where(filter=firestore.FieldFilter("dia", ">=", chave(inicio)))
+         .where(filter=firestore.FieldFilter("dia", "<", chave(inicio + timedelta(days=dias)))))
+    return [d.to_dict() for d in q.stream()]
+
+# ================= RECONSTRUÇÃO =================
+def agrupar(agendamentos, duracoes=None):
+    """{chave do dia: intervalos} de uma lista de agendamentos (com "id")."""
+    dias = defaultdict(list)
+    for doc in agendamentos:
+        if doc.get("status") in IGNORADOS: continue
+        par, dia = intervalo(doc, duracoes), datas.dia_de(doc)
+        if par is None or dia is None: continue
+        dias[chave(dia)].append({"inicio": par[0], "fim": par[1], "id": doc["id"]})
+    return {k: sorted(v, key=lambda i: (i["inicio"], i["fim"])) for k, v in dias.items()}
+
+def reconstruir(db, email, lote=LOTE):
+    """Regrava a ocupação de todos os dias a partir de minha_agenda. Idempotente."""
+    user = db.collection("usuarios").document(email)
+    duracoes = {s.get("nome"): duracao(s) for s in (d.to_dict() for d in user.collection("meus_servicos").stream())}
+    agendamentos = [{"id": d.id, **d.to_dict()} for pagina in paginar(user.collection("minha_agenda"), lote) for d in pagina]
+    dias = agrupar(agendamentos, duracoes)
+    itens = list(dias.items())
+    for i in range(0, len(itens), lote):
+        batch = db.batch()
+        for k, intervalos in itens[i:i + lote]: batch.set(_ocupacao(db, email).document(k), {"dia": k, "intervalos": intervalos})
+        batch.commit()
+    user.set({"horarios_versao": VERSAO}, merge=True)
+    return len(dias)
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de horários da agenda do Vivv")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    rc = sub.add_parser("reconstruir", help="recalcula a ocupação por dia a partir de minha_agenda")
+    rc.add_argument("--email", help="apenas este tenant (padrão: todos)")
+    rc.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+
+    db = conectar_cli()
+    emails = [args.email] if args.email else [u.id for u in db.collection("usuarios").stream()]
+    for email in emails:
+        print(f"✅ {email}: {reconstruir(db, email, args.lote)} dias reconstruídos")
+
+if __name__ == "__main__":
+    main()
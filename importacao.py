@@ -0,0 +1,190 @@
+"""Importação em massa de clientes, serviços e lançamentos do caixa (CSV ou XLSX).
+
+O arquivo é lido em lotes de LOTE linhas, sem carregar a planilha inteira: cada lote é
+validado (as mesmas regras de `Security` dos formulários), deduplicado contra o que o tenant já
+tem e contra o próprio arquivo, e gravado pelo `sincronizacao.Cache` em batches de até 500
+escritas. O cabeçalho é casado por nome, sem acento e sem diferenciar maiúsculas.
+
+Duplicados: clientes pelo telefone, serviços pelo nome, lançamentos pelo conteúdo (data, tipo,
+valor, descrição e a ordem entre linhas iguais) — o id do lançamento sai desse conteúdo, então
+reimportar o mesmo arquivo não lança nada duas vezes, nem quando o lançamento já está no banco
+mas não no cache desta sessão (o lote pula esse id). O `timestamp` do lançamento é a data da
+planilha, para que o histórico o mostre no lugar certo. Linha sem data é lançada no dia e na hora
+da importação, mas esse dia fica fora do conteúdo: reenviada noutro dia, continua sendo a mesma.
+"""
+import codecs
+import csv
+import hashlib
+import io
+from collections import Counter
+from datetime import date, datetime
+from banco import fuso_br
+from busca import digitos, normalizar
+from seguranca import Security
+import datas
+import horarios
+
+LOTE = 500
+MAX_ERROS = 100     # linhas com erro guardadas para mostrar (as demais só são contadas)
+
+# coleção: {campo: (obrigatório, cabeçalhos aceitos)}
+COLUNAS = {
+    "meus_clientes": {"nome": (True, ("nome", "cliente")), "telefone": (True, ("telefone", "whatsapp", "celular", "fone")),
+                      "email": (False, ("email", "e-mail"))},
+    "meus_servicos": {"nome": (True, ("nome", "servico")), "preco": (True, ("preco", "valor")),
+                      "categoria": (False, ("categoria",)), "duracao": (False, ("duracao", "duracao (min)", "minutos"))},
+    "meu_caixa": {"descricao": (True, ("descricao", "historico")), "valor": (True, ("valor",)), "tipo": (True, ("tipo",)),
+                  "categoria": (False, ("categoria",)), "data": (False, ("data",))},
+}
+TIPOS = {"entrada": "Entrada", "receita": "Entrada", "e": "Entrada", "saida": "Saída", "despesa": "Saída", "s": "Saída"}
+
+class Resultado:
+    def __init__(self): self.importados, self.duplicados, self.invalidos, self.erros = 0, 0, 0, []
+
+    def erro(self, linha, motivo):
+        self.invalidos += 1
+        if len(self.erros) < MAX_ERROS: self.erros.append((linha, motivo))
+
+    def resumo(self):
+        partes = [f"{self.importados} importados"]
+        if self.duplicados: partes.append(f"{self.duplicados} duplicados")
+        if self.invalidos: partes.append(f"{self.invalidos} com erro")
+        return " · ".join(partes)
+
+# ================= LEITURA =================
+def _mapear(cabecalho, col):
+    """Posição de cada campo no cabeçalho; ValueError se faltar uma coluna obrigatória."""
+    posicoes = {normalizar(c): i for i, c in enumerate(cabecalho) if c is not None}
+    mapa = {}
+    for campo, (obrigatorio, nomes) in COLUNAS[col].items():
+        i = next((posicoes[n] for n in nomes if n in posicoes), None)
+        if i is not None: mapa[campo] = i
+        elif obrigatorio: raise ValueError(f"Coluna obrigatória ausente: {nomes[0]}")
+    return mapa
+
+def _tamanho(arquivo):
+    arquivo.seek(0, io.SEEK_END); n = arquivo.tell(); arquivo.seek(0)
+    return n or 1
+
+def _linhas_csv(arquivo):
+    """(linha, fração lida) de um CSV UTF-8 ou Latin-1 (Excel BR), separado por ';', ',' ou tab."""
+    total, amostra = _tamanho(arquivo), arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    try: codecs.getincrementaldecoder("utf-8")().decode(amostra); encoding = "utf-8-sig"
+    except UnicodeDecodeError: encoding = "latin-1"
+    texto = io.TextIOWrapper(arquivo, encoding=encoding, newline="")
+    try:
+        try: dialeto = csv.Sniffer().sniff(amostra.decode(encoding, "ignore").split("\n", 1)[0], delimiters=";,\t")
+        except csv.Error: dialeto = "excel"
+        for linha in csv.reader(texto, dialeto): yield linha, arquivo.tell() / total
+    finally: texto.detach()   # não fecha o arquivo de quem chamou
+
+def _linhas_xlsx(arquivo):
+    import openpyxl
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        total = ws.max_row or 1
+        for i, linha in enumerate(ws.iter_rows(values_only=True), 1): yield linha, i / total
+    finally: wb.close()
+
+def ler(arquivo, nome_arquivo, col, tamanho=LOTE):
+    """Gera (número da primeira linha, [{campo: valor}], fração lida) em lotes de `tamanho` linhas.
+    Linhas vazias são puladas; a numeração é a da planilha (cabeçalho = 1)."""
+    linhas = _linhas_xlsx(arquivo) if nome_arquivo.lower().endswith(".xlsx") else _linhas_csv(arquivo)
+    cabecalho, _ = next(linhas, ((), 0))
+    mapa = _mapear(cabecalho, col)
+    lote, primeira, fracao = [], 2, 0
+    for numero, (valores, fracao) in enumerate(linhas, 2):
+        if not any(v not in (None, "") for v in valores): continue
+        if not lote: primeira = numero
+        lote.append((numero, {campo: valores[i] if i < len(valores) else None for campo, i in mapa.items()}))
+        if len(lote) == tamanho: yield primeira, lote, fracao; lote = []
+    if lote: yield primeira, lote, fracao
+
+# ================= VALIDAÇÃO =================
+def _texto(v): return "" if v is None else str(v).strip()
+
+def numero(v):
+    """123.4, '123,40', 'R$ 1.234,56' -> float; ValueError se não for número."""
+    if isinstance(v, (int, float)) and not isinstance(v, bool): return float(v)
+    t = _texto(v).replace("R$", "").replace(" ", "")
+    if "," in t: t = t.replace(".", "").replace(",", ".")
+    return float(t)
+
+def data(v):
+    if isinstance(v, datetime): return v
+    if isinstance(v, date): return datetime.combine(v, datetime.min.time())
+    for formato in ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y'):
+        try: return datetime.strptime(_texto(v), formato)
+        except ValueError: pass
+    raise ValueError(f"data inválida: {_texto(v)}")
+
+def _cliente(linha, agora):
+    nome, telefone, email = _texto(linha.get("nome")), _texto(linha.get("telefone")), _texto(linha.get("email"))
+    if not nome: raise ValueError("nome vazio")
+    if not Security.telefone_valido(telefone): raise ValueError(f"telefone inválido: {telefone}")
+    if email and not Security.email_valido(email): raise ValueError(f"email inválido: {email}")
+    return {"nome": nome, "telefone": telefone, "email": email or None,
+            "data_cadastro": agora.strftime('%d/%m/%Y'), "timestamp": agora}
+
+def _servico(linha, agora):
+    nome = _texto(linha.get("nome"))
+    if not nome: raise ValueError("nome vazio")
+    try: preco = numero(linha.get("preco"))
+    except ValueError: raise ValueError(f"preço inválido: {_texto(linha.get('preco'))}") from None
+    if preco <= 0: raise ValueError("preço deve ser maior que zero")
+    try: duracao = int(numero(linha.get("duracao"))) if _texto(linha.get("duracao")) else horarios.DURACAO_PADRAO
+    except ValueError: raise ValueError(f"duração inválida: {_texto(linha.get('duracao'))}") from None
+    return {"nome": nome, "preco": preco, "duracao": duracao, "categoria": _texto(linha.get("categoria")) or "Outros",
+            "ativo": True, "data_cadastro": agora.strftime('%d/%m/%Y'), "timestamp": agora}
+
+def _lancamento(linha, agora):
+    descricao = _texto(linha.get("descricao"))
+    if not descricao: raise ValueError("descrição vazia")
+    try: valor = numero(linha.get("valor"))
+    except ValueError: raise ValueError(f"valor inválido: {_texto(linha.get('valor'))}") from None
+    if valor <= 0: raise ValueError("valor deve ser maior que zero")
+    tipo = TIPOS.get(normalizar(linha.get("tipo")))
+    if tipo is None: raise ValueError(f"tipo inválido: {_texto(linha.get('tipo'))} (use Entrada ou Saída)")
+    quando = data(linha["data"]) if _texto(linha.get("data")) else agora
+    if quando.tzinfo is None: quando = quando.replace(tzinfo=fuso_br)
+    return {"descricao": descricao, "valor": valor, "tipo": tipo, "categoria": _texto(linha.get("categoria")) or "Outros",
+            "data": quando.strftime('%d/%m/%Y'), "dia": datas.dia(quando), "timestamp": quando}
+
+VALIDAR = {"meus_clientes": _cliente, "meus_servicos": _servico, "meu_caixa": _lancamento}
+
+# ================= DUPLICADOS =================
+def existentes(col, atual):
+    """Chaves do que o tenant já tem, a partir do snapshot do cache."""
+    if col == "meus_clientes": return {digitos(t) for t in atual["telefone"] if t}
+    if col == "meus_servicos": return set(atual.por_nome)
+    return set(atual.linhas)
+
+def identificar(col, doc, repetidas, com_data=True):
+    """Chave de duplicidade do documento; lançamentos ganham o "id" derivado do conteúdo
+    (sem a data quando ela não veio da planilha)."""
+    if col == "meus_clientes": return digitos(doc["telefone"])
+    if col == "meus_servicos": return normalizar(doc["nome"])
+    conteudo = f"{doc['data'] if com_data else 'sem data'}|{doc['tipo']}|{doc['valor']:.2f}|{normalizar(doc['descricao'])}"
+    repetidas[conteudo] += 1
+    doc["id"] = hashlib.sha1(f"{conteudo}|{repetidas[conteudo]}".encode()).hexdigest()[:20]
+    return doc["id"]
+
+# ================= IMPORTAÇÃO =================
+def importar(cache, email, col, arquivo, nome_arquivo, progresso=None, tamanho=LOTE):
+    """Importa `arquivo` para `col` do tenant. `progresso(fração, resultado)` é chamado a cada lote.
+    ValueError se o cabeçalho não tiver as colunas obrigatórias."""
+    resultado, agora = Resultado(), datetime.now(fuso_br)
+    vistos, repetidas = existentes(col, cache.snapshot(email, col).atual()), Counter()
+    for _, linhas, fracao in ler(arquivo, nome_arquivo, col, tamanho):
+        docs = []
+        for numero_linha, linha in linhas:
+            try: doc = VALIDAR[col](linha, agora)
+            except ValueError as e: resultado.erro(numero_linha, str(e)); continue
+            chave = identificar(col, doc, repetidas, com_data=bool(_texto(linha.get("data"))))
+            if chave in vistos: resultado.duplicados += 1; continue
+            vistos.add(chave); docs.append(doc)
+        if docs: cache.importar(email, col, docs); resultado.importados += len(docs)
+        if progresso: progresso(fracao, resultado)
+    return resultado
@@ -0,0 +1,41 @@
+"""Cálculos do dashboard, sem Streamlit: métricas do topo e série do gráfico financeiro.
+
+Agenda e caixa chegam como `colunar.Tabela`; as contas são vetorizadas sobre as colunas.
+"""
+from datetime import datetime
+import numpy as np
+from banco import fuso_br
+import resumos
+
+def _soma(caixa, tipo):
+    return float(np.nansum(caixa["valor"][caixa["tipo"] == caixa.codigo("tipo", tipo)]))
+
+def metricas(clientes, agenda, caixa, mensais=None, agenda_hoje=None, periodo=None):
+    """Números dos cards. `periodo` = (entradas, saídas) do período escolhido; sem ele, o total
+    geral. `mensais` e `agenda_hoje` vêm dos resumos e da consulta por `dia` quando o tenant já
+    foi migrado; sem eles, caixa e agenda são varridos por inteiro."""
+    if periodo is not None: faturamento, despesas = periodo
+    elif mensais is not None: faturamento, despesas = resumos.totais(mensais)
+    else: faturamento, despesas = _soma(caixa, "Entrada"), _soma(caixa, "Saída")
+    if agenda_hoje is not None: hoje = len(agenda_hoje)
+    else: hoje = int(np.count_nonzero(agenda["dia"] == np.datetime64(datetime.now(fuso_br).date(), "D")))
+    return {"clientes": len(clientes), "faturamento": faturamento, "despesas": despesas,
+            "lucro": faturamento - despesas, "agenda_hoje": hoje}
+
+def serie_caixa(caixa, dias=14, inicio=None, fim=None):
+    """Últimos `dias` com movimento como ((dia 'AAAA-MM-DD', entradas, saídas), ...); com `inicio` e
+    `fim` (datas, fim exclusivo), todos os dias com movimento do intervalo."""
+    dia, tipo, valor = caixa["dia"], caixa["tipo"], caixa["valor"]
+    validos = ~np.isnat(dia) & (tipo >= 0) & ~np.isnan(valor)
+    if inicio is not None:
+        validos &= (dia >= np.datetime64(inicio, "D")) & (dia < np.datetime64(fim, "D"))
+        dias = None
+    if not validos.any(): return ()
+    # Agrupar por dia: índice do dia de cada lançamento + soma ponderada por tipo
+    unicos, grupo = np.unique(dia[validos], return_inverse=True)
+    tipo, valor = tipo[validos], valor[validos]
+    def por_dia(rotulo):
+        return np.bincount(grupo, weights=np.where(tipo == caixa.codigo("tipo", rotulo), valor, 0.0), minlength=len(unicos))
+    entradas, saidas = por_dia("Entrada"), por_dia("Saída")
+    if dias: unicos, entradas, saidas = unicos[-dias:], entradas[-dias:], saidas[-dias:]
+    return tuple((str(d), float(e), float(s)) for d, e, s in zip(unicos, entradas, saidas))
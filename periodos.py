@@ -0,0 +1,55 @@
+"""Períodos do dashboard (este mês, mês passado ou intervalo livre) e a comparação com o anterior.
+
+Um período é (inicio, fim) em datas de Brasília, com `fim` exclusivo. O anterior de um mês de
+calendário é o mês de antes; o de um intervalo livre é o intervalo de mesmo tamanho que termina
+onde ele começa. Um período é fechado quando termina antes de hoje: os seus números não mudam
+mais com lançamentos do dia e podem ficar mais tempo em cache.
+"""
+from datetime import timedelta
+
+MAX_DIAS_DIARIO = 62    # acima disso o gráfico agrupa por mês
+
+def _proximo_mes(d): return (d.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def este_mes(hoje):
+    inicio = hoje.replace(day=1)
+    return inicio, _proximo_mes(inicio)
+
+def mes_passado(hoje):
+    fim = hoje.replace(day=1)
+    return (fim - timedelta(days=1)).replace(day=1), fim
+
+def intervalo(de, ate):
+    """Datas escolhidas na tela (ambas inclusivas, em qualquer ordem) -> período."""
+    de, ate = min(de, ate), max(de, ate)
+    return de, ate + timedelta(days=1)
+
+def mensal(inicio, fim): return inicio.day == 1 and fim == _proximo_mes(inicio)
+
+def anterior(inicio, fim):
+    if mensal(inicio, fim): return mes_passado(inicio)
+    return inicio - (fim - inicio), inicio
+
+def fechado(fim, hoje): return fim <= hoje
+
+def rotulo(inicio, fim):
+    if mensal(inicio, fim): return inicio.strftime('%m/%Y')
+    ultimo = fim - timedelta(days=1)
+    if ultimo == inicio: return inicio.strftime('%d/%m/%Y')
+    return f"{inicio.strftime('%d/%m')} a {ultimo.strftime('%d/%m/%Y')}"
+
+def totais(serie):
+    """(entradas, saídas) de uma série ((dia, entradas, saídas), ...)."""
+    return sum(e for _, e, _ in serie), sum(s for _, _, s in serie)
+
+def variacao(atual, anterior):
+    """Variação relativa (0.12 = +12%); None quando não há base de comparação."""
+    return (atual - anterior) / abs(anterior) if anterior else None
+
+def por_mes(serie):
+    """Série diária -> mensal ((AAAA-MM-01, entradas, saídas), ...), para intervalos longos no gráfico."""
+    meses = {}
+    for dia, e, s in serie:
+        atual = meses.get(dia[:7], (0.0, 0.0))
+        meses[dia[:7]] = (atual[0] + e, atual[1] + s)
+    return tuple((f"{mes}-01", e, s) for mes, (e, s) in sorted(meses.items()))
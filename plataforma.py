@@ -0,0 +1,218 @@
+"""Números da plataforma: lojas ativas, agendamentos por dia e receita por tipo de negócio.
+
+Job de linha de comando, fora do app. Em vez de abrir tenant por tenant, lê cada subcoleção de
+todos os tenants de uma vez por collection group (minha_agenda, meu_caixa e arquivo_caixa, onde
+estão os meses arquivados). Cada grupo é dividido com `get_partitions` e as partições são lidas em
+paralelo, em páginas por cursor de id, com projeção só dos campos somados. A posição de cada
+partição e o que ela já somou vão para um checkpoint JSON a cada SALVAR_A_CADA segundos: rodar de
+novo com o mesmo arquivo continua de onde parou (ele é apagado quando o job termina).
+
+    python plataforma.py consolidar [--parquet plataforma.parquet] [--checkpoint plataforma.ckpt.json]
+
+Sem --parquet, o resultado vai para a coleção estatisticas_plataforma:
+    lojas      {"total", "ativas", "por_tipo": {tipo: {"lojas", "ativas"}}, "gerado_em"}
+    {AAAA-MM}  {"mes", "por_tipo": {tipo: MÉTRICAS}, "dias": {"AAAA-MM-DD": MÉTRICAS}, "gerado_em"}
+com MÉTRICAS = {"agendamentos", "entradas", "saidas", "lancamentos"}. O Parquet tem uma linha por
+dia e tipo de negócio com as mesmas colunas; as lojas vão nos metadados do arquivo ("vivv.lojas").
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from banco import conectar_cli, fuso_br, paginar
+import arquivamento
+import datas
+
+VERSAO = 1
+COLECAO = "estatisticas_plataforma"
+GRUPOS = ("minha_agenda", "meu_caixa", "arquivo_caixa")
+CAMPOS = {"minha_agenda": ["dia", "data", "timestamp"], "meu_caixa": ["dia", "data", "timestamp", "tipo", "valor"],
+          "arquivo_caixa": ["ids", "colunas.dia", "colunas.data", "colunas.timestamp", "colunas.tipo", "colunas.valor"]}
+METRICAS = ("agendamentos", "entradas", "saidas", "lancamentos")
+SEM_TIPO = "(sem tipo)"
+PARTICOES = 32          # por grupo; o Firestore pode devolver menos
+THREADS = 16
+PAGINA = 1000
+SALVAR_A_CADA = 10      # segundos entre gravações do checkpoint
+CHECKPOINT = "plataforma.ckpt.json"
+
+# ================= SOMA =================
+# dias = {"AAAA-MM-DD": {tipo_negocio: [agendamentos, entradas, saídas, lançamentos]}}
+def _somar(destino, origem):
+    for dia, tipos in origem.items():
+        for tipo, valores in tipos.items():
+            atual = destino.setdefault(dia, {}).setdefault(tipo, [0, 0.0, 0.0, 0])
+            for i, v in enumerate(valores): atual[i] += v
+
+def contabilizar(dias, grupo, dados, tipo_negocio):
+    """Soma em `dias` um documento de `grupo` (um documento de arquivo soma todas as suas linhas).
+    Devolve quantas linhas ficaram de fora por não terem dia, tipo ou valor."""
+    linhas = arquivamento.desempacotar(dados) if grupo == "arquivo_caixa" else [dados]
+    ignoradas = 0
+    for doc in linhas:
+        d, valor = datas.dia_de(doc), doc.get("valor")
+        if d is None: ignoradas += 1; continue
+        atual = dias.setdefault(d.strftime('%Y-%m-%d'), {}).setdefault(tipo_negocio, [0, 0.0, 0.0, 0])
+        if grupo == "minha_agenda": atual[0] += 1
+        elif doc.get("tipo") == "Entrada" and isinstance(valor, (int, float)): atual[1] += valor; atual[3] += 1
+        elif doc.get("tipo") == "Saída" and isinstance(valor, (int, float)): atual[2] += valor; atual[3] += 1
+        else: ignoradas += 1
+    return ignoradas
+
+# ================= CHECKPOINT =================
+class Checkpoint:
+    """Estado do job em JSON: lojas, partições de cada grupo (limites, último documento lido, soma
+    parcial, se terminou). Quem altera o estado segura `lock`; `salvar` grava de forma atômica."""
+    def __init__(self, caminho=CHECKPOINT):
+        self.caminho, self.lock, self.salvo_em, self.estado = caminho, threading.Lock(), time.monotonic(), None
+        if caminho and os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f: self.estado = json.load(f)
+            if self.estado.get("versao") != VERSAO: raise SystemExit(f"❌ Checkpoint de outra versão: apague {caminho} ou use --recomecar")
+
+    def salvar(self, forcar=False):
+        with self.lock:
+            if not self.caminho or not forcar and time.monotonic() - self.salvo_em < SALVAR_A_CADA: return
+            temporario = f"{self.caminho}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f: json.dump(self.estado, f)
+            os.replace(temporario, self.caminho)
+            self.salvo_em = time.monotonic()
+
+    def apagar(self):
+        if self.caminho and os.path.exists(self.caminho): os.remove(self.caminho)
+
+# ================= LEITURA =================
+def lojas(db, tamanho=PAGINA):
+    """{email: [tipo_negocio, ativo]} de todos os usuários, em páginas."""
+    saida = {}
+    for pagina in paginar(db.collection("usuarios").select(["tipo_negocio", "ativo"]), tamanho):
+        for u in pagina:
+            dados = u.to_dict()
+            saida[u.id] = [dados.get("tipo_negocio") or SEM_TIPO, bool(dados.get("ativo"))]
+    return saida
+
+def particionar(db, grupo, n=PARTICOES):
+    """Partições de `grupo` como limites serializáveis {"inicio", "fim"} (caminhos de documento ou None)."""
+    return [{"inicio": p.start_at.path if p.start_at else None, "fim": p.end_at.path if p.end_at else None,
+             "ultimo": None, "feito": False, "parcial": {}, "ignoradas": 0}
+            for p in db.collection_group(grupo).get_partitions(n)]
+
+def _consulta(db, grupo, particao):
+    q = db.collection_group(grupo).select(CAMPOS[grupo]).order_by("__name__")
+    if particao["ultimo"]: q = q.start_after({"__name__": db.document(particao["ultimo"])})
+    elif particao["inicio"]: q = q.start_at({"__name__": db.document(particao["inicio"])})
+    if particao["fim"]: q = q.end_before({"__name__": db.document(particao["fim"])})
+    return q
+
+def varrer(db, checkpoint, tenants, grupo, particao, tamanho=PAGINA, parar=None):
+    """Lê a partição do início (ou do último documento do checkpoint) até o fim, página a página;
+    com `parar` ligado, sai depois da página atual."""
+    while not particao["feito"] and not (parar and parar.is_set()):
+        pagina = list(_consulta(db, grupo, particao).limit(tamanho).stream())
+        soma, ignoradas = {}, 0
+        for snap in pagina:
+            tipo = tenants.get(snap.reference.path.split("/")[1], (SEM_TIPO,))[0]
+            ignoradas += contabilizar(soma, grupo, snap.to_dict(), tipo)
+        with checkpoint.lock:
+            _somar(particao["parcial"], soma)
+            particao["ignoradas"] += ignoradas
+            if pagina: particao["ultimo"] = pagina[-1].reference.path
+            particao["feito"] = len(pagina) < tamanho
+        checkpoint.salvar()
+
+def consolidar(db, checkpoint, particoes=PARTICOES, threads=THREADS, tamanho=PAGINA):
+    """Roda (ou continua) a varredura de todos os grupos. Devolve (lojas, dias, linhas ignoradas)."""
+    if checkpoint.estado is None:
+        checkpoint.estado = {"versao": VERSAO, "iniciado_em": datetime.now(fuso_br).isoformat(), "lojas": lojas(db, tamanho), "grupos": {}}
+    estado = checkpoint.estado
+    for grupo in GRUPOS:
+        if grupo not in estado["grupos"]: estado["grupos"][grupo] = particionar(db, grupo, particoes)
+    checkpoint.salvar(forcar=True)
+
+    # Uma falha (ou Ctrl+C) para as demais partições na próxima página e o checkpoint guarda onde cada uma estava
+    pendentes, parar = [(grupo, p) for grupo in GRUPOS for p in estado["grupos"][grupo] if not p["feito"]], threading.Event()
+    try:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="vivv-plataforma") as pool:
+            futuros = [pool.submit(varrer, db, checkpoint, estado["lojas"], g, p, tamanho, parar) for g, p in pendentes]
+            try:
+                for futuro in futuros: futuro.result()
+            except BaseException: parar.set(); raise
+    finally: checkpoint.salvar(forcar=True)
+
+    dias = {}
+    for p in (p for ps in estado["grupos"].values() for p in ps): _somar(dias, p["parcial"])
+    return estado["lojas"], dias, sum(p["ignoradas"] for ps in estado["grupos"].values() for p in ps)
+
+# ================= SAÍDA =================
+def por_tipo(tenants):
+    saida = {}
+    for tipo, ativo in tenants.values():
+        t = saida.setdefault(tipo, {"lojas": 0, "ativas": 0})
+        t["lojas"] += 1; t["ativas"] += ativo
+    return saida
+
+def _metricas(valores): return {m: round(v, 2) if isinstance(v, float) else v for m, v in zip(METRICAS, valores)}
+
+def documentos(tenants, dias):
+    """{id: dados} da coleção estatisticas_plataforma: "lojas" e um documento por mês."""
+    agora, tipos = datetime.now(fuso_br), por_tipo(tenants)
+    docs = {"lojas": {"total": len(tenants), "ativas": sum(t["ativas"] for t in tipos.values()), "por_tipo": tipos, "gerado_em": agora}}
+    meses = {}
+    for dia, valores_por_tipo in sorted(dias.items()):
+        mes = meses.setdefault(dia[:7], {"mes": dia[:7], "por_tipo": {}, "dias": {}, "gerado_em": agora})
+        total = [0, 0.0, 0.0, 0]
+        for tipo, valores in valores_por_tipo.items():
+            acumulado = mes["por_tipo"].setdefault(tipo, [0, 0.0, 0.0, 0])
+            for i, v in enumerate(valores): total[i] += v; acumulado[i] += v
+        mes["dias"][dia] = _metricas(total)
+    for mes in meses.values(): mes["por_tipo"] = {t: _metricas(v) for t, v in mes["por_tipo"].items()}
+    return {**docs, **meses}
+
+def gravar_firestore(db, tenants, dias):
+    docs, col = list(documentos(tenants, dias).items()), db.collection(COLECAO)
+    for i in range(0, len(docs), 500):
+        batch = db.batch()
+        for doc_id, dados in docs[i:i + 500]: batch.set(col.document(doc_id), dados)
+        batch.commit()
+    return len(docs)
+
+def gravar_parquet(destino, tenants, dias):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    linhas = [(date.fromisoformat(dia), tipo, *valores) for dia, tipos in sorted(dias.items()) for tipo, valores in sorted(tipos.items())]
+    schema = pa.schema([("dia", pa.date32()), ("tipo_negocio", pa.string()), ("agendamentos", pa.int64()),
+                        ("entradas", pa.float64()), ("saidas", pa.float64()), ("lancamentos", pa.int64())],
+                       metadata={"vivv.lojas": json.dumps(por_tipo(tenants), ensure_ascii=False)})
+    colunas = list(zip(*linhas)) or [()] * len(schema)
+    pq.write_table(pa.Table.from_arrays([pa.array(c, type=t) for c, t in zip(colunas, schema.types)], schema=schema), destino)
+    return len(linhas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Números da plataforma Vivv (todos os tenants)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    co = sub.add_parser("consolidar", help="lojas ativas, agendamentos por dia e receita por tipo de negócio")
+    co.add_argument("--parquet", help="grava neste arquivo Parquet em vez da coleção " + COLECAO)
+    co.add_argument("--checkpoint", default=CHECKPOINT, help="arquivo de progresso (padrão: %(default)s)")
+    co.add_argument("--recomecar", action="store_true", help="ignora o checkpoint existente")
+    co.add_argument("--particoes", type=int, default=PARTICOES, help="partições por collection group (padrão: %(default)s)")
+    co.add_argument("--threads", type=int, default=THREADS, help="partições lidas em paralelo (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.recomecar: checkpoint.apagar(); checkpoint.estado = None
+    elif checkpoint.estado: print(f"↻ Continuando de {args.checkpoint}")
+    db, inicio = conectar_cli(), time.monotonic()
+    tenants, dias, ignoradas = consolidar(db, checkpoint, args.particoes, args.threads)
+    if args.parquet: destino = f"{args.parquet} ({gravar_parquet(args.parquet, tenants, dias)} linhas)"
+    else: destino = f"{COLECAO} ({gravar_firestore(db, tenants, dias)} documentos)"
+    checkpoint.apagar()
+    agendamentos = sum(v[0] for tipos in dias.values() for v in tipos.values())
+    entradas = sum(v[1] for tipos in dias.values() for v in tipos.values())
+    print(f"✅ {len(tenants)} lojas ({sum(a for _, a in tenants.values())} ativas), {agendamentos} agendamentos, "
+          f"R$ {entradas:,.2f} em entradas, {len(dias)} dias -> {destino} em {time.monotonic() - inicio:.0f} s")
+    if ignoradas: print(f"⚠️ {ignoradas} linhas sem dia, tipo ou valor ficaram de fora")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Referências por id em minha_agenda: `cliente_id` e `servico_id`.
+
+Agendamentos novos já gravam os ids junto com os nomes (mantidos para exibição). Os antigos,
+só com nomes, são vinculados com:
+    python referencias.py vincular [--email dono@negocio.com]
+
+Um nome só é vinculado se corresponder a um único cliente/serviço (sem acento e sem
+diferenciar maiúsculas); homônimos ficam sem id e são contados no relatório do comando.
+"""
+import argparse
+from collections import defaultdict
+from banco import conectar_cli, paginar
+from busca import normalizar
+
+VERSAO = 1          # gravada em usuarios/{email}.referencias_versao depois da vinculação
+LOTE = 500
+CAMPOS = (("cliente", "cliente_id", "meus_clientes"), ("servico", "servico_id", "meus_servicos"))
+
+def mapa_nomes(docs):
+    """Nome normalizado -> ids, a partir de documentos com "id" e "nome"."""
+    mapa = defaultdict(list)
+    for d in docs: mapa[normalizar(d.get("nome"))].append(d["id"])
+    return mapa
+
+def campos_faltantes(doc, mapas):
+    """Ids que faltam em `doc` e têm um único candidato. `mapas` = {campo_id: mapa_nomes(...)}.
+    Devolve (novos campos, campos ambíguos)."""
+    novos, ambiguos = {}, []
+    for campo, campo_id, _ in CAMPOS:
+        if doc.get(campo_id) or not doc.get(campo): continue
+        ids = mapas[campo_id].get(normalizar(doc[campo]), [])
+        if len(ids) == 1: novos[campo_id] = ids[0]
+        elif ids: ambiguos.append(campo)
+    return novos, ambiguos
+
+def vincular(db, email, lote=LOTE):
+    """Grava os ids que faltam nos agendamentos do tenant em batches. Idempotente.
+    Devolve (documentos atualizados, {campo: agendamentos com nome ambíguo})."""
+    user = db.collection("usuarios").document(email)
+    mapas = {campo_id: mapa_nomes({"id": d.id, **d.to_dict()} for pagina in paginar(user.collection(col), lote) for d in pagina)
+             for _, campo_id, col in CAMPOS}
+    alterados, ambiguos = 0, defaultdict(int)
+    for pagina in paginar(user.collection("minha_agenda"), lote):
+        batch, pendentes = db.batch(), 0
+        for d in pagina:
+            novos, duvidas = campos_faltantes(d.to_dict(), mapas)
+            for campo in duvidas: ambiguos[campo] += 1
+            if novos: batch.update(d.reference, novos); pendentes += 1
+        if pendentes: batch.commit(); alterados += pendentes
+    user.set({"referencias_versao": VERSAO}, merge=True)
+    return alterados, dict(ambiguos)
+
+def main():
+    parser = argparse.ArgumentParser(description="Vinculação de clientes e serviços por id na agenda do Vivv")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    vc = sub.add_parser("vincular", help="grava cliente_id/servico_id nos agendamentos antigos")
+    vc.add_argument("--email", help="apenas este tenant (padrão: todos)")
+    vc.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+
+    db = conectar_cli()
+    emails = [args.email] if args.email else [u.id for u in db.collection("usuarios").stream()]
+    for email in emails:
+        alterados, ambiguos = vincular(db, email, args.lote)
+        extra = ", ".join(f"{n} com {campo} ambíguo" for campo, n in ambiguos.items())
+        print(f"✅ {email}: {alterados} agendamentos vinculados" + (f" ({extra})" if extra else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Acesso a dados do Vivv atrás de uma interface única.
+
+    FirestoreRepositorio — produção, Firestore (cobrado por leitura)
+    SQLRepositorio       — SQLAlchemy (SQLite/Postgres), para unidades únicas sem cobrança por leitura
+                           (em repositorio_sql.py, importado só quando configurado)
+
+O backend vem da configuração (st.secrets ou ambiente):
+    VIVV_BACKEND = "firestore" (padrão) | "sql"
+    VIVV_DB_URL  = "sqlite:///vivv.db" | "postgresql+psycopg://..."   (só para "sql")
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from google.cloud.firestore import FieldFilter
+from banco import cliente_firestore, fuso_br, paginar
+import arquivamento
+import datas
+import horarios
+import resumos
+
+class Repositorio(ABC):
+    """Interface comum. Documentos são dicts; os listados trazem o id do documento em "id".
+    Um backend sem algum dos métodos falha já ao ser instanciado."""
+    @abstractmethod
+    def verificar(self, timeout=5):
+        """Confirma que o backend responde em até `timeout` segundos, sem escrever; levanta exceção se não."""
+
+    # ----- usuários -----
+    @abstractmethod
+    def buscar_usuario(self, email): ...
+    @abstractmethod
+    def salvar_usuario(self, email, dados): ...
+
+    # ----- subcoleções do tenant -----
+    @abstractmethod
+    def listar(self, email, col, desde=None):
+        """Documentos de `col`; com `desde`, só os de `timestamp` >= desde (sincronização incremental)."""
+    @abstractmethod
+    def paginar(self, email, col, tamanho=500):
+        """Documentos de `col` em páginas (listas), sem carregar a coleção inteira."""
+    @abstractmethod
+    def historico(self, email, col, filtros=(), tamanho=25, cursor=None):
+        """Uma página de `col` do `timestamp` mais recente ao mais antigo: (docs, cursor da próxima ou None).
+        `filtros` = ((campo, op, valor), ...): igualdade em campos do documento, intervalo em `timestamp`.
+        O cursor é opaco (depende do backend) e só serve para a chamada seguinte."""
+    @abstractmethod
+    def existe(self, email, col, doc_id): ...
+    @abstractmethod
+    def adicionar(self, email, col, dados): ...
+    @abstractmethod
+    def adicionar_lote(self, email, col, docs):
+        """Grava vários documentos (com "id" opcional) em lotes; devolve os ids na mesma ordem."""
+    @abstractmethod
+    def lancar_caixa(self, email, dados):
+        """Grava um lançamento do meu_caixa mantendo os agregados consistentes."""
+    @abstractmethod
+    def lancar_caixa_lote(self, email, lancamentos):
+        """`lancar_caixa` em lote; devolve os ids na mesma ordem."""
+
+    @abstractmethod
+    def agendar(self, email, dados, duracao):
+        """Grava um agendamento de `duracao` minutos em minha_agenda; `horarios.Conflito` se o
+        horário colide com outro do mesmo dia."""
+    @abstractmethod
+    def ocupacao(self, email, inicio, dias=14):
+        """Ocupação por dia no formato de horarios.py, de `inicio` até `dias` dias depois."""
+
+    # ----- consultas agregadas -----
+    @abstractmethod
+    def resumos_diarios(self, email, n=14):
+        """Últimos `n` dias com movimento no formato de resumos.py, do mais antigo ao mais recente."""
+    @abstractmethod
+    def resumos_periodo(self, email, inicio, fim):
+        """Dias com movimento entre as datas `inicio` e `fim` (exclusive), no formato de resumos.py, em ordem."""
+    @abstractmethod
+    def resumos_mensais(self, email): ...
+    @abstractmethod
+    def agenda_do_dia(self, email, dia): ...
+
+    # ----- auditoria -----
+    @abstractmethod
+    def log_auditoria(self, email, acao, detalhes=""): ...
+    @abstractmethod
+    def log_auditoria_lote(self, eventos):
+        """Grava de uma vez eventos {"id", "email", "acao", "detalhes", "timestamp"} (até 500)."""
+
+    # ----- telemetria -----
+    ESCRITAS = {}   # método -> documentos gravados por chamada, declarado por cada backend
+    LOTES = {"log_auditoria_lote": 0, "adicionar_lote": 2, "lancar_caixa_lote": 1}   # método -> posição da lista gravada
+
+    def escritas(self, metodo, *args):
+        """Documentos gravados por uma chamada bem-sucedida de `metodo(*args)`; None se o método só lê."""
+        if metodo in self.LOTES: return len(args[self.LOTES[metodo]])
+        return self.ESCRITAS.get(metodo)
+
+# ================= FIRESTORE =================
+class FirestoreRepositorio(Repositorio):
+    # agendar também grava a ocupação do dia; lancar_caixa, os resumos do dia e do mês
+    ESCRITAS = {"salvar_usuario": 1, "adicionar": 1, "agendar": 2, "lancar_caixa": 3, "log_auditoria": 1}
+
+    def __init__(self, db): self.db = db
+
+    def escritas(self, metodo, *args):
+        if metodo == "lancar_caixa_lote": return resumos.escritas_lote(args[1])   # com os resumos, como lancar_caixa
+        return super().escritas(metodo, *args)
+
+    def _tenant(self, email): return self.db.collection("usuarios").document(email)
+
+    def verificar(self, timeout=5):
+        """Uma leitura de documento (existente ou não), sem escrita e com prazo."""
+        self.db.collection("test").document("test").get(timeout=timeout)
+
+    def buscar_usuario(self, email):
+        doc = self._tenant(email).get()
+        return doc.to_dict() if doc.exists else None
+
+    def salvar_usuario(self, email, dados): self._tenant(email).set(dados)
+
+    # meu_caixa: os meses arquivados (arquivamento.py) entram nas leituras completas, no fim da
+    # exportação e intercalados por timestamp no histórico; a sincronização incremental só olha o que é novo
+    def listar(self, email, col, desde=None):
+        query = self._tenant(email).collection(col)
+        if desde is not None: query = query.where(filter=FieldFilter("timestamp", ">=", desde))
+        docs = [{"id": d.id, **d.to_dict()} for d in query.stream()]
+        if col == "meu_caixa" and desde is None: docs += arquivamento.lancamentos(self.db, email)
+        return docs
+
+    def paginar(self, email, col, tamanho=500):
+        for pagina in paginar(self._tenant(email).collection(col), tamanho):
+            yield [{"id": d.id, **d.to_dict()} for d in pagina]
+        if col == "meu_caixa": yield from arquivamento.paginas(self.db, email)
+
+    def historico(self, email, col, filtros=(), tamanho=25, cursor=None):
+        if col == "meu_caixa": return self._historico_caixa(email, filtros, tamanho, cursor)
+        pagina = self._pagina_historico(email, col, filtros, tamanho, cursor)
+        return [{"id": d.id, **d.to_dict()} for d in pagina], pagina[-1] if len(pagina) == tamanho else None
+
+    def _pagina_historico(self, email, col, filtros, tamanho, cursor):
+        q = self._tenant(email).collection(col)
+        for campo, op, valor in filtros: q = q.where(filter=FieldFilter(campo, op, valor))
+        q = q.order_by("timestamp", direction="DESCENDING").limit(tamanho)
+        if cursor is not None: q = q.start_after(cursor)
+        return list(q.stream())
+
+    def _historico_caixa(self, email, filtros, tamanho, cursor):
+        """meu_caixa e arquivo intercalados por timestamp: um lançamento retroativo continua no meu_caixa
+        com timestamp mais antigo que linhas já arquivadas. Cada linha da coleção só sai depois das do
+        arquivo que são mais recentes; as lidas e ainda não mostradas ficam no cursor, sem reler.
+        cursor = (snapshots lidos da coleção ainda não mostrados, último lido, coleção acabou,
+        cursor do arquivo, arquivo acabou)."""
+        pendentes, lido, vivo_acabou, arquivo, arquivo_acabou = cursor or ((), None, False, None, False)
+        pendentes, saida = list(pendentes), []
+        while len(saida) < tamanho:
+            if not pendentes and not vivo_acabou:
+                pendentes = self._pagina_historico(email, "meu_caixa", filtros, tamanho, lido)
+                vivo_acabou, lido = len(pendentes) < tamanho, pendentes[-1] if pendentes else lido
+            if not arquivo_acabou:
+                piso = pendentes[0].get("timestamp") if pendentes else None
+                extra, arquivo = arquivamento.historico(self.db, email, filtros, tamanho - len(saida), arquivo, desde=piso)
+                arquivo_acabou, saida = arquivo is None, saida + extra
+            if not pendentes or len(saida) == tamanho: break
+            d = pendentes.pop(0)
+            saida.append({"id": d.id, **d.to_dict()})
+        if vivo_acabou and not pendentes and arquivo_acabou: return saida, None
+        return saida, (tuple(pendentes), lido, vivo_acabou, arquivo, arquivo_acabou)
+
+    def existe(self, email, col, doc_id): return self._tenant(email).collection(col).document(doc_id).get().exists
+
+    def adicionar(self, email, col, dados):
+        _, ref = self._tenant(email).collection(col).add(dados)
+        return ref.id
+
+    def adicionar_lote(self, email, col, docs):
+        colecao, ids = self._tenant(email).collection(col), []
+        for i in range(0, len(docs), resumos.LOTE):
+            batch = self.db.batch()
+            for d in docs[i:i + resumos.LOTE]:
+                ref = colecao.document(d.get("id"))
+                batch.create(ref, {k: v for k, v in d.items() if k != "id"}); ids.append(ref.id)
+            batch.commit()
+        return ids
+
+    def lancar_caixa(self, email, dados): return resumos.lancar(self.db, email, dados)
+
+    def lancar_caixa_lote(self, email, lancamentos): return resumos.lancar_lote(self.db, email, lancamentos)
+
+    def agendar(self, email, dados, duracao): return horarios.agendar(self.db, email, dados, duracao)
+
+    def ocupacao(self, email, inicio, dias=14): return horarios.ocupacao(self.db, email, inicio, dias)
+
+    def resumos_diarios(self, email, n=14): return resumos.diarios(self.db, email, n)
+
+    def resumos_periodo(self, email, inicio, fim): return resumos.periodo(self.db, email, inicio, fim)
+
+    def resumos_mensais(self, email): return resumos.mensais(self.db, email)
+
+    def agenda_do_dia(self, email, dia):
+        q = (self._tenant(email).collection("minha_agenda")
+             .where(filter=FieldFilter("dia", "==", datas.dia(dia))).order_by("inicio"))
+        return [{"id": d.id, **d.to_dict()} for d in q.stream()]
+
+    def log_auditoria(self, email, acao, detalhes=""):
+        self.db.collection("logs_auditoria").add({"email": email, "acao": acao, "detalhes": detalhes, "timestamp": datetime.now(fuso_br)})
+
+    def log_auditoria_lote(self, eventos):
+        logs, batch = self.db.collection("logs_auditoria"), self.db.batch()
+        for e in eventos: batch.set(logs.document(e["id"]), {k: v for k, v in e.items() if k != "id"})
+        batch.commit()
+
+# ================= CONFIGURAÇÃO =================
+def criar_repositorio(config):
+    """Repositório a partir de um mapeamento de configuração (st.secrets, os.environ...)."""
+    if config.get("VIVV_BACKEND", "firestore") == "sql":
+        from repositorio_sql import SQLRepositorio
+        return SQLRepositorio(config.get("VIVV_DB_URL", "sqlite:///vivv.db"))
+    if "FIREBASE_DETAILS" not in config: return None
+    return FirestoreRepositorio(cliente_firestore(config["FIREBASE_DETAILS"]))
@@ -0,0 +1,231 @@
+"""Repositório SQLAlchemy (SQLite/Postgres) — ver `repositorio.criar_repositorio`.
+
+Fica num módulo à parte para que o deploy com Firestore não pague o import do SQLAlchemy.
+"""
+import json
+import operator
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import (JSON, Boolean, Column, Date, DateTime, Float, Index, MetaData, String, Table, Text,
+                        and_, create_engine, func, insert, or_, select, update)
+from sqlalchemy.dialects import postgresql, sqlite
+from banco import fuso_br, json_objeto, json_padrao
+from repositorio import Repositorio
+import datas
+import horarios
+import resumos
+
+meta = MetaData()
+
+usuarios = Table(
+    "usuarios", meta,
+    Column("email", String(254), primary_key=True),
+    Column("ativo", Boolean, nullable=False, default=False, index=True),
+    Column("dados", JSON, nullable=False),
+)
+
+# Uma tabela para as subcoleções, espelhando o documento em `dados` e projetando em colunas
+# indexadas só os campos usados em filtros e agregações.
+documentos = Table(
+    "documentos", meta,
+    Column("tenant", String(254), primary_key=True),
+    Column("colecao", String(32), primary_key=True),
+    Column("id", String(40), primary_key=True),
+    Column("timestamp", DateTime),          # UTC sem fuso
+    Column("dia", Date),                    # dia em Brasília
+    Column("mes", String(7)),               # 'AAAA-MM'
+    Column("inicio", DateTime),             # UTC sem fuso (agenda)
+    Column("tipo", String(16)),
+    Column("categoria", String(64)),
+    Column("valor", Float),                 # valor do caixa ou preço da agenda
+    Column("dados", JSON, nullable=False),
+    Index("ix_documentos_tempo", "tenant", "colecao", "timestamp"),
+    Index("ix_documentos_dia", "tenant", "colecao", "dia", "inicio"),
+    Index("ix_documentos_tipo_dia", "tenant", "colecao", "tipo", "dia"),
+    Index("ix_documentos_mes", "tenant", "colecao", "mes", "tipo"),
+)
+
+logs_auditoria = Table(
+    "logs_auditoria", meta,
+    Column("id", String(40), primary_key=True),   # o "id" do evento (auditoria.FilaAuditoria)
+    Column("email", String(254), index=True),
+    Column("acao", String(64), nullable=False),
+    Column("detalhes", Text),
+    Column("timestamp", DateTime, nullable=False, index=True),
+)
+
+_COMPARAR = {"==": operator.eq, "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+def _utc(valor):
+    if not isinstance(valor, datetime): return None
+    return (valor if valor.tzinfo else valor.replace(tzinfo=fuso_br)).astimezone(timezone.utc).replace(tzinfo=None)
+
+def _inserir_novos(conn, tabela, linhas):
+    """INSERT que ignora as linhas cuja chave primária já existe (SQLite e Postgres)."""
+    dialeto = {"sqlite": sqlite, "postgresql": postgresql}[conn.dialect.name]
+    conn.execute(dialeto.insert(tabela).on_conflict_do_nothing(), linhas)
+
+def _projecoes(dados):
+    d, valor = datas.dia_de(dados), dados.get("valor", dados.get("preco"))
+    return {
+        "timestamp": _utc(dados.get("timestamp")), "dia": d.date() if d else None, "mes": d.strftime('%Y-%m') if d else None,
+        "inicio": _utc(dados.get("inicio")), "tipo": dados.get("tipo"), "categoria": dados.get("categoria"),
+        "valor": float(valor) if isinstance(valor, (int, float)) else None,
+    }
+
+class SQLRepositorio(Repositorio):
+    ESCRITAS = {"salvar_usuario": 1, "adicionar": 1, "agendar": 1, "lancar_caixa": 1, "log_auditoria": 1}   # sem ocupação nem resumos
+
+    def __init__(self, url="sqlite:///vivv.db"):
+        self.engine = create_engine(url, json_serializer=lambda o: json.dumps(o, default=json_padrao, ensure_ascii=False),
+                                    json_deserializer=lambda s: json.loads(s, object_hook=json_objeto))
+        meta.create_all(self.engine)
+
+    def verificar(self, timeout=5):
+        with self.engine.connect() as conn: conn.execute(select(1))
+
+    def buscar_usuario(self, email):
+        with self.engine.connect() as conn:
+            return conn.execute(select(usuarios.c.dados).where(usuarios.c.email == email)).scalar()
+
+    def salvar_usuario(self, email, dados):
+        with self.engine.begin() as conn:
+            conn.execute(usuarios.delete().where(usuarios.c.email == email))
+            conn.execute(insert(usuarios).values(email=email, ativo=bool(dados.get("ativo")), dados=dados))
+
+    def listar(self, email, col, desde=None):
+        q = select(documentos.c.id, documentos.c.dados).where(documentos.c.tenant == email, documentos.c.colecao == col)
+        if desde is not None: q = q.where(documentos.c.timestamp >= _utc(desde))
+        with self.engine.connect() as conn:
+            return [{"id": doc_id, **dados} for doc_id, dados in conn.execute(q)]
+
+    def paginar(self, email, col, tamanho=500):
+        d, ultimo = documentos.c, ""
+        while True:
+            q = (select(d.id, d.dados).where(d.tenant == email, d.colecao == col, d.id > ultimo)
+                 .order_by(d.id).limit(tamanho))
+            with self.engine.connect() as conn: pagina = [{"id": doc_id, **dados} for doc_id, dados in conn.execute(q)]
+            if pagina: yield pagina
+            if len(pagina) < tamanho: return
+            ultimo = pagina[-1]["id"]
+
+    def historico(self, email, col, filtros=(), tamanho=25, cursor=None):
+        d = documentos.c
+        q = (select(d.id, d.timestamp, d.dados).where(d.tenant == email, d.colecao == col, d.timestamp.is_not(None))
+             .order_by(d.timestamp.desc(), d.id.desc()).limit(tamanho))
+        for campo, op, valor in filtros:
+            # campos projetados usam os índices; os demais (status da agenda) saem do JSON
+            coluna = d[campo] if campo in d else d.dados[campo].as_string()
+            q = q.where(_COMPARAR[op](coluna, _utc(valor) if isinstance(valor, datetime) else valor))
+        if cursor is not None: q = q.where(or_(d.timestamp < cursor[0], and_(d.timestamp == cursor[0], d.id < cursor[1])))
+        with self.engine.connect() as conn: linhas = conn.execute(q).all()
+        proximo = (linhas[-1][1], linhas[-1][0]) if len(linhas) == tamanho else None
+        return [{"id": doc_id, **dados} for doc_id, _, dados in linhas], proximo
+
+    def existe(self, email, col, doc_id):
+        d = documentos.c
+        with self.engine.connect() as conn:
+            return conn.execute(select(d.id).where(d.tenant == email, d.colecao == col, d.id == doc_id)).first() is not None
+
+    def adicionar(self, email, col, dados):
+        doc_id = uuid.uuid4().hex[:20]
+        with self.engine.begin() as conn:
+            conn.execute(insert(documentos).values(tenant=email, colecao=col, id=doc_id, dados=dados, **_projecoes(dados)))
+        return doc_id
+
+    def adicionar_lote(self, email, col, docs):
+        linhas = self._linhas(email, col, docs)
+        if linhas:
+            with self.engine.begin() as conn: conn.execute(insert(documentos), linhas)
+        return [l["id"] for l in linhas]
+
+    def _linhas(self, email, col, docs):
+        return [{"tenant": email, "colecao": col, "id": d.get("id") or uuid.uuid4().hex[:20],
+                 "dados": {k: v for k, v in d.items() if k != "id"}, **_projecoes(d)} for d in docs]
+
+    def lancar_caixa(self, email, dados):
+        if dados.get("tipo") not in resumos.TIPOS: raise ValueError(f"Tipo inválido: {dados.get('tipo')}")
+        return self.adicionar(email, "meu_caixa", dados)   # os agregados saem de GROUP BY, nada a manter
+
+    def lancar_caixa_lote(self, email, lancamentos):
+        invalido = next((l for l in lancamentos if l.get("tipo") not in resumos.TIPOS), None)
+        if invalido: raise ValueError(f"Tipo inválido: {invalido.get('tipo')}")
+        # Como no Firestore, um id que já existe (importação reenviada) é pulado sem derrubar o lote
+        linhas = self._linhas(email, "meu_caixa", lancamentos)
+        if linhas:
+            with self.engine.begin() as conn: _inserir_novos(conn, documentos, linhas)
+        return [l["id"] for l in linhas]
+
+    def _ocupacao(self, conn, email, inicio, fim):
+        """Ocupação por dia calculada direto da agenda (não há documento de ocupação no SQL)."""
+        d = documentos.c
+        servicos = conn.execute(select(d.dados).where(d.tenant == email, d.colecao == "meus_servicos")).scalars()
+        q = select(d.id, d.dados).where(d.tenant == email, d.colecao == "minha_agenda", d.dia >= inicio, d.dia < fim)
+        return horarios.agrupar(({"id": doc_id, **dados} for doc_id, dados in conn.execute(q)),
+                                {s.get("nome"): horarios.duracao(s) for s in servicos})
+
+    def agendar(self, email, dados, duracao):
+        doc_id, dia = uuid.uuid4().hex[:20], datas.dia(dados["inicio"]).date()
+        inicio = horarios.minutos(dados["inicio"])
+        with self.engine.begin() as conn:
+            # UPDATE sem efeito só para travar: linha do tenant no Postgres, banco inteiro no SQLite.
+            # Dois agendamentos do mesmo tenant não leem a agenda ao mesmo tempo.
+            conn.execute(update(usuarios).where(usuarios.c.email == email).values(email=usuarios.c.email))
+            dias = self._ocupacao(conn, email, dia, dia + timedelta(days=1))
+            colide = horarios.conflito(dias.get(horarios.chave(dia), []), inicio, inicio + duracao)
+            if colide: raise horarios.Conflito(colide)
+            novo = {**dados, "duracao": duracao, "fim": dados["inicio"] + timedelta(minutes=duracao)}
+            conn.execute(insert(documentos).values(tenant=email, colecao="minha_agenda", id=doc_id, dados=novo, **_projecoes(novo)))
+        return doc_id
+
+    def ocupacao(self, email, inicio, dias=14):
+        dia = datas.dia(inicio).date()
+        with self.engine.connect() as conn: por_dia = self._ocupacao(conn, email, dia, dia + timedelta(days=dias))
+        return [{"dia": k, "intervalos": v} for k, v in sorted(por_dia.items())]
+
+    def _resumos(self, email, coluna, chave, filtro=None):
+        d = documentos.c
+        q = (select(coluna, d.tipo, d.categoria, func.sum(d.valor), func.count())
+             .where(d.tenant == email, d.colecao == "meu_caixa", d.tipo.in_(resumos.TIPOS), coluna.is_not(None))
+             .group_by(coluna, d.tipo, d.categoria))
+        if filtro is not None: q = q.where(filtro)
+        saida = {}
+        with self.engine.connect() as conn:
+            for k, tipo, cat, total, qtd in conn.execute(q):
+                k = k.isoformat() if isinstance(k, date) else k
+                r = saida.setdefault(k, {chave: k, **{t: {"total": 0.0, "qtd": 0} for t in resumos.TIPOS}, "categorias": {}})
+                r[tipo]["total"] += total or 0; r[tipo]["qtd"] += qtd
+                r["categorias"].setdefault(cat or "Outros", {})[tipo] = {"total": total or 0, "qtd": qtd}
+        return [saida[k] for k in sorted(saida)]
+
+    def resumos_diarios(self, email, n=14):
+        d = documentos.c
+        ultimos = (select(d.dia).distinct()
+                   .where(d.tenant == email, d.colecao == "meu_caixa", d.tipo.in_(resumos.TIPOS), d.dia.is_not(None))
+                   .order_by(d.dia.desc()).limit(n))
+        return self._resumos(email, d.dia, "dia", d.dia.in_(ultimos))
+
+    def resumos_periodo(self, email, inicio, fim):
+        d = documentos.c
+        return self._resumos(email, d.dia, "dia", and_(d.dia >= inicio, d.dia < fim))
+
+    def resumos_mensais(self, email): return self._resumos(email, documentos.c.mes, "mes")
+
+    def agenda_do_dia(self, email, dia):
+        d = documentos.c
+        q = (select(d.id, d.dados).where(d.tenant == email, d.colecao == "minha_agenda", d.dia == datas.dia(dia).date())
+             .order_by(d.inicio))
+        with self.engine.connect() as conn:
+            return [{"id": doc_id, **dados} for doc_id, dados in conn.execute(q)]
+
+    def log_auditoria(self, email, acao, detalhes=""):
+        with self.engine.begin() as conn:
+            conn.execute(insert(logs_auditoria).values(id=uuid.uuid4().hex[:20], email=email, acao=acao, detalhes=detalhes,
+                                                       timestamp=_utc(datetime.now(fuso_br))))
+
+    def log_auditoria_lote(self, eventos):
+        # O id do evento é a chave: regravar um lote após falha parcial não duplica (como o batch.set do Firestore)
+        linhas = [{"id": e["id"], "email": e.get("email"), "acao": e["acao"], "detalhes": e.get("detalhes", ""),
+                   "timestamp": _utc(e["timestamp"])} for e in eventos]
+        if linhas:
+            with self.engine.begin() as conn: _inserir_novos(conn, logs_auditoria, linhas)
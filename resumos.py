@@ -0,0 +1,167 @@
+"""Resumos financeiros do meu_caixa, atualizados a cada lançamento.
+
+    usuarios/{email}/resumo_diario/{AAAA-MM-DD}
+    usuarios/{email}/resumo_mensal/{AAAA-MM}
+
+Cada resumo guarda os totais por tipo e por categoria:
+    {"dia": "2026-10-18", "Entrada": {"total": 350.0, "qtd": 4}, "Saída": {...},
+     "categorias": {"Serviço": {"Entrada": {"total": ..., "qtd": ...}}, ...}}
+
+Tenants antigos precisam do backfill antes de o dashboard ler os resumos:
+    python resumos.py backfill [--email dono@negocio.com]
+"""
+import argparse
+from datetime import datetime
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
+from google.cloud.firestore import FieldFilter
+from agregados import TIPOS, agregar, chaves
+from banco import conectar_cli, fuso_br
+import arquivamento
+import datas
+
+VERSAO = 1          # gravada em usuarios/{email}.resumos_versao quando os resumos estão completos
+LOTE = 500          # limite de escritas por batch do Firestore
+
+# ================= ESCRITA =================
+def _incrementos(lanc):
+    tipo, valor = lanc.get("tipo"), float(lanc.get("valor", 0) or 0)
+    par = {"total": firestore.Increment(valor), "qtd": firestore.Increment(1)}
+    return {tipo: par, "categorias": {lanc.get("categoria") or "Outros": {tipo: dict(par)}}}
+
+def lancar(db, email, dados):
+    """Grava o lançamento e soma nos resumos do dia e do mês numa única escrita atômica.
+
+    Os `Increment` dispensam leitura prévia, então um batch basta: ou as três escritas
+    entram juntas ou nenhuma entra. `create` garante que o lançamento é novo.
+    """
+    if dados.get("tipo") not in TIPOS: raise ValueError(f"Tipo inválido: {dados.get('tipo')}")
+    user = db.collection("usuarios").document(email)
+    ref = user.collection("meu_caixa").document()
+    dia, mes = chaves(datas.dia_de(dados))
+    inc, agora = _incrementos(dados), datetime.now(fuso_br)
+    batch = db.batch()
+    batch.create(ref, dados)
+    batch.set(user.collection("resumo_diario").document(dia), {"dia": dia, "atualizado_em": agora, **inc}, merge=True)
+    batch.set(user.collection("resumo_mensal").document(mes), {"mes": mes, "atualizado_em": agora, **inc}, merge=True)
+    batch.commit()
+    return ref.id
+
+def _como_incrementos(r):
+    """Resumo no formato de `agregar` -> os mesmos campos como `Increment`, para somar no documento."""
+    def inc(par): return {"total": firestore.Increment(par["total"]), "qtd": firestore.Increment(par["qtd"])}
+    campos = {t: inc(r[t]) for t in TIPOS if r[t]["qtd"]}
+    campos["categorias"] = {cat: {t: inc(par) for t, par in tipos.items()} for cat, tipos in r["categorias"].items()}
+    return campos
+
+def _grupos(lancamentos):
+    """Divide os lançamentos em (grupo, dias, meses) que cabem num batch junto com os seus resumos."""
+    grupo, dias, meses = [], set(), set()
+    for lanc in lancamentos:
+        if lanc.get("tipo") not in TIPOS: raise ValueError(f"Tipo inválido: {lanc.get('tipo')}")
+        dia, mes = chaves(datas.dia_de(lanc))
+        if len(grupo) + len(dias) + len(meses) + 1 + (dia not in dias) + (mes not in meses) > LOTE:
+            yield grupo, dias, meses
+            grupo, dias, meses = [], set(), set()
+        grupo.append(lanc); dias.add(dia); meses.add(mes)
+    if grupo: yield grupo, dias, meses
+
+def escritas_lote(lancamentos):
+    """Documentos gravados por `lancar_lote`: lançamentos e resumos de cada batch (3 para um só,
+    como em `lancar`)."""
+    return sum(len(grupo) + len(dias) + len(meses) for grupo, dias, meses in _grupos(lancamentos))
+
+def lancar_lote(db, email, lancamentos):
+    """`lancar` para muitos lançamentos (cada um com "id" opcional), em batches de até LOTE escritas.
+
+    Cada batch cria os seus lançamentos e soma de uma vez os incrementos de cada dia e mês que
+    eles tocam, então continua atômico: lançamentos e resumos de um batch entram juntos. Um id
+    que já existe no banco (importação reenviada com o cache desatualizado, outra sessão) não
+    derruba o batch: ele é refeito sem esses lançamentos, que já foram somados quando entraram.
+    Devolve os ids de todos, na mesma ordem.
+    """
+    user, ids = db.collection("usuarios").document(email), []
+    for grupo, _, _ in _grupos(lancamentos):
+        refs = [user.collection("meu_caixa").document(lanc.get("id")) for lanc in grupo]
+        ids += [ref.id for ref in refs]
+        while grupo:
+            try: _criar(db, user, grupo, refs); break
+            except AlreadyExists:
+                gravados = {s.id for s in db.get_all([ref for lanc, ref in zip(grupo, refs) if lanc.get("id")]) if s.exists}
+                if not gravados: raise
+                restantes = [(lanc, ref) for lanc, ref in zip(grupo, refs) if ref.id not in gravados]
+                grupo, refs = [lanc for lanc, _ in restantes], [ref for _, ref in restantes]
+    return ids
+
+def _criar(db, user, grupo, refs):
+    por_dia, por_mes = agregar(grupo)
+    agora, batch = datetime.now(fuso_br), db.batch()
+    for lanc, ref in zip(grupo, refs): batch.create(ref, {k: v for k, v in lanc.items() if k != "id"})
+    for k, r in por_dia.items():
+        batch.set(user.collection("resumo_diario").document(k), {"dia": k, "atualizado_em": agora, **_como_incrementos(r)}, merge=True)
+    for k, r in por_mes.items():
+        batch.set(user.collection("resumo_mensal").document(k), {"mes": k, "atualizado_em": agora, **_como_incrementos(r)}, merge=True)
+    batch.commit()
+
+# ================= LEITURA =================
+def diarios(db, email, n=14):
+    """Últimos `n` dias com movimento, do mais antigo para o mais recente."""
+    q = (db.collection("usuarios").document(email).collection("resumo_diario")
+         .order_by("dia", direction=firestore.Query.DESCENDING).limit(n))
+    return sorted((d.to_dict() for d in q.stream()), key=lambda r: r["dia"])
+
+def periodo(db, email, inicio, fim):
+    """Dias com movimento entre as datas `inicio` (inclusive) e `fim` (exclusive), em ordem:
+    uma consulta por intervalo na chave `dia`, sem varrer o caixa."""
+    q = (db.collection("usuarios").document(email).collection("resumo_diario")
+         .where(filter=FieldFilter("dia", ">=", inicio.isoformat())).where(filter=FieldFilter("dia", "<", fim.isoformat()))
+         .order_by("dia"))
+    return [d.to_dict() for d in q.stream()]
+
+def mensais(db, email):
+    return [d.to_dict() for d in db.collection("usuarios").document(email).collection("resumo_mensal").stream()]
+
+def total(resumo, tipo): return (resumo.get(tipo) or {}).get("total", 0)
+
+def totais(resumos):
+    """(faturamento, despesas) somando uma lista de resumos."""
+    return sum(total(r, "Entrada") for r in resumos), sum(total(r, "Saída") for r in resumos)
+
+def serie(diarios):
+    """[(dia, entradas, saídas)] pronto para o gráfico."""
+    return [(r["dia"], total(r, "Entrada"), total(r, "Saída")) for r in diarios]
+
+# ================= BACKFILL =================
+def backfill(db, email):
+    """Reconstrói os resumos de um tenant a partir do meu_caixa e dos meses arquivados.
+
+    Sobrescreve os documentos de resumo, então rode fora do horário de pico: um lançamento
+    feito durante o backfill pode ficar de fora até a próxima execução.
+    """
+    user = db.collection("usuarios").document(email)
+    dias, meses = agregar([d.to_dict() for d in user.collection("meu_caixa").stream()] + arquivamento.lancamentos(db, email))
+    agora, batch, pendentes = datetime.now(fuso_br), db.batch(), 0
+    docs = [(user.collection("resumo_diario").document(k), {"dia": k, **r}) for k, r in dias.items()]
+    docs += [(user.collection("resumo_mensal").document(k), {"mes": k, **r}) for k, r in meses.items()]
+    for ref, r in docs:
+        batch.set(ref, {**r, "categorias": dict(r["categorias"]), "atualizado_em": agora}); pendentes += 1
+        if pendentes == LOTE: batch.commit(); batch, pendentes = db.batch(), 0
+    batch.set(user, {"resumos_versao": VERSAO}, merge=True)
+    batch.commit()
+    return len(dias), len(meses)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumos financeiros do Vivv")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    bf = sub.add_parser("backfill", help="reconstrói os resumos a partir do meu_caixa")
+    bf.add_argument("--email", help="apenas este tenant (padrão: todos)")
+    args = parser.parse_args()
+
+    db = conectar_cli()
+    emails = [args.email] if args.email else [u.id for u in db.collection("usuarios").stream()]
+    for email in emails:
+        n_dias, n_meses = backfill(db, email)
+        print(f"✅ {email}: {n_dias} dias, {n_meses} meses")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Hash de senha e validação de cadastro, compartilhados pelo app e pela importação."""
+import hashlib
+import re
+
+class Security:
+    SALT = "vivv_secure_2026_elite"
+    
+    @staticmethod
+    def hash_senha(senha): return hashlib.sha256((Security.SALT + senha).encode()).hexdigest()
+    @staticmethod
+    def email_valido(email): return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email))
+    @staticmethod
+    def telefone_valido(tel): return len(''.join(filter(str.isdigit, tel))) in [10, 11]
@@ -0,0 +1,76 @@
+"""Sessão persistente: token assinado em cookie e cache dos perfis de usuário.
+
+No login o app grava no navegador o cookie COOKIE com `email.expira.assinatura.vinculo`, dois
+HMAC-SHA256 com o segredo VIVV_SESSAO_SEGREDO: a assinatura cobre email e expiração, o vínculo
+cobre também o hash da senha. Num refresh ou numa aba nova o token chega em `st.context.cookies`;
+`ler` confere a assinatura só com o segredo, antes de buscar o perfil (um cookie forjado não custa
+leitura no banco), e `conferir` confere o vínculo com a senha do perfil. Com os dois válidos a
+sessão volta sem formulário, sem conferir senha e sem log de LOGIN. Trocar a senha invalida os
+tokens já emitidos; sair apaga o cookie. Sem o segredo não há sessão persistente.
+
+`Perfis` guarda o documento de cada usuário por email, com TTL, para todas as sessões do processo,
+até MAX_PERFIS usuários (os usados há mais tempo saem primeiro).
+"""
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+COOKIE = "vivv_sessao"
+DURACAO = 7 * 24 * 3600    # validade do token, em segundos
+TTL_PERFIL = 300           # segundos até reler o documento do usuário (ativação feita fora do app)
+MAX_PERFIS = 1000          # perfis guardados por processo
+
+def _b64(dados): return base64.urlsafe_b64encode(dados).rstrip(b"=").decode()
+
+def _hmac(segredo, *campos):
+    return _b64(hmac.new(segredo.encode(), "\n".join(map(str, campos)).encode(), hashlib.sha256).digest())
+
+def emitir(segredo, email, senha, duracao=DURACAO):
+    """Token para o cookie; `senha` é o hash guardado no documento do usuário."""
+    expira = int(time.time() + duracao)
+    return f"{_b64(email.encode())}.{expira}.{_hmac(segredo, email, expira)}.{_hmac(segredo, email, expira, senha)}"
+
+def _partes(token):
+    try:
+        email, expira, assinatura, vinculo = token.split(".")
+        return base64.urlsafe_b64decode(email + "=" * (-len(email) % 4)).decode(), int(expira), assinatura, vinculo
+    except (AttributeError, ValueError): return None
+
+def ler(segredo, token):
+    """Email de um token assinado com este segredo e dentro do prazo; None se não. Não depende do
+    perfil: o vínculo com a senha é checado depois, em `conferir`."""
+    partes = _partes(token)
+    if not partes or partes[1] <= time.time(): return None
+    email, expira, assinatura, _ = partes
+    return email if hmac.compare_digest(assinatura, _hmac(segredo, email, expira)) else None
+
+def conferir(segredo, token, senha):
+    """O token foi emitido com este segredo para este usuário e esta senha, e não venceu."""
+    if ler(segredo, token) is None: return False
+    email, expira, _, vinculo = _partes(token)
+    return hmac.compare_digest(vinculo, _hmac(segredo, email, expira, senha))
+
+class Perfis:
+    """Documento do usuário por email. `obter` relê depois de `ttl` segundos; `atualizar` troca na
+    hora o que acabou de ser lido (login, verificação de pagamento), então uma mudança de `ativo`
+    vista pelo app vale para todas as sessões do processo. Guarda até `maximo` usuários."""
+    def __init__(self, ttl=TTL_PERFIL, maximo=MAX_PERFIS):
+        self.ttl, self.maximo, self._itens, self._lock = ttl, maximo, OrderedDict(), threading.Lock()
+
+    def obter(self, email, buscar):
+        with self._lock:
+            item = self._itens.get(email)
+            if item: self._itens.move_to_end(email)
+        if item and time.monotonic() - item[0] < self.ttl: return item[1]
+        perfil = buscar(email)
+        if perfil is not None: self.atualizar(email, perfil)
+        return perfil
+
+    def atualizar(self, email, perfil):
+        with self._lock:
+            self._itens[email] = (time.monotonic(), perfil)
+            self._itens.move_to_end(email)
+            while len(self._itens) > self.maximo: self._itens.popitem(last=False)
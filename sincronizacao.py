@@ -0,0 +1,326 @@
+"""Cache por tenant das subcoleções, com sincronização incremental.
+
+Cada subcoleção vira um `Snapshot` mantido em memória pelo processo e compartilhado entre as
+sessões: a primeira carga lê tudo, as seguintes só o que mudou desde a marca d'água em
+`timestamp`. Clientes, agenda e caixa ficam em colunas NumPy (`colunar.Tabela`, com o mapa id ->
+linha); serviços, que são poucos, viram um `Catalogo` (lista de dicts indexada por id e por nome);
+clientes têm também o índice de busca (`busca.Indice`), mantido junto com a tabela. Resultados pequenos e recalculados por inteiro (resumos,
+agenda do dia) são `Fatia`s. O histórico paginado não passa pelos snapshots: cada página é uma consulta por
+cursor, guardada em `Paginas` (LRU por tenant e coleção, com os cursores à parte) junto com a seguinte, buscada em segundo plano.
+Os resumos por período do dashboard ficam em `Periodos`: os encerrados com TTL_FECHADO, o aberto com TTL_CACHE.
+"""
+import contextvars
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+import numpy as np
+from banco import fuso_br
+import busca
+import colunar
+import datas
+import horarios
+
+COLECOES = ["meus_clientes", "meus_servicos", "minha_agenda", "meu_caixa"]
+MARGEM_SYNC = timedelta(minutes=2)     # tolera relógios desalinhados entre instâncias
+RESYNC_COMPLETO = timedelta(hours=6)   # releitura total periódica (edições/remoções feitas fora do app)
+TTL_CACHE = timedelta(seconds=60)
+TTL_FECHADO = timedelta(minutes=30)    # períodos encerrados: só lançamentos retroativos de outra instância os mudam
+MAX_CARGAS = 16                        # threads compartilhadas por todas as sessões do processo
+TIMEOUT_CARGA = 30
+PAGINA_HISTORICO = 25
+MAX_PAGINAS = 64                       # páginas guardadas por tenant e coleção do histórico
+MAX_CURSORES = 1024                    # cursores de página guardados por tenant e coleção do histórico
+MAX_PERIODOS = 48                      # períodos do dashboard guardados por tenant
+DERIVADOS = {"minha_agenda": ("agenda_hoje", "ocupacao", "historico_minha_agenda"), "meu_caixa": ("resumos", "periodos", "historico_meu_caixa"),
+             "meus_clientes": ("historico_meus_clientes",)}   # caches recalculados a partir da coleção
+
+class Snapshot:
+    """Cópia local de uma subcoleção + marca d'água no campo `timestamp`."""
+    def __init__(self):
+        self.docs, self.marca, self.completo_em, self.lido_em = {}, None, None, None
+        self.lock = threading.Lock()
+
+    def invalidar(self): self.lido_em = None
+
+    def registrar(self, doc_id, dados): self.registrar_lote([{"id": doc_id, **dados}])
+
+    def registrar_lote(self, docs):
+        """Replica documentos recém-gravados (com "id") sem reler a coleção."""
+        docs = list(docs)
+        with self.lock: self._inserir(docs)   # sob o lock: uma ressincronização completa não apaga a réplica
+
+    def _inserir(self, docs): self.docs.update((d["id"], d) for d in docs)
+
+    def atual(self): return list(self.docs.values())
+
+    def _guardar(self, novos, completo):
+        if completo: self.docs = novos
+        else: self.docs.update(novos)
+
+    def obter(self, listar):
+        """`listar(desde)` devolve os documentos com timestamp >= desde (todos se None)."""
+        with self.lock:
+            agora = datetime.now(fuso_br)
+            if self.lido_em and agora - self.lido_em < TTL_CACHE: return self.atual()
+            completo = self.completo_em is None or agora - self.completo_em > RESYNC_COMPLETO
+            novos = {d["id"]: d for d in listar(None if completo else self.marca - MARGEM_SYNC)}
+            self._guardar(novos, completo)
+            if completo: self.completo_em = agora
+            marcas = [d["timestamp"] for d in novos.values() if isinstance(d.get("timestamp"), datetime)]
+            if completo: self.marca = max(marcas, default=agora)
+            elif marcas: self.marca = max(self.marca, *marcas)
+            self.lido_em = agora
+            return self.atual()
+
+class SnapshotColunar(Snapshot):
+    """Snapshot guardado como `colunar.Tabela`: `obter`/`atual` devolvem a tabela, não dicts."""
+    def __init__(self, col):
+        super().__init__()
+        self.esquema = colunar.ESQUEMAS[col]
+        self.tabela = colunar.Tabela(self.esquema)
+
+    def _inserir(self, docs): self.tabela.inserir(docs)
+
+    def atual(self): return self.tabela
+
+    def _guardar(self, novos, completo):
+        if completo:
+            tabela = colunar.Tabela(self.esquema, capacidade=max(256, len(novos)))
+            tabela.inserir(novos.values())
+            self.tabela = tabela
+        else: self.tabela.inserir(novos.values())
+
+class Catalogo(list):
+    """Documentos em lista, com `por_id` (id -> doc) e `por_nome` (nome normalizado -> [docs])."""
+    def __init__(self, docs=()):
+        super().__init__(docs)
+        self.por_id, self.por_nome = {d["id"]: d for d in self}, {}
+        for d in self: self.por_nome.setdefault(busca.normalizar(d.get("nome")), []).append(d)
+
+class SnapshotServicos(Snapshot):
+    """meus_servicos como `Catalogo`, refeito só quando a coleção muda."""
+    def __init__(self):
+        super().__init__()
+        self.catalogo = Catalogo()
+
+    def _inserir(self, docs):
+        super()._inserir(docs); self.catalogo = Catalogo(self.docs.values())
+
+    def atual(self): return self.catalogo
+
+    def _guardar(self, novos, completo):
+        super()._guardar(novos, completo)
+        if completo or novos: self.catalogo = Catalogo(self.docs.values())
+
+class SnapshotClientes(SnapshotColunar):
+    """meus_clientes: a tabela e o índice de prefixo de nome/telefone, atualizados juntos."""
+    def __init__(self):
+        super().__init__("meus_clientes")
+        self.indice = busca.Indice()
+
+    def _inserir(self, docs):
+        super()._inserir(docs); self.indice.atualizar(docs)
+
+    def _guardar(self, novos, completo):
+        super()._guardar(novos, completo)
+        if not completo: return self.indice.atualizar(novos.values())
+        indice = busca.Indice(); indice.atualizar(novos.values())
+        self.indice = indice   # troca pronta: buscas concorrentes nunca veem um índice pela metade
+
+class Fatia:
+    """Resultado pequeno recalculado por inteiro (ex.: resumos), com TTL e invalidação explícita."""
+    def __init__(self): self.valor, self.lido_em, self.lock = None, None, threading.Lock()
+
+    def invalidar(self): self.lido_em = None
+
+    def obter(self, carregar):
+        with self.lock:
+            agora = datetime.now(fuso_br)
+            if self.lido_em is None or agora - self.lido_em >= TTL_CACHE: self.valor, self.lido_em = carregar(), agora
+            return self.valor
+
+class Paginas:
+    """Páginas do histórico de uma coleção: LRU de (filtros, tamanho, número) -> Future de (docs, cursor).
+    Os docs seguem o TTL; o cursor que abre cada página fica guardado à parte, sem prazo até a próxima
+    gravação na coleção, então reler uma página vencida é uma consulta só, sem refazer as anteriores."""
+    def __init__(self, maximo=MAX_PAGINAS):
+        self._lru, self._cursores, self.maximo, self.lock = OrderedDict(), OrderedDict(), maximo, threading.Lock()
+
+    def invalidar(self):
+        with self.lock: self._lru, self._cursores = OrderedDict(), OrderedDict()   # buscas em andamento gravam nos antigos
+
+    def _guardar_cursor(self, cursores, chave, futuro):
+        if futuro.cancelled() or futuro.exception() is not None: return
+        with self.lock:
+            cursores[chave] = futuro.result()[1]
+            while len(cursores) > MAX_CURSORES: cursores.popitem(last=False)
+
+    def _futuro(self, chave, submeter):
+        filtros, tamanho, n = chave
+        agora = datetime.now(fuso_br)
+        with self.lock:
+            lru, cursores, item = self._lru, self._cursores, self._lru.get(chave)
+            if item and agora - item[0] < TTL_CACHE: lru.move_to_end(chave); return item[1]
+            guardado = chave in cursores
+            cursor = cursores.get(chave)
+        # Sem o cursor guardado (página nunca aberta ou descartada), ele sai da página anterior
+        if n and not guardado: cursor = self._futuro((filtros, tamanho, n - 1), submeter).result(timeout=TIMEOUT_CARGA)[1]
+        if n and cursor is None: futuro = Future(); futuro.set_result(([], None))   # a anterior era a última
+        else: futuro = submeter(filtros, tamanho, cursor)
+        futuro.add_done_callback(partial(self._guardar_cursor, cursores, (filtros, tamanho, n + 1)))
+        with self.lock:
+            lru[chave] = (agora, futuro)
+            while len(lru) > self.maximo: lru.popitem(last=False)
+        return futuro
+
+    def obter(self, filtros, n, submeter, tamanho=PAGINA_HISTORICO):
+        """Página `n` (0 = mais recente): (docs, tem próxima). `submeter(filtros, tamanho, cursor)` agenda a
+        consulta e devolve um Future; a página seguinte é pedida logo depois, sem esperar por ela."""
+        chave = (filtros, tamanho, n)
+        try: docs, cursor = self._futuro(chave, submeter).result(timeout=TIMEOUT_CARGA)
+        except Exception:
+            with self.lock: self._lru.pop(chave, None)   # não guarda a falha
+            raise
+        if cursor is not None: self._futuro((filtros, tamanho, n + 1), submeter)
+        return docs, cursor is not None
+
+class Periodos:
+    """Resumos diários por período (inicio, fim) de um tenant, em LRU. Um período encerrado antes de
+    hoje sobrevive a `invalidar` (lançamentos do dia) e vale por TTL_FECHADO; o que inclui hoje segue
+    o TTL_CACHE. Retroativos gravados neste processo o descartam na hora (`descartar`); os de outra
+    instância (importação, fila de escritas) aparecem quando o TTL_FECHADO vence."""
+    def __init__(self, maximo=MAX_PERIODOS): self._itens, self.maximo, self.lock = OrderedDict(), maximo, threading.Lock()
+
+    def invalidar(self):
+        with self.lock: self._itens = OrderedDict((k, v) for k, v in self._itens.items() if v[1])
+
+    def descartar(self, dias):
+        """Remove também os encerrados que contêm algum de `dias` (lançamentos retroativos)."""
+        with self.lock: self._itens = OrderedDict((k, v) for k, v in self._itens.items() if not any(k[0] <= d < k[1] for d in dias))
+
+    def obter(self, inicio, fim, carregar):
+        agora = datetime.now(fuso_br)
+        with self.lock:
+            item = self._itens.get((inicio, fim))
+            if item and agora - item[0] < (TTL_FECHADO if item[1] else TTL_CACHE): self._itens.move_to_end((inicio, fim)); return item[2]
+        valor = carregar()
+        with self.lock:
+            self._itens[(inicio, fim)] = (agora, fim <= agora.date(), valor)
+            while len(self._itens) > self.maximo: self._itens.popitem(last=False)
+        return valor
+
+SNAPSHOTS = {"meus_clientes": SnapshotClientes, "meus_servicos": SnapshotServicos}
+
+class Cache:
+    """Snapshots de todos os tenants do processo sobre um `Repositorio`, com escrita write-through."""
+    def __init__(self, repo, max_cargas=MAX_CARGAS):
+        self.repo, self._snaps, self._lock = repo, {}, threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_cargas, thread_name_prefix="vivv-carga")
+
+    def fechar(self):
+        """Encerra as threads de carga (caches de vida curta, como nos benchmarks)."""
+        self._pool.shutdown(wait=True)
+
+    def snapshot(self, email, col, tipo=None):
+        with self._lock:
+            if (email, col) not in self._snaps:
+                if tipo is None: tipo = SNAPSHOTS.get(col) or (partial(SnapshotColunar, col) if col in colunar.ESQUEMAS else Snapshot)
+                self._snaps[(email, col)] = tipo()
+            return self._snaps[(email, col)]
+
+    def carregar(self, email):
+        """Carrega as subcoleções em paralelo. Devolve (dados, erros) com dados = [clientes, serviços,
+        agenda, caixa], onde serviços é um `Catalogo` e as demais são `colunar.Tabela`. Em caso de falha a coleção
+        vem com o último snapshot conhecido (ou vazia) e o erro fica em `erros[colecao]`."""
+        # Cada tarefa leva uma cópia do contexto de quem chamou (a telemetria do rerun conta as leituras)
+        futuros = {c: self._pool.submit(contextvars.copy_context().run, self.snapshot(email, c).obter,
+                                        lambda desde, c=c: self.repo.listar(email, c, desde)) for c in COLECOES}
+        dados, erros = [], {}
+        for c, futuro in futuros.items():
+            try: dados.append(futuro.result(timeout=TIMEOUT_CARGA))
+            except Exception as e: erros[c] = e; dados.append(self.snapshot(email, c).atual())
+        return dados, erros
+
+    def invalidar(self, email, *colecoes):
+        with self._lock: alvos = [self._snaps[(email, c)] for c in colecoes if (email, c) in self._snaps]
+        for alvo in alvos: alvo.invalidar()
+
+    def adicionar(self, email, col, dados):
+        """Grava o documento e o replica no snapshot do tenant (write-through), sem reler a coleção."""
+        doc_id = self.repo.adicionar(email, col, dados)
+        self.snapshot(email, col).registrar(doc_id, dados); self.invalidar(email, *DERIVADOS.get(col, ()))
+        return doc_id
+
+    def gravar_lote(self, email, col, docs):
+        """Grava `docs` (com "id" opcional) em lote, sem tocar no snapshot. Devolve os ids."""
+        if col == "meu_caixa": return self.repo.lancar_caixa_lote(email, docs)
+        return self.repo.adicionar_lote(email, col, docs)
+
+    def replicar(self, email, col, docs):
+        """Replica no snapshot documentos (com "id") gravados por outro caminho e invalida os derivados."""
+        self.snapshot(email, col).registrar_lote(docs)
+        self.invalidar(email, *DERIVADOS.get(col, ()))
+        if col == "meu_caixa": self.snapshot(email, "periodos", Periodos).descartar({dia.date() for dia in map(datas.dia_de, docs) if dia})
+
+    def importar(self, email, col, docs):
+        """Grava `docs` (com "id" opcional) em lote e os replica no snapshot do tenant. Devolve os ids."""
+        ids = self.gravar_lote(email, col, docs)
+        self.replicar(email, col, [{**d, "id": i} for d, i in zip(docs, ids)])
+        return ids
+
+    def lancar_caixa(self, email, dados):
+        doc_id = self.repo.lancar_caixa(email, dados)
+        self.snapshot(email, "meu_caixa").registrar(doc_id, dados); self.invalidar(email, *DERIVADOS["meu_caixa"])
+        return doc_id
+
+    def agendar(self, email, dados, duracao, indice=True):
+        """Agendamento com checagem de conflito no backend (levanta `horarios.Conflito`), write-through.
+        Sem `indice` (tenant sem `horarios_versao`) a ocupação do backend pode não ter os agendamentos
+        antigos, então o horário é conferido antes na agenda em cache."""
+        if not indice:
+            dia, inicio = self._ocupacao_agenda(email, dados["inicio"], 1), horarios.minutos(dados["inicio"])
+            colide = horarios.conflito(dia[0]["intervalos"] if dia else [], inicio, inicio + duracao)
+            if colide: raise horarios.Conflito(colide)
+        doc_id = self.repo.agendar(email, dados, duracao)
+        self.snapshot(email, "minha_agenda").registrar(doc_id, dados); self.invalidar(email, *DERIVADOS["minha_agenda"])
+        return doc_id
+
+    def historico(self, email, col, filtros=(), pagina=0, tamanho=PAGINA_HISTORICO):
+        """Página `pagina` do histórico de `col` por `timestamp` decrescente: (docs, tem próxima).
+        `filtros` é uma tupla de (campo, op, valor), parte da chave das páginas guardadas."""
+        def submeter(filtros, tamanho, cursor):
+            return self._pool.submit(contextvars.copy_context().run, self.repo.historico, email, col, filtros, tamanho, cursor)
+        return self.snapshot(email, f"historico_{col}", Paginas).obter(filtros, pagina, submeter, tamanho)
+
+    def buscar_clientes(self, email, consulta, limite=busca.LIMITE):
+        """Ids dos clientes que casam com `consulta` no snapshot atual (sem ida ao banco)."""
+        return self.snapshot(email, "meus_clientes").indice.buscar(consulta, limite)
+
+    def resumos(self, email):
+        """(últimos 14 dias, todos os meses) a partir dos resumos mantidos a cada lançamento."""
+        return self.snapshot(email, "resumos", Fatia).obter(lambda: (self.repo.resumos_diarios(email), self.repo.resumos_mensais(email)))
+
+    def periodo(self, email, inicio, fim):
+        """Resumos diários de [inicio, fim) lidos por intervalo; períodos encerrados não são relidos."""
+        return self.snapshot(email, "periodos", Periodos).obter(inicio, fim, lambda: self.repo.resumos_periodo(email, inicio, fim))
+
+    def agenda_hoje(self, email):
+        hoje = datetime.now(fuso_br)
+        return self.snapshot(email, "agenda_hoje", Fatia).obter(lambda: self.repo.agenda_do_dia(email, hoje))
+
+    def ocupacao(self, email, dias=14, indice=True):
+        """Ocupação dos próximos `dias` dias, para sugerir horários (o conflito é checado de novo ao gravar).
+        Sem `indice`, calculada da agenda em cache em vez dos documentos de ocupação."""
+        hoje = datetime.now(fuso_br)
+        if not indice: return self._ocupacao_agenda(email, hoje, dias)
+        return self.snapshot(email, "ocupacao", Fatia).obter(lambda: self.repo.ocupacao(email, hoje, dias))
+
+    def _ocupacao_agenda(self, email, inicio, dias):
+        """Ocupação no formato de horarios.py a partir do snapshot de minha_agenda, sem ida ao banco."""
+        agenda, servicos = self.snapshot(email, "minha_agenda").atual(), self.snapshot(email, "meus_servicos").atual()
+        de = np.datetime64(datas.dia(inicio).date(), "D")
+        docs = agenda.documentos((agenda["dia"] >= de) & (agenda["dia"] < de + dias))
+        por_dia = horarios.agrupar(docs, {s.get("nome"): horarios.duracao(s) for s in servicos})
+        return [{"dia": k, "intervalos": v} for k, v in sorted(por_dia.items())]
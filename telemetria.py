@@ -0,0 +1,205 @@
+"""Telemetria do processo: tempos por seção, documentos lidos/gravados e export Prometheus.
+
+Cada rerun abre um `Rerun` (o da página em `iniciar_rerun`, o de um fragmento sozinho em
+`secao`) que acumula os spans e os documentos tocados, inclusive nas threads que recebem uma
+cópia do contexto; ao fechar, entra nos agregados do processo e no histórico curto do tenant
+mostrado no painel de debug. O export só tem os agregados por seção e por operação: o detalhe
+por tenant (email) fica no painel, dentro do processo.
+
+Configuração (st.secrets ou ambiente):
+    VIVV_METRICAS_PORTA   = 9464                       # GET /metrics no formato texto do Prometheus
+    VIVV_METRICAS_HOST    = "127.0.0.1"                # interface do /metrics (sem autenticação)
+    VIVV_METRICAS_ARQUIVO = "/var/lib/node_exporter/vivv.prom"   # regravado a cada 15 s
+    VIVV_ADMINS           = "dono@vivv.com.br,ops@vivv.com.br"  # veem o painel de debug
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)   # buckets dos histogramas, em segundos
+HISTORICO = 20          # reruns guardados por tenant para o painel
+INTERVALO_ARQUIVO = 15
+
+class Histograma:
+    def __init__(self): self.buckets, self.soma, self.n = [0] * len(LIMITES), 0.0, 0
+
+    def observar(self, v):
+        self.soma += v; self.n += 1
+        for i, limite in enumerate(LIMITES):
+            if v <= limite: self.buckets[i] += 1
+
+class Rerun:
+    """Acumulador de um rerun: spans (nome, segundos) e documentos lidos/gravados."""
+    def __init__(self, email, tipo):
+        self.email, self.tipo, self.inicio = email, tipo, time.perf_counter()
+        self.spans, self.leituras, self.escritas = [], 0, 0
+        self.lock = threading.Lock()   # backend é chamado também das threads do pool de carga
+
+    def resumo(self):
+        return {"tipo": self.tipo, "ms": (time.perf_counter() - self.inicio) * 1000, "leituras": self.leituras,
+                "escritas": self.escritas, "spans": sorted(((n, s * 1000) for n, s in self.spans), key=lambda x: -x[1])}
+
+_atual = contextvars.ContextVar("vivv_rerun", default=None)
+_lock = threading.Lock()
+_spans = defaultdict(Histograma)                 # nome -> histograma
+_reruns = defaultdict(Histograma)                # tipo -> histograma
+_leituras, _escritas = defaultdict(int), defaultdict(int)   # operação -> documentos
+_historico = defaultdict(lambda: deque(maxlen=HISTORICO))   # tenant -> resumos dos últimos reruns
+
+# ================= REGISTRO =================
+def _registrar_span(nome, segundos):
+    with _lock: _spans[nome].observar(segundos)
+    rerun = _atual.get()
+    if rerun:
+        with rerun.lock: rerun.spans.append((nome, segundos))
+
+def contar(operacao, leituras=0, escritas=0):
+    with _lock:
+        if leituras: _leituras[operacao] += leituras
+        if escritas: _escritas[operacao] += escritas
+    rerun = _atual.get()
+    if rerun:
+        with rerun.lock: rerun.leituras += leituras; rerun.escritas += escritas
+
+class span:
+    """Mede um trecho: `with span("grafico"):` ou `@span("grafico")`."""
+    def __init__(self, nome): self.nome = nome
+
+    def __enter__(self): self.inicio = time.perf_counter(); return self
+
+    def __exit__(self, *_): _registrar_span(self.nome, time.perf_counter() - self.inicio)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def medido(*args, **kwargs):
+            with span(self.nome): return func(*args, **kwargs)
+        return medido
+
+# ================= RERUNS =================
+def iniciar_rerun(email, tipo="pagina"):
+    fechar_rerun()   # um rerun interrompido (st.rerun/st.stop) não pode receber os spans do próximo
+    rerun = Rerun(email, tipo)
+    _atual.set(rerun)
+    return rerun
+
+def fechar_rerun():
+    rerun = _atual.get()
+    if rerun is None: return None
+    _atual.set(None)
+    resumo = rerun.resumo()
+    with _lock:
+        _reruns[rerun.tipo].observar(resumo["ms"] / 1000)
+        _historico[rerun.email or ""].append(resumo)
+    return resumo
+
+def secao(nome, email=None):
+    """Decorador de fragmento: span `nome` dentro do rerun da página ou, quando o fragmento
+    roda sozinho, um rerun próprio do tipo `fragmento:nome`."""
+    def decorar(func):
+        @functools.wraps(func)
+        def medido(*args, **kwargs):
+            if _atual.get() is not None:
+                with span(nome): return func(*args, **kwargs)
+            iniciar_rerun(email, f"fragmento:{nome}")
+            try:
+                with span(nome): return func(*args, **kwargs)
+            finally: fechar_rerun()
+        return medido
+    return decorar
+
+def historico(email):
+    with _lock: return list(_historico.get(email, ()))
+
+# ================= REPOSITÓRIO =================
+class RepositorioMedido:
+    """Envolve um `Repositorio`: span `repo.<método>` em cada chamada e contagem de documentos.
+
+    Leituras = documentos devolvidos (mínimo 1 por consulta, como o Firestore cobra); escritas =
+    o que o próprio backend diz ter gravado (`Repositorio.escritas`), que varia de um para outro.
+    """
+    def __init__(self, repo): self._repo = repo
+
+    def __getattr__(self, nome):
+        alvo = getattr(self._repo, nome)
+        if not callable(alvo): return alvo
+        if nome == "paginar": return self._paginar
+        @functools.wraps(alvo)
+        def medido(*args, **kwargs):
+            with span(f"repo.{nome}"): resultado = alvo(*args, **kwargs)
+            escritas = self._repo.escritas(nome, *args)
+            if escritas is not None: contar(nome, escritas=escritas)
+            elif nome == "historico": contar(nome, leituras=max(len(resultado[0]), 1))
+            elif isinstance(resultado, list): contar(nome, leituras=max(len(resultado), 1))
+            elif isinstance(resultado, (dict, bool)) or resultado is None: contar(nome, leituras=1)
+            return resultado
+        return medido
+
+    def _paginar(self, email, col, tamanho=500):
+        paginas = self._repo.paginar(email, col, tamanho)
+        while True:
+            with span("repo.paginar"): pagina = next(paginas, None)
+            if pagina is None: return
+            contar("paginar", leituras=max(len(pagina), 1))
+            yield pagina
+
+# ================= EXPORT =================
+def _escapar(v): return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _rotulos(**r): return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in r.items()) + "}"
+
+def _histograma(linhas, nome, rotulos, h):
+    for limite, n in zip(LIMITES, h.buckets): linhas.append(f"{nome}_bucket{_rotulos(**rotulos, le=limite)} {n}")
+    linhas.append(f"{nome}_bucket{_rotulos(**rotulos, le='+Inf')} {h.n}")
+    linhas.append(f"{nome}_sum{_rotulos(**rotulos)} {h.soma:.6f}")
+    linhas.append(f"{nome}_count{_rotulos(**rotulos)} {h.n}")
+
+def prometheus():
+    """Agregados do processo no formato texto do Prometheus."""
+    with _lock:
+        linhas = ["# HELP vivv_span_segundos Duração de seções e chamadas ao backend.", "# TYPE vivv_span_segundos histogram"]
+        for nome, h in sorted(_spans.items()): _histograma(linhas, "vivv_span_segundos", {"span": nome}, h)
+        linhas += ["# HELP vivv_rerun_segundos Duração de reruns (página ou fragmento).", "# TYPE vivv_rerun_segundos histogram"]
+        for tipo, h in sorted(_reruns.items()): _histograma(linhas, "vivv_rerun_segundos", {"tipo": tipo}, h)
+        for nome, valores, ajuda in (("vivv_documentos_lidos_total", _leituras, "Documentos lidos no backend."),
+                                     ("vivv_documentos_gravados_total", _escritas, "Documentos gravados no backend.")):
+            linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} counter"]
+            linhas += [f"{nome}{_rotulos(operacao=op)} {n}" for op, n in sorted(valores.items())]
+    return "\n".join(linhas) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpo = prometheus().encode()
+        self.send_response(200 if self.path.rstrip("/") in ("", "/metrics") else 404)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *_): pass
+
+def _gravar_arquivo(caminho):
+    temporario = f"{caminho}.tmp"
+    while True:
+        try:
+            with open(temporario, "w", encoding="utf-8") as f: f.write(prometheus())
+            os.replace(temporario, caminho)   # o coletor nunca lê um arquivo pela metade
+        except OSError as e: logging.getLogger("vivv").warning("Métricas não gravadas em %s: %s", caminho, e)
+        time.sleep(INTERVALO_ARQUIVO)
+
+def exportar(config):
+    """Sobe o endpoint HTTP e/ou a gravação periódica em arquivo conforme a configuração.
+    Chame uma vez por processo."""
+    if config.get("VIVV_METRICAS_PORTA"):
+        servidor = ThreadingHTTPServer((config.get("VIVV_METRICAS_HOST", "127.0.0.1"), int(config["VIVV_METRICAS_PORTA"])), _Handler)
+        threading.Thread(target=servidor.serve_forever, name="vivv-metricas", daemon=True).start()
+    if config.get("VIVV_METRICAS_ARQUIVO"):
+        threading.Thread(target=_gravar_arquivo, args=(config["VIVV_METRICAS_ARQUIVO"],), name="vivv-metricas-arquivo", daemon=True).start()
+
+def admins(config):
+    valor = config.get("VIVV_ADMINS", "")
+    return {e.strip().lower() for e in (valor.split(",") if isinstance(valor, str) else valor) if e.strip()}